@@ -2,18 +2,29 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
 #include <zdepth.hpp>
+#include <cstring>
+#include <mutex>
+#include <new>
 
 typedef 
 struct
 {
     PyObject_HEAD
     zdepth::DepthCompressor zddc;
+    std::mutex lock;
+    std::vector<uint8_t> compressed;
+    std::vector<uint16_t> depth_out;
 } 
 DepthCompressor;
 
 PyObject *DepthCompressor_new(PyTypeObject *type, PyObject *, PyObject *)
 {
     DepthCompressor *self = (DepthCompressor*) type->tp_alloc(type, 0);
+    if (self == NULL) {return NULL;}
+    new (&self->zddc) zdepth::DepthCompressor();
+    new (&self->lock) std::mutex();
+    new (&self->compressed) std::vector<uint8_t>();
+    new (&self->depth_out) std::vector<uint16_t>();
     return (PyObject*) self;
 }
 
@@ -24,6 +35,10 @@ int DepthCompressor_init(PyObject *self, PyObject *args, PyObject *kwds)
 
 void DepthCompressor_dealloc(DepthCompressor *self)
 {
+    self->depth_out.~vector();
+    self->compressed.~vector();
+    self->lock.~mutex();
+    self->zddc.~DepthCompressor();
     Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
@@ -65,10 +80,128 @@ PyObject *DepthCompressor_Decompress(PyObject *self, PyObject *args)
     return Py_BuildValue("iiiy#", (int)result, width, height, depth_out.data(), depth_out.size() * sizeof(uint16_t));
 }
 
+// Decompresses data into out without holding the GIL
+// Frames that do not fit in out are not copied and reported as BadDimensions
+// Calls on the same DepthCompressor are serialized since frames reference
+// the previous one
+static zdepth::DepthResult DepthCompressor_DecompressBuffer(DepthCompressor *self, Py_buffer const &data, Py_buffer const &out, int &width, int &height)
+{
+    uint8_t const *base = (uint8_t const *)data.buf;
+    std::lock_guard<std::mutex> guard(self->lock);
+
+    self->compressed.assign(base, base + data.len);
+    width = 0;
+    height = 0;
+
+    zdepth::DepthResult result = self->zddc.Decompress(self->compressed, width, height, self->depth_out);
+    if (result != zdepth::DepthResult::Success) {return result;}
+
+    size_t size = self->depth_out.size() * sizeof(uint16_t);
+    if (size > (size_t)out.len) {return zdepth::DepthResult::BadDimensions;}
+
+    memcpy(out.buf, self->depth_out.data(), size);
+    return result;
+}
+
+PyObject *DepthCompressor_DecompressInto(PyObject *self, PyObject *args)
+{
+    Py_buffer data;
+    Py_buffer out;
+
+    if (!PyArg_ParseTuple(args, "y*w*", &data, &out)) {return NULL;}
+
+    DepthCompressor *_self = reinterpret_cast<DepthCompressor*>(self);
+    zdepth::DepthResult result;
+    int width;
+    int height;
+
+    Py_BEGIN_ALLOW_THREADS
+    result = DepthCompressor_DecompressBuffer(_self, data, out, width, height);
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&out);
+    PyBuffer_Release(&data);
+
+    return Py_BuildValue("iii", (int)result, width, height);
+}
+
+PyObject *DepthCompressor_DecompressBatch(PyObject *self, PyObject *args)
+{
+    PyObject *data_list;
+    PyObject *out_list;
+
+    if (!PyArg_ParseTuple(args, "OO", &data_list, &out_list)) {return NULL;}
+
+    PyObject *data_seq = PySequence_Fast(data_list, "data must be a sequence");
+    if (data_seq == NULL) {return NULL;}
+    PyObject *out_seq = PySequence_Fast(out_list, "out must be a sequence");
+    if (out_seq == NULL) {Py_DECREF(data_seq); return NULL;}
+
+    Py_ssize_t count = PySequence_Fast_GET_SIZE(data_seq);
+    if (PySequence_Fast_GET_SIZE(out_seq) != count)
+    {
+        PyErr_SetString(PyExc_ValueError, "data and out must have the same length");
+        Py_DECREF(out_seq);
+        Py_DECREF(data_seq);
+        return NULL;
+    }
+
+    std::vector<Py_buffer> data(count);
+    std::vector<Py_buffer> out(count);
+    Py_ssize_t acquired = 0;
+    bool ok = true;
+
+    for (; acquired < count; ++acquired)
+    {
+        if (PyObject_GetBuffer(PySequence_Fast_GET_ITEM(data_seq, acquired), &data[acquired], PyBUF_SIMPLE) < 0) {ok = false; break;}
+        if (PyObject_GetBuffer(PySequence_Fast_GET_ITEM(out_seq, acquired), &out[acquired], PyBUF_WRITABLE) < 0) {PyBuffer_Release(&data[acquired]); ok = false; break;}
+    }
+
+    PyObject *results = NULL;
+
+    if (ok)
+    {
+        DepthCompressor *_self = reinterpret_cast<DepthCompressor*>(self);
+        std::vector<zdepth::DepthResult> result(count);
+        std::vector<int> width(count);
+        std::vector<int> height(count);
+
+        Py_BEGIN_ALLOW_THREADS
+        for (Py_ssize_t i = 0; i < count; ++i) {result[i] = DepthCompressor_DecompressBuffer(_self, data[i], out[i], width[i], height[i]);}
+        Py_END_ALLOW_THREADS
+
+        results = PyList_New(count);
+        for (Py_ssize_t i = 0; (results != NULL) && (i < count); ++i)
+        {
+            PyObject *item = Py_BuildValue("iii", (int)result[i], width[i], height[i]);
+            if (item == NULL)
+            {
+                Py_DECREF(results);
+                results = NULL;
+                break;
+            }
+            PyList_SET_ITEM(results, i, item);
+        }
+    }
+
+    for (Py_ssize_t i = 0; i < acquired; ++i)
+    {
+        PyBuffer_Release(&out[i]);
+        PyBuffer_Release(&data[i]);
+    }
+
+    Py_DECREF(out_seq);
+    Py_DECREF(data_seq);
+
+    return results;
+}
+
 static PyMethodDef DepthCompressor_methods[] =
 {
     {"Compress",   (PyCFunction)DepthCompressor_Compress,   METH_VARARGS, PyDoc_STR("Compress uint16 depth frame")},
     {"Decompress", (PyCFunction)DepthCompressor_Decompress, METH_VARARGS, PyDoc_STR("Decompress uint16 depth frame")},
+    {"DecompressInto", (PyCFunction)DepthCompressor_DecompressInto, METH_VARARGS, PyDoc_STR("Decompress uint16 depth frame into a writable buffer, releases the GIL")},
+    {"DecompressBatch", (PyCFunction)DepthCompressor_DecompressBatch, METH_VARARGS, PyDoc_STR("Decompress consecutive uint16 depth frames into writable buffers, releases the GIL")},
     {NULL, NULL, 0, NULL}
 };
 
@@ -106,6 +239,12 @@ PyModuleDef DepthCompressor_module =
 PyMODINIT_FUNC PyInit_pyzdepth()
 {
     PyObject* module = PyModule_Create(&DepthCompressor_module);
+    if (module == NULL) {return NULL;}
+    if (PyModule_AddIntConstant(module, "DEPTH_RESULT_SUCCESS", (int)zdepth::DepthResult::Success) < 0)
+    {
+        Py_DECREF(module);
+        return NULL;
+    }
     PyObject* depthcompressor = PyType_FromSpec(&DepthCompressor_spec);
     if (depthcompressor == NULL) {return NULL;}
     Py_INCREF(depthcompressor);
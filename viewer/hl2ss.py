@@ -1,7 +1,12 @@
 
+import collections
+import concurrent.futures
 import numpy as np
+import os
 import socket
 import struct
+import threading
+import time
 import cv2
 import av
 
@@ -47,6 +52,7 @@ class ChunkSize:
     EXTENDED_EYE_TRACKER = 256
     EXTENDED_AUDIO       = 512
     SINGLE_TRANSFER      = 4096
+    ADAPTIVE             = 0
 
 
 # Stream Operating Mode
@@ -274,9 +280,29 @@ class _RANGEOF:
     U64_MAX = 0xFFFFFFFFFFFFFFFF
 
 
+# Socket options are lists of (level, option, value) tuples passed to
+# socket.setsockopt, given per receiver (socket_options argument)
+# Options are applied before connecting so that SO_RCVBUF can affect the TCP
+# window scale
+_IPC_SOCKET_OPTIONS = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+
+
+def create_socket_options(receive_buffer=None, no_delay=False, keep_alive=False):
+    options = []
+    if (receive_buffer is not None):
+        options.append((socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer))
+    if (no_delay):
+        options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+    if (keep_alive):
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    return options
+
+
 class _client:
-    def open(self, host, port):
+    def open(self, host, port, socket_options=None):
         self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        for level, option, value in ([] if (socket_options is None) else socket_options):
+            self._socket.setsockopt(level, option, value)
         self._socket.connect((host, port))
 
     def sendall(self, data):
@@ -285,9 +311,25 @@ class _client:
     def recv(self, chunk_size):
         chunk = self._socket.recv(chunk_size)
         if (len(chunk) <= 0):
-            raise Exception('connection closed')
+            raise ConnectionError('connection closed')
         return chunk
 
+    def fileno(self):
+        return self._socket.fileno()
+
+    # Wakes up threads blocked in recv, the socket must still be closed
+    def shutdown(self):
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def recv_into(self, buffer):
+        count = self._socket.recv_into(buffer)
+        if (count <= 0):
+            raise ConnectionError('connection closed')
+        return count
+
     def download(self, total, chunk_size):
         data = bytearray()
 
@@ -301,6 +343,7 @@ class _client:
         return data
 
     def close(self):
+        self.shutdown()
         self._socket.close()
 
 
@@ -339,40 +382,89 @@ class _unpacker:
     def reset(self, mode):
         self._mode = mode
         self._state = 0
-        self._buffer = bytearray()
+        self._buffer = bytearray(ChunkSize.SINGLE_TRANSFER)
+        self._view = memoryview(self._buffer)
+        self._begin = 0
+        self._end = 0
+        self._direct = False
+        self._target = None
+        self._offset = 0
         self._timestamp = None
-        self._size = None
         self._payload = None
         self._pose = None
 
+    def _reserve(self, size):
+        count = self._end - self._begin
+        if (self._begin > 0):
+            self._view[:count] = self._view[self._begin:self._end]
+            self._begin = 0
+            self._end = count
+        if ((len(self._buffer) - count) < size):
+            buffer = bytearray(max(2 * len(self._buffer), count + size))
+            buffer[:count] = self._view[:count]
+            self._buffer = buffer
+            self._view = memoryview(self._buffer)
+
+    def _set_target(self, target):
+        self._target = memoryview(target)
+        self._offset = 0
+
+    def _fill(self):
+        count = min(self._end - self._begin, len(self._target) - self._offset)
+        self._target[self._offset:(self._offset + count)] = self._view[self._begin:(self._begin + count)]
+        self._begin += count
+        self._offset += count
+        if (self._offset < len(self._target)):
+            return False
+        self._target = None
+        return True
+
+    # Returns (buffer, direct) where direct means that the buffer is the
+    # remaining part of the payload or pose being received
+    def get_buffer(self, size):
+        self._direct = (self._target is not None) and (self._begin >= self._end)
+        if (self._direct):
+            return (self._target[self._offset:], True)
+        self._reserve(size)
+        return (self._view[self._end:(self._end + size)], False)
+
+    def update(self, count):
+        if (self._direct):
+            self._offset += count
+        else:
+            self._end += count
+
     def extend(self, chunk):
-        self._buffer.extend(chunk)
+        size = len(chunk)
+        self._reserve(size)
+        self._view[self._end:(self._end + size)] = chunk
+        self._end += size
 
-    def unpack(self):        
-        length = len(self._buffer)
-        
+    def unpack(self):
         while (True):
             if (self._state == 0):
-                if (length >= 12):
-                    header = struct.unpack('<QI', self._buffer[:12])
-                    self._timestamp = header[0]
-                    self._size = 12 + header[1]
-                    if (self._mode == StreamMode.MODE_1):
-                        self._size += 64
-                    self._state = 1
-                    continue
+                if ((self._end - self._begin) < 12):
+                    return False
+                self._timestamp, size = struct.unpack_from('<QI', self._buffer, self._begin)
+                self._begin += 12
+                self._payload = bytearray(size)
+                self._pose = bytearray(64) if (self._mode == StreamMode.MODE_1) else None
+                self._set_target(self._payload)
+                self._state = 1
             elif (self._state == 1):
-                if (length >= self._size):
-                    if (self._mode == StreamMode.MODE_1):
-                        payload_end = self._size - 64
-                        self._pose = np.frombuffer(self._buffer[payload_end:self._size], dtype=np.float32).reshape((4, 4))
-                    else:
-                        payload_end = self._size
-                    self._payload = self._buffer[12:payload_end]
-                    self._buffer = self._buffer[self._size:]
+                if (not self._fill()):
+                    return False
+                if (self._pose is None):
                     self._state = 0
                     return True
-            return False
+                self._set_target(self._pose)
+                self._state = 2
+            elif (self._state == 2):
+                if (not self._fill()):
+                    return False
+                self._pose = np.frombuffer(self._pose, dtype=np.float32).reshape((4, 4))
+                self._state = 0
+                return True
 
     def get(self):
         return _packet(self._timestamp, self._payload, self._pose)
@@ -382,22 +474,80 @@ class _unpacker:
 # Packet Gatherer
 #------------------------------------------------------------------------------
 
+class _ADAPTIVE_CHUNK:
+    MINIMUM = 256
+    MAXIMUM = 1024*1024
+    SHRINK  = 4
+    ALPHA   = 1 / 16
+
+
+class _receive_statistics:
+    def __init__(self, packets, reads, bytes, chunk):
+        self.packets = packets
+        self.reads = reads
+        self.bytes = bytes
+        self.chunk = chunk
+        self.reads_per_packet = (reads / packets) if (packets > 0) else None
+
+
 class _gatherer:
-    def open(self, host, port, chunk_size, mode):
+    def open(self, host, port, chunk_size, mode, socket_options=None):
         self._client = _client()
         self._unpacker = _unpacker()
-        self._chunk_size = chunk_size
+        self._adaptive = chunk_size == ChunkSize.ADAPTIVE
+        self._chunk_size = ChunkSize.SINGLE_TRANSFER if (self._adaptive) else chunk_size
+        self._mean_size = None
+        self._packets = 0
+        self._reads = 0
+        self._bytes = 0
         self._unpacker.reset(mode)
-        self._client.open(host, port)
+        self._client.open(host, port, socket_options)
         
     def sendall(self, data):
         self._client.sendall(data)
 
     def get_next_packet(self):
-        while (True):
-            self._unpacker.extend(self._client.recv(self._chunk_size))
-            if (self._unpacker.unpack()):
-                return self._unpacker.get()
+        while (not self._unpacker.unpack()):
+            self.receive()
+        return self._get()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        buffer, direct = self._unpacker.get_buffer(self._chunk_size)
+        count = self._client.recv_into(buffer)
+        self._unpacker.update(count)
+        self._reads += 1
+        self._bytes += count
+        if (self._adaptive and (not direct)):
+            self._adapt(count, len(buffer))
+
+    def get_packet(self):
+        return self._get() if (self._unpacker.unpack()) else None
+
+    def _get(self):
+        data = self._unpacker.get()
+        size = 12 + len(data.payload) + (64 if (data.pose is not None) else 0)
+        self._mean_size = size if (self._mean_size is None) else (self._mean_size + _ADAPTIVE_CHUNK.ALPHA * (size - self._mean_size))
+        self._packets += 1
+        return data
+
+    # Grow while reads fill the buffer (more data is waiting in the socket)
+    # and shrink while reads use a small fraction of it, but not below the
+    # average packet size so that small packets take a single read
+    def _adapt(self, count, requested):
+        if (count >= requested):
+            self._chunk_size = min(2 * self._chunk_size, _ADAPTIVE_CHUNK.MAXIMUM)
+        elif ((count * _ADAPTIVE_CHUNK.SHRINK) <= requested):
+            floor = 1 << (int(self._mean_size) - 1).bit_length() if (self._mean_size is not None) else _ADAPTIVE_CHUNK.MINIMUM
+            self._chunk_size = max(self._chunk_size // 2, min(max(floor, _ADAPTIVE_CHUNK.MINIMUM), _ADAPTIVE_CHUNK.MAXIMUM))
+
+    def get_statistics(self):
+        return _receive_statistics(self._packets, self._reads, self._bytes, self._chunk_size)
 
     def close(self):
         self._client.close()
@@ -551,64 +701,64 @@ def extended_audio_device_mixer_mode(mixer_mode, device):
 # Mode 0 and Mode 1 Data Acquisition
 #------------------------------------------------------------------------------
 
-def _connect_client_rm_vlc(host, port, chunk_size, mode, divisor, profile, level, bitrate, options):
+def _connect_client_rm_vlc(host, port, chunk_size, mode, divisor, profile, level, bitrate, options, socket_options=None):
     c = _gatherer()
-    c.open(host, port, chunk_size, mode)
+    c.open(host, port, chunk_size, mode, socket_options)
     c.sendall(_create_configuration_for_rm_vlc(mode, divisor, profile, level, bitrate, options))
     return c
 
 
-def _connect_client_rm_depth_ahat(host, port, chunk_size, mode, divisor, profile_z, profile_ab, level, bitrate, options):
+def _connect_client_rm_depth_ahat(host, port, chunk_size, mode, divisor, profile_z, profile_ab, level, bitrate, options, socket_options=None):
     c = _gatherer()
-    c.open(host, port, chunk_size, mode)
+    c.open(host, port, chunk_size, mode, socket_options)
     c.sendall(_create_configuration_for_rm_depth_ahat(mode, divisor, profile_z, profile_ab, level, bitrate, options))
     return c
 
 
-def _connect_client_rm_depth_longthrow(host, port, chunk_size, mode, divisor, png_filter):
+def _connect_client_rm_depth_longthrow(host, port, chunk_size, mode, divisor, png_filter, socket_options=None):
     c = _gatherer()
-    c.open(host, port, chunk_size, mode)
+    c.open(host, port, chunk_size, mode, socket_options)
     c.sendall(_create_configuration_for_rm_depth_longthrow(mode, divisor, png_filter))
     return c
 
 
-def _connect_client_rm_imu(host, port, chunk_size, mode):
+def _connect_client_rm_imu(host, port, chunk_size, mode, socket_options=None):
     c = _gatherer()
-    c.open(host, port, chunk_size, mode)
+    c.open(host, port, chunk_size, mode, socket_options)
     c.sendall(_create_configuration_for_rm_imu(mode))
     return c
 
 
-def _connect_client_pv(host, port, chunk_size, mode, width, height, framerate, divisor, profile, level, bitrate, options):
+def _connect_client_pv(host, port, chunk_size, mode, width, height, framerate, divisor, profile, level, bitrate, options, socket_options=None):
     c = _gatherer()
-    c.open(host, port, chunk_size, mode)
+    c.open(host, port, chunk_size, mode, socket_options)
     c.sendall(_create_configuration_for_pv(mode, width, height, framerate, divisor, profile, level, bitrate, options))
     return c
 
 
-def _connect_client_microphone(host, port, chunk_size, profile, level):
+def _connect_client_microphone(host, port, chunk_size, profile, level, socket_options=None):
     c = _gatherer()
-    c.open(host, port, chunk_size, StreamMode.MODE_0)
+    c.open(host, port, chunk_size, StreamMode.MODE_0, socket_options)
     c.sendall(_create_configuration_for_microphone(profile, level))
     return c
 
 
-def _connect_client_si(host, port, chunk_size):
+def _connect_client_si(host, port, chunk_size, socket_options=None):
     c = _gatherer()
-    c.open(host, port, chunk_size, StreamMode.MODE_0)
+    c.open(host, port, chunk_size, StreamMode.MODE_0, socket_options)
     return c
 
 
-def _connect_client_eet(host, port, chunk_size, fps):
+def _connect_client_eet(host, port, chunk_size, fps, socket_options=None):
     c = _gatherer()
-    c.open(host, port, chunk_size, StreamMode.MODE_1)
+    c.open(host, port, chunk_size, StreamMode.MODE_1, socket_options)
     c.sendall(_create_configuration_for_eet(fps))
     return c
 
 
-def _connect_client_extended_audio(host, port, chunk_size, mixer_mode, loopback_gain, microphone_gain, profile, level):
+def _connect_client_extended_audio(host, port, chunk_size, mixer_mode, loopback_gain, microphone_gain, profile, level, socket_options=None):
     c = _gatherer()
-    c.open(host, port, chunk_size, StreamMode.MODE_0)
+    c.open(host, port, chunk_size, StreamMode.MODE_0, socket_options)
     c.sendall(_create_configuration_for_extended_audio(mixer_mode, loopback_gain, microphone_gain, profile, level))
     return c
 
@@ -652,7 +802,7 @@ class _context_manager:
 #------------------------------------------------------------------------------
 
 class rx_rm_vlc(_context_manager):
-    def __init__(self, host, port, chunk, mode, divisor, profile, level, bitrate, options):
+    def __init__(self, host, port, chunk, mode, divisor, profile, level, bitrate, options, socket_options=None):
         self.host = host
         self.port = port
         self.chunk = chunk
@@ -662,19 +812,35 @@ class rx_rm_vlc(_context_manager):
         self.level = level
         self.bitrate = bitrate
         self.options = options
+        self.socket_options = socket_options
 
     def open(self):
-        self._client = _connect_client_rm_vlc(self.host, self.port, self.chunk, self.mode, self.divisor, self.profile, self.level, self.bitrate, self.options)
+        self._client = _connect_client_rm_vlc(self.host, self.port, self.chunk, self.mode, self.divisor, self.profile, self.level, self.bitrate, self.options, self.socket_options)
 
     def get_next_packet(self):
         return self._client.get_next_packet()
 
+    def get_receive_statistics(self):
+        return self._client.get_statistics()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        self._client.receive()
+
+    def get_buffered_packet(self):
+        return self._client.get_packet()
+
     def close(self):
         self._client.close()
 
 
 class rx_rm_depth_ahat(_context_manager):
-    def __init__(self, host, port, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options):
+    def __init__(self, host, port, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options, socket_options=None):
         self.host = host
         self.port = port
         self.chunk = chunk
@@ -685,55 +851,103 @@ class rx_rm_depth_ahat(_context_manager):
         self.level = level
         self.bitrate = bitrate
         self.options = options
+        self.socket_options = socket_options
 
     def open(self):
-        self._client = _connect_client_rm_depth_ahat(self.host, self.port, self.chunk, self.mode, self.divisor, self.profile_z, self.profile_ab, self.level, self.bitrate, self.options)
+        self._client = _connect_client_rm_depth_ahat(self.host, self.port, self.chunk, self.mode, self.divisor, self.profile_z, self.profile_ab, self.level, self.bitrate, self.options, self.socket_options)
 
     def get_next_packet(self):
         return self._client.get_next_packet()
 
+    def get_receive_statistics(self):
+        return self._client.get_statistics()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        self._client.receive()
+
+    def get_buffered_packet(self):
+        return self._client.get_packet()
+
     def close(self):
         self._client.close()
 
 
 class rx_rm_depth_longthrow(_context_manager):
-    def __init__(self, host, port, chunk, mode, divisor, png_filter):
+    def __init__(self, host, port, chunk, mode, divisor, png_filter, socket_options=None):
         self.host = host
         self.port = port
         self.chunk = chunk
         self.mode = mode
         self.divisor = divisor
         self.png_filter = png_filter
+        self.socket_options = socket_options
 
     def open(self):
-        self._client = _connect_client_rm_depth_longthrow(self.host, self.port, self.chunk, self.mode, self.divisor, self.png_filter)
+        self._client = _connect_client_rm_depth_longthrow(self.host, self.port, self.chunk, self.mode, self.divisor, self.png_filter, self.socket_options)
 
     def get_next_packet(self):
         return self._client.get_next_packet()
 
+    def get_receive_statistics(self):
+        return self._client.get_statistics()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        self._client.receive()
+
+    def get_buffered_packet(self):
+        return self._client.get_packet()
+
     def close(self):
         self._client.close()
 
 
 class rx_rm_imu(_context_manager):
-    def __init__(self, host, port, chunk, mode):
+    def __init__(self, host, port, chunk, mode, socket_options=None):
         self.host = host
         self.port = port
         self.chunk = chunk
         self.mode = mode
+        self.socket_options = socket_options
 
     def open(self):
-        self._client = _connect_client_rm_imu(self.host, self.port, self.chunk, self.mode)
+        self._client = _connect_client_rm_imu(self.host, self.port, self.chunk, self.mode, self.socket_options)
 
     def get_next_packet(self):
         return self._client.get_next_packet()
 
+    def get_receive_statistics(self):
+        return self._client.get_statistics()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        self._client.receive()
+
+    def get_buffered_packet(self):
+        return self._client.get_packet()
+
     def close(self):
         self._client.close()
 
 
 class rx_pv(_context_manager):
-    def __init__(self, host, port, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options):
+    def __init__(self, host, port, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options, socket_options=None):
         self.host = host
         self.port = port
         self.chunk = chunk
@@ -746,70 +960,134 @@ class rx_pv(_context_manager):
         self.level = level
         self.bitrate = bitrate
         self.options = options
+        self.socket_options = socket_options
 
     def open(self):
-        self._client = _connect_client_pv(self.host, self.port, self.chunk, self.mode, self.width, self.height, self.framerate, self.divisor, self.profile, self.level, self.bitrate, self.options)
+        self._client = _connect_client_pv(self.host, self.port, self.chunk, self.mode, self.width, self.height, self.framerate, self.divisor, self.profile, self.level, self.bitrate, self.options, self.socket_options)
 
     def get_next_packet(self):
         return self._client.get_next_packet()
 
+    def get_receive_statistics(self):
+        return self._client.get_statistics()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        self._client.receive()
+
+    def get_buffered_packet(self):
+        return self._client.get_packet()
+
     def close(self):
         self._client.close()
 
 
 class rx_microphone(_context_manager):
-    def __init__(self, host, port, chunk, profile, level):
+    def __init__(self, host, port, chunk, profile, level, socket_options=None):
         self.host = host
         self.port = port
         self.chunk = chunk
         self.profile = profile
         self.level = level
+        self.socket_options = socket_options
 
     def open(self):
-        self._client = _connect_client_microphone(self.host, self.port, self.chunk, self.profile, self.level)
+        self._client = _connect_client_microphone(self.host, self.port, self.chunk, self.profile, self.level, self.socket_options)
 
     def get_next_packet(self):
         return self._client.get_next_packet()
 
+    def get_receive_statistics(self):
+        return self._client.get_statistics()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        self._client.receive()
+
+    def get_buffered_packet(self):
+        return self._client.get_packet()
+
     def close(self):
         self._client.close()
 
 
 class rx_si(_context_manager):
-    def __init__(self, host, port, chunk):
+    def __init__(self, host, port, chunk, socket_options=None):
         self.host = host
         self.port = port
         self.chunk = chunk
+        self.socket_options = socket_options
 
     def open(self):
-        self._client = _connect_client_si(self.host, self.port, self.chunk)
+        self._client = _connect_client_si(self.host, self.port, self.chunk, self.socket_options)
 
     def get_next_packet(self):
         return self._client.get_next_packet()
 
+    def get_receive_statistics(self):
+        return self._client.get_statistics()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        self._client.receive()
+
+    def get_buffered_packet(self):
+        return self._client.get_packet()
+
     def close(self):
         self._client.close()
 
 
 class rx_eet(_context_manager):
-    def __init__(self, host, port, chunk, fps):
+    def __init__(self, host, port, chunk, fps, socket_options=None):
         self.host = host
         self.port = port
         self.chunk = chunk
         self.fps = fps
+        self.socket_options = socket_options
 
     def open(self):
-        self._client = _connect_client_eet(self.host, self.port, self.chunk, self.fps)
+        self._client = _connect_client_eet(self.host, self.port, self.chunk, self.fps, self.socket_options)
 
     def get_next_packet(self):
         return self._client.get_next_packet()
+
+    def get_receive_statistics(self):
+        return self._client.get_statistics()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        self._client.receive()
+
+    def get_buffered_packet(self):
+        return self._client.get_packet()
     
     def close(self):
         self._client.close()
 
 
 class rx_extended_audio:
-    def __init__(self, host, port, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level):
+    def __init__(self, host, port, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level, socket_options=None):
         self.host = host
         self.port = port
         self.chunk = chunk
@@ -818,12 +1096,28 @@ class rx_extended_audio:
         self.microphone_gain = microphone_gain
         self.profile = profile
         self.level = level
+        self.socket_options = socket_options
 
     def open(self):
-        self._client = _connect_client_extended_audio(self.host, self.port, self.chunk, self.mixer_mode, self.loopback_gain, self.microphone_gain, self.profile, self.level)
+        self._client = _connect_client_extended_audio(self.host, self.port, self.chunk, self.mixer_mode, self.loopback_gain, self.microphone_gain, self.profile, self.level, self.socket_options)
 
     def get_next_packet(self):
         return self._client.get_next_packet()
+
+    def get_receive_statistics(self):
+        return self._client.get_statistics()
+
+    def fileno(self):
+        return self._client.fileno()
+
+    def shutdown(self):
+        self._client.shutdown()
+
+    def receive(self):
+        self._client.receive()
+
+    def get_buffered_packet(self):
+        return self._client.get_packet()
     
     def close(self):
         self._client.close()
@@ -868,10 +1162,100 @@ def get_audio_codec_bitrate(profile):
         return 20000*8
     if (profile == AudioProfile.AAC_24000):
         return 24000*8
-    
+
     return None
 
 
+def is_video_keyframe(profile, data):
+    name = get_video_codec_name(profile)
+    if (name is None):
+        return True
+    start = data.find(b'\x00\x00\x01')
+    while ((start >= 0) and (start + 3 < len(data))):
+        if (name == 'h264'):
+            nal_unit_type = data[start + 3] & 0x1F
+            if (nal_unit_type == 5):
+                return True
+            if (nal_unit_type == 1):
+                return False
+        else:
+            nal_unit_type = (data[start + 3] >> 1) & 0x3F
+            if ((nal_unit_type >= 16) and (nal_unit_type <= 21)):
+                return True
+            if (nal_unit_type < 16):
+                return False
+        start = data.find(b'\x00\x00\x01', start + 3)
+    return False
+
+
+# Video decoder threading (PyAV thread_type)
+# SLICE: no added latency, only effective when frames have multiple slices
+# FRAME: decodes up to thread_count frames in parallel, frames are output
+#        thread_count - 1 packets late (use the submit interface)
+# AUTO:  SLICE and FRAME
+class VideoDecoderThreading:
+    NONE  = 'NONE'
+    SLICE = 'SLICE'
+    FRAME = 'FRAME'
+    AUTO  = 'AUTO'
+
+
+def _create_video_codec(profile, thread_type, thread_count):
+    codec = av.CodecContext.create(get_video_codec_name(profile), 'r')
+    if (thread_type is not None):
+        codec.thread_type = thread_type
+        codec.thread_count = thread_count
+    return codec
+
+
+# Pipelined decoding
+# Each payload must contain exactly one frame
+# submit returns the (frame, context) pairs that are ready, in order, where
+# context is the value given with the payload the frame was decoded from
+# flush drains the codec and must be called before it is released, since
+# frame threads with pending frames do not exit, the codec cannot be used
+# afterwards and further calls return no frames
+class _video_pipeline:
+    def __init__(self, codec):
+        self._codec = codec
+        self._index = 0
+        self._pending = dict()
+        self._flushed = False
+
+    def _decode(self, packet):
+        return [(frame, self._pending.pop(frame.pts)) for frame in self._codec.decode(packet) if (frame.pts in self._pending)]
+
+    def _packet(self, payload):
+        packet = av.Packet(payload)
+        packet.pts = self._index
+        self._index += 1
+        return packet
+
+    def submit(self, payload, context):
+        self._pending[self._index] = context
+        return self._decode(self._packet(payload))
+
+    # Decodes the payload to advance the codec state, the frame is discarded
+    def skip(self, payload):
+        self._decode(self._packet(payload))
+
+    def flush(self):
+        if (self._flushed):
+            return []
+        self._flushed = True
+        frames = self._decode(None)
+        self._pending.clear()
+        return frames
+
+
+def _flush_video_pipeline(decoder):
+    return decoder._pipeline.flush() if (decoder._pipeline is not None) else []
+
+
+def _get_first_frame(frames):
+    return frames[0][0] if (len(frames) > 0) else None
+
+
 #------------------------------------------------------------------------------
 # RM VLC Decoder
 #------------------------------------------------------------------------------
@@ -896,18 +1280,37 @@ def unpack_rm_vlc(payload):
 
 
 class _decode_rm_vlc:
-    def __init__(self, profile):
+    def __init__(self, profile, thread_type=None, thread_count=0, keyframes_only=False):
         self.profile = profile
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self.keyframes_only = keyframes_only
+        self._pipeline = None
 
     def create(self):
-        self._codec = av.CodecContext.create(get_video_codec_name(self.profile), 'r')
+        _flush_video_pipeline(self)
+        self._codec = _create_video_codec(self.profile, self.thread_type, self.thread_count)
+        self._pipeline = _video_pipeline(self._codec)
 
     def decode(self, payload):
+        if (self.keyframes_only):
+            return _get_first_frame(self.submit(payload, None))
         for packet in self._codec.parse(payload):
             for frame in self._codec.decode(packet):
                 return frame.to_ndarray()[:Parameters_RM_VLC.HEIGHT, :Parameters_RM_VLC.WIDTH]
         return None
 
+    def submit(self, payload, context):
+        if (self.keyframes_only and (not is_video_keyframe(self.profile, payload))):
+            return []
+        return [(frame.to_ndarray()[:Parameters_RM_VLC.HEIGHT, :Parameters_RM_VLC.WIDTH], context) for frame, context in self._pipeline.submit(payload, context)]
+
+    def skip(self, payload):
+        self._pipeline.skip(payload)
+
+    def flush(self):
+        return [(frame.to_ndarray()[:Parameters_RM_VLC.HEIGHT, :Parameters_RM_VLC.WIDTH], context) for frame, context in _flush_video_pipeline(self)]
+
 
 class _unpack_rm_vlc:
     def create(self):
@@ -915,10 +1318,28 @@ class _unpack_rm_vlc:
 
     def decode(self, payload):
         return np.frombuffer(payload, dtype=np.uint8).reshape(Parameters_RM_VLC.SHAPE)
+
+    def submit(self, payload, context):
+        return [(self.decode(payload), context)]
+
+    def skip(self, payload):
+        pass
+
+    def flush(self):
+        return []
     
 
-def decode_rm_vlc(profile):
-    return _unpack_rm_vlc() if (profile == VideoProfile.RAW) else _decode_rm_vlc(profile)
+# Keyframe-only decoding (keyframes_only=True)
+# Other frames are identified from their NAL unit headers and dropped without
+# being decoded: decode returns None and submit returns no frames for them
+# Keyframes bypass the parser so decode returns them without delay
+# Applies to decode_rm_depth_ahat and decode_pv as well
+def decode_rm_vlc(profile, thread_type=None, thread_count=0, keyframes_only=False):
+    return _unpack_rm_vlc() if (profile == VideoProfile.RAW) else _decode_rm_vlc(profile, thread_type, thread_count, keyframes_only)
+
+
+def is_keyframe_rm_vlc(profile, payload):
+    return is_video_keyframe(profile, payload[:-24])
 
 
 #------------------------------------------------------------------------------
@@ -945,94 +1366,239 @@ class _Mode0Layout_RM_DEPTH_AHAT:
     END_AB_V_Y    = BEGIN_AB_V_Y + (Parameters_RM_DEPTH_AHAT.WIDTH // 4)
 
 
-def _unpack_rm_depth_ahat_nv12_as_yuv420p(yuv, sensor_ticks):
+# Rotating set of preallocated output arrays
+# An array returned by get is reused after count more calls
+# With count 0, get returns None and the caller allocates
+class _buffer_pool:
+    def __init__(self, count, shape, dtype):
+        self._buffers = [np.empty(shape, dtype=dtype) for _ in range(0, count)]
+        self._index = 0
+
+    def get(self, buffer=None):
+        if (buffer is not None):
+            return buffer
+        if (len(self._buffers) <= 0):
+            return None
+        buffer = self._buffers[self._index]
+        self._index = (self._index + 1) % len(self._buffers)
+        return buffer
+
+
+def _get_planes_rm_depth_ahat(frame):
+    planes = frame.planes
+    if ((planes[0].line_size == Parameters_RM_DEPTH_AHAT.WIDTH) and (planes[1].line_size == (Parameters_RM_DEPTH_AHAT.WIDTH // 2)) and (planes[2].line_size == (Parameters_RM_DEPTH_AHAT.WIDTH // 2))):
+        y = np.frombuffer(planes[0], dtype=np.uint8, count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
+        u = np.frombuffer(planes[1], dtype=np.uint8, count=Parameters_RM_DEPTH_AHAT.PIXELS // 4).reshape((Parameters_RM_DEPTH_AHAT.HEIGHT, Parameters_RM_DEPTH_AHAT.WIDTH // 4))
+        v = np.frombuffer(planes[2], dtype=np.uint8, count=Parameters_RM_DEPTH_AHAT.PIXELS // 4).reshape((Parameters_RM_DEPTH_AHAT.HEIGHT, Parameters_RM_DEPTH_AHAT.WIDTH // 4))
+        return (y, u, v)
+    yuv = frame.to_ndarray()
     y = yuv[_Mode0Layout_RM_DEPTH_AHAT.BEGIN_DEPTH_Y : _Mode0Layout_RM_DEPTH_AHAT.END_DEPTH_Y, :]
     u = yuv[_Mode0Layout_RM_DEPTH_AHAT.BEGIN_AB_U_Y  : _Mode0Layout_RM_DEPTH_AHAT.END_AB_U_Y,  :].reshape((Parameters_RM_DEPTH_AHAT.HEIGHT, Parameters_RM_DEPTH_AHAT.WIDTH // 4))
     v = yuv[_Mode0Layout_RM_DEPTH_AHAT.BEGIN_AB_V_Y  : _Mode0Layout_RM_DEPTH_AHAT.END_AB_V_Y,  :].reshape((Parameters_RM_DEPTH_AHAT.HEIGHT, Parameters_RM_DEPTH_AHAT.WIDTH // 4))
+    return (y, u, v)
 
-    depth = np.multiply(y, 4, dtype=np.uint16)
-    ab = np.empty((Parameters_RM_DEPTH_AHAT.HEIGHT, Parameters_RM_DEPTH_AHAT.WIDTH), dtype=np.uint16)
 
-    u = np.square(u, dtype=np.uint16)
-    v = np.square(v, dtype=np.uint16)
+def _get_plane_y(frame, width, height):
+    plane = frame.planes[0]
+    return np.frombuffer(plane, dtype=np.uint8).reshape((-1, plane.line_size))[:height, :width]
 
-    ab[:, 0::4] = u
-    ab[:, 1::4] = u
-    ab[:, 2::4] = v
-    ab[:, 3::4] = v
+
+# depth and ab are C contiguous uint16 arrays of shape SHAPE or None
+# Each group of 4 ab pixels is u, u, v, v squared: the squares are written to
+# alternating 32-bit words of ab and multiplied by 0x10001 in place, which
+# copies each square to both 16-bit halves without temporaries
+def _unpack_rm_depth_ahat_nv12_as_yuv420p(y, u, v, sensor_ticks, depth, ab):
+    if (ab is None):
+        ab = np.empty(Parameters_RM_DEPTH_AHAT.SHAPE, dtype=np.uint16)
+    ab_uv = ab.view(np.uint32)
+    ab_uv.shape = (Parameters_RM_DEPTH_AHAT.HEIGHT, Parameters_RM_DEPTH_AHAT.WIDTH // 4, 2)
+
+    depth = np.multiply(y, 4, out=depth, dtype=np.uint16)
+    np.square(u, out=ab_uv[:, :, 0], dtype=np.uint32)
+    np.square(v, out=ab_uv[:, :, 1], dtype=np.uint32)
+    np.multiply(ab_uv, 0x10001, out=ab_uv)
 
     return _RM_Depth_Frame(depth, ab, sensor_ticks)
 
 
+# AHAT decoders write into the output arrays given to decode or, if buffers is
+# greater than 0, into preallocated arrays that are reused after buffers more
+# frames are output (buffers must exceed the number of frames held by the caller)
 class _decode_rm_depth_ahat:
-    def __init__(self, profile):
+    def __init__(self, profile, thread_type=None, thread_count=0, buffers=0, keyframes_only=False):
         self.profile = profile
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self.buffers = buffers
+        self.keyframes_only = keyframes_only
+        self._pipeline = None
    
     def create(self):
-        self._codec = av.CodecContext.create(get_video_codec_name(self.profile), 'r')
-
-    def decode(self, payload):
+        _flush_video_pipeline(self)
+        self._codec = _create_video_codec(self.profile, self.thread_type, self.thread_count)
+        self._pipeline = _video_pipeline(self._codec)
+        self._depth = _buffer_pool(self.buffers, Parameters_RM_DEPTH_AHAT.SHAPE, np.uint16)
+        self._ab = _buffer_pool(self.buffers, Parameters_RM_DEPTH_AHAT.SHAPE, np.uint16)
+
+    def _unpack(self, frame, sensor_ticks, depth, ab):
+        return _unpack_rm_depth_ahat_nv12_as_yuv420p(*_get_planes_rm_depth_ahat(frame), sensor_ticks, self._depth.get(depth), self._ab.get(ab))
+
+    def decode(self, payload, depth=None, ab=None):
+        if (self.keyframes_only):
+            return _get_first_frame(self.submit(payload, None, depth, ab))
         for packet in self._codec.parse(payload[_Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE:-8]):
             for frame in self._codec.decode(packet):
-                return _unpack_rm_depth_ahat_nv12_as_yuv420p(frame.to_ndarray(), np.frombuffer(payload[-8:], dtype=np.uint64, offset=0, count=1))
+                return self._unpack(frame, np.frombuffer(payload[-8:], dtype=np.uint64, offset=0, count=1), depth, ab)
         return None
 
+    def submit(self, payload, context, depth=None, ab=None):
+        data = payload[_Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE:-8]
+        if (self.keyframes_only and (not is_video_keyframe(self.profile, data))):
+            return []
+        return [(self._unpack(frame, sensor_ticks, depth, ab), context) for frame, (sensor_ticks, depth, ab, context) in self._pipeline.submit(data, (np.frombuffer(payload[-8:], dtype=np.uint64, offset=0, count=1), depth, ab, context))]
+
+    def skip(self, payload):
+        self._pipeline.skip(payload[_Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE:-8])
+
+    def flush(self):
+        return [(self._unpack(frame, sensor_ticks, depth, ab), context) for frame, (sensor_ticks, depth, ab, context) in _flush_video_pipeline(self)]
+
 
 class _unpack_rm_depth_ahat:
     def create(self):
         pass
 
-    def decode(self, payload):
-        depth        = np.frombuffer(payload,      dtype=np.uint16, offset=_Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE,                                                  count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
-        ab           = np.frombuffer(payload,      dtype=np.uint16, offset=_Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE + Parameters_RM_DEPTH_AHAT.PIXELS * _SIZEOF.WORD, count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
+    # Returns views of the payload unless output arrays are given
+    def decode(self, payload, depth=None, ab=None):
+        depth_view   = np.frombuffer(payload,      dtype=np.uint16, offset=_Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE,                                                  count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
+        ab_view      = np.frombuffer(payload,      dtype=np.uint16, offset=_Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE + Parameters_RM_DEPTH_AHAT.PIXELS * _SIZEOF.WORD, count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
         sensor_ticks = np.frombuffer(payload[-8:], dtype=np.uint64, offset=0,                                                                                       count=1)
-        return _RM_Depth_Frame(depth, ab, sensor_ticks)
+        if (depth is not None):
+            np.copyto(depth, depth_view)
+            depth_view = depth
+        if (ab is not None):
+            np.copyto(ab, ab_view)
+            ab_view = ab
+        return _RM_Depth_Frame(depth_view, ab_view, sensor_ticks)
+
+    def submit(self, payload, context, depth=None, ab=None):
+        return [(self.decode(payload, depth, ab), context)]
+
+    def skip(self, payload):
+        pass
+
+    def flush(self):
+        return []
 
 
+# Decompresses directly into the output array, releasing the GIL, unless
+# pyzdepth was built without DecompressInto
 class _decompress_zdepth:
     def create(self):
         import pyzdepth
         self._codec = pyzdepth.DepthCompressor()
+        self._into = hasattr(self._codec, 'DecompressInto')
+        self._batch = hasattr(self._codec, 'DecompressBatch')
+        self._success = getattr(pyzdepth, 'DEPTH_RESULT_SUCCESS', None)
 
-    def decode(self, payload):
+    def decode(self, payload, depth=None):
         if (len(payload) <= 0):
             return None
+        if (self._into):
+            image = np.empty(Parameters_RM_DEPTH_AHAT.SHAPE, dtype=np.uint16) if (depth is None) else depth
+            result, width, height = self._codec.DecompressInto(payload, image)
+            return image if (result == self._success) else None
         result, width, height, decompressed = self._codec.Decompress(bytes(payload))
-        return np.frombuffer(decompressed, dtype=np.uint16).reshape((height, width))
+        image = np.frombuffer(decompressed, dtype=np.uint16).reshape((height, width))
+        if (depth is None):
+            return image
+        np.copyto(depth, image)
+        return depth
+
+    # Decompresses consecutive frames of the stream in a single call
+    def decode_batch(self, payloads, depths=None):
+        if (depths is None):
+            depths = [None] * len(payloads)
+        if (not self._batch):
+            return [self.decode(payload, depth) for payload, depth in zip(payloads, depths)]
+        images = [np.empty(Parameters_RM_DEPTH_AHAT.SHAPE, dtype=np.uint16) if (depth is None) else depth for depth in depths]
+        results = self._codec.DecompressBatch(payloads, images)
+        return [image if (result == self._success) else None for image, (result, width, height) in zip(images, results)]
 
 
 class _decode_ab_rm_depth_ahat:
-    def __init__(self, profile):
+    def __init__(self, profile, thread_type=None, thread_count=0, buffers=0, keyframes_only=False):
         self.profile = profile
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self.buffers = buffers
+        self.keyframes_only = keyframes_only
+        self._pipeline = None
 
     def create(self):
-        self._codec = av.CodecContext.create(get_video_codec_name(self.profile), 'r')
+        _flush_video_pipeline(self)
+        self._codec = _create_video_codec(self.profile, self.thread_type, self.thread_count)
+        self._pipeline = _video_pipeline(self._codec)
+        self._ab = _buffer_pool(self.buffers, Parameters_RM_DEPTH_AHAT.SHAPE, np.uint16)
 
-    def decode(self, payload):
+    def _unpack(self, frame, ab):
+        return np.square(_get_plane_y(frame, Parameters_RM_DEPTH_AHAT.WIDTH, Parameters_RM_DEPTH_AHAT.HEIGHT), out=self._ab.get(ab), dtype=np.uint16)
+
+    def decode(self, payload, ab=None):
+        if (self.keyframes_only):
+            return _get_first_frame(self.submit(payload, None, ab))
         for packet in self._codec.parse(payload):
             for frame in self._codec.decode(packet):
-                return np.square(frame.to_ndarray()[:Parameters_RM_DEPTH_AHAT.HEIGHT, :Parameters_RM_DEPTH_AHAT.WIDTH], dtype=np.uint16)
+                return self._unpack(frame, ab)
         return None
 
+    def submit(self, payload, context, ab=None):
+        if (self.keyframes_only and (not is_video_keyframe(self.profile, payload))):
+            return []
+        return [(self._unpack(frame, ab), context) for frame, (ab, context) in self._pipeline.submit(payload, (ab, context))]
+
+    def skip(self, payload):
+        self._pipeline.skip(payload)
+
+    def flush(self):
+        return [(self._unpack(frame, ab), context) for frame, (ab, context) in _flush_video_pipeline(self)]
+
 
 class _unpack_ab_rm_depth_ahat:
     def create(self):
         pass
 
-    def decode(self, payload):
-        return np.frombuffer(payload, dtype=np.uint16, offset=0, count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
+    def decode(self, payload, ab=None):
+        image = np.frombuffer(payload, dtype=np.uint16, offset=0, count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
+        if (ab is None):
+            return image
+        np.copyto(ab, image)
+        return ab
+
+    def submit(self, payload, context, ab=None):
+        return [(self.decode(payload, ab), context)]
+
+    def skip(self, payload):
+        pass
+
+    def flush(self):
+        return []
 
 
 class _decode_rm_depth_ahat_zdepth:
-    def __init__(self, profile):
+    def __init__(self, profile, thread_type=None, thread_count=0, buffers=0, keyframes_only=False):
+        self.profile = profile
+        self.buffers = buffers
+        self.keyframes_only = keyframes_only
         self._codec_z  = _decompress_zdepth()
-        self._codec_ab = _unpack_ab_rm_depth_ahat() if (profile == VideoProfile.RAW) else _decode_ab_rm_depth_ahat(profile)
+        self._codec_ab = _unpack_ab_rm_depth_ahat() if (profile == VideoProfile.RAW) else _decode_ab_rm_depth_ahat(profile, thread_type, thread_count, buffers, keyframes_only)
 
     def create(self):
         self._codec_z.create()
         self._codec_ab.create()
+        self._depth = _buffer_pool(self.buffers, Parameters_RM_DEPTH_AHAT.SHAPE, np.uint16)
 
-    def decode(self, payload):
+    def decode(self, payload, depth=None, ab=None):
         size_z, size_ab = struct.unpack_from('<II', payload, 0)
 
         start_z  = _Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE
@@ -1040,25 +1606,127 @@ class _decode_rm_depth_ahat_zdepth:
         start_ab = end_z
         end_ab   = start_ab + size_ab
 
-        depth        = self._codec_z.decode(payload[start_z:end_z])
-        ab           = self._codec_ab.decode(payload[start_ab:end_ab])
+        if (self.keyframes_only and (not is_video_keyframe(self.profile, payload[start_ab:end_ab]))):
+            return None
+
+        depth        = self._codec_z.decode(memoryview(payload)[start_z:end_z], self._depth.get(depth))
+        ab           = self._codec_ab.decode(payload[start_ab:end_ab], ab)
         sensor_ticks = np.frombuffer(payload[-8:], dtype=np.uint64, offset=0, count=1)
 
         return _RM_Depth_Frame(depth, ab, sensor_ticks)
 
+    def _submit(self, payload, context, depth, ab):
+        size_z, size_ab = struct.unpack_from('<II', payload, 0)
+
+        start_z  = _Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE
+        end_z    = start_z + size_z
+        start_ab = end_z
+        end_ab   = start_ab + size_ab
+
+        if (self.keyframes_only and (not is_video_keyframe(self.profile, payload[start_ab:end_ab]))):
+            return []
+
+        z            = memoryview(payload)[start_z:end_z]
+        sensor_ticks = np.frombuffer(payload[-8:], dtype=np.uint64, offset=0, count=1)
+
+        return self._codec_ab.submit(payload[start_ab:end_ab], (z, depth, sensor_ticks, context), ab)
+
+    def submit(self, payload, context, depth=None, ab=None):
+        return [self._emit(z, depth, ab, sensor_ticks, context) for ab, (z, depth, sensor_ticks, context) in self._submit(payload, context, depth, ab)]
+
+    # Same as submit for consecutive payloads, the depth of the frames that are
+    # output is decompressed in a single call that releases the GIL
+    def submit_batch(self, payloads, contexts):
+        frames = [frame for payload, context in zip(payloads, contexts) for frame in self._submit(payload, context, None, None)]
+        if (len(frames) <= 0):
+            return []
+        depths = self._codec_z.decode_batch([z for _, (z, _, _, _) in frames], [self._depth.get(depth) for _, (_, depth, _, _) in frames])
+        return [(_RM_Depth_Frame(depth, ab, sensor_ticks), context) for depth, (ab, (_, _, sensor_ticks, context)) in zip(depths, frames)]
+
+    # Depth is decompressed when the AB frame is output, so that buffers are
+    # taken in output order and not overwritten while the frame is pending
+    def _emit(self, z, depth, ab, sensor_ticks, context):
+        return (_RM_Depth_Frame(self._codec_z.decode(z, self._depth.get(depth)), ab, sensor_ticks), context)
+
+    # Only the AB stream has inter-frame dependencies
+    def skip(self, payload):
+        size_z, size_ab = struct.unpack_from('<II', payload, 0)
+
+        start_ab = _Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE + size_z
+        end_ab   = start_ab + size_ab
 
-def decode_rm_depth_ahat(profile_z, profile_ab):
-    return (_unpack_rm_depth_ahat() if (profile_ab == VideoProfile.RAW) else _decode_rm_depth_ahat(profile_ab)) if (profile_z == DepthProfile.SAME) else _decode_rm_depth_ahat_zdepth(profile_ab)
+        self._codec_ab.skip(payload[start_ab:end_ab])
 
+    def flush(self):
+        return [self._emit(z, depth, ab, sensor_ticks, context) for ab, (z, depth, sensor_ticks, context) in self._codec_ab.flush()]
 
-def decode_rm_depth_longthrow(payload):
+
+def decode_rm_depth_ahat(profile_z, profile_ab, thread_type=None, thread_count=0, buffers=0, keyframes_only=False):
+    return (_unpack_rm_depth_ahat() if (profile_ab == VideoProfile.RAW) else _decode_rm_depth_ahat(profile_ab, thread_type, thread_count, buffers, keyframes_only)) if (profile_z == DepthProfile.SAME) else _decode_rm_depth_ahat_zdepth(profile_ab, thread_type, thread_count, buffers, keyframes_only)
+
+
+def is_keyframe_rm_depth_ahat(profile_z, profile_ab, payload):
+    if (profile_z == DepthProfile.SAME):
+        return is_video_keyframe(profile_ab, payload[_Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE:-8])
+    size_z, size_ab = struct.unpack_from('<II', payload, 0)
+    start_ab = _Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE + size_z
+    return is_video_keyframe(profile_ab, payload[start_ab:(start_ab + size_ab)])
+
+
+# Long Throw images to decode
+# Depth and AB are stored as the top and bottom halves of the same PNG, which
+# is always decoded in full, the other image is released after decoding
+class LongThrowImages:
+    BOTH  = 0
+    DEPTH = 1
+    AB    = 2
+
+
+def decode_rm_depth_longthrow(payload, images=LongThrowImages.BOTH):
     composite    = cv2.imdecode(np.frombuffer(payload[:-8], dtype=np.uint8), cv2.IMREAD_UNCHANGED)
     h, w, _      = composite.shape
     image        = composite.view(np.uint16).reshape((2*h, w))
     sensor_ticks = np.frombuffer(payload[-8:], dtype=np.uint64, offset=0, count=1)
+    if (images == LongThrowImages.DEPTH):
+        return _RM_Depth_Frame(image[:h, :].copy(), None, sensor_ticks)
+    if (images == LongThrowImages.AB):
+        return _RM_Depth_Frame(None, image[h:, :].copy(), sensor_ticks)
     return _RM_Depth_Frame(image[:h, :], image[h:, :], sensor_ticks)
 
 
+# Decodes Long Throw payloads in a thread pool (cv2.imdecode releases the GIL)
+# submit returns the (frame, context) pairs that are ready, in submission
+# order, and only blocks when more than workers payloads are in flight
+# flush waits for and returns the remaining frames
+class decode_rm_depth_longthrow_parallel:
+    def __init__(self, workers=None, images=LongThrowImages.BOTH):
+        self.workers = os.cpu_count() if (workers is None) else workers
+        self.images = images
+
+    def create(self):
+        self._executor = concurrent.futures.ThreadPoolExecutor(self.workers)
+        self._pending = collections.deque()
+
+    def decode(self, payload):
+        return decode_rm_depth_longthrow(payload, self.images)
+
+    def submit(self, payload, context):
+        self._pending.append((self._executor.submit(decode_rm_depth_longthrow, payload, self.images), context))
+        frames = []
+        while ((len(self._pending) > 0) and ((len(self._pending) > self.workers) or self._pending[0][0].done())):
+            future, context = self._pending.popleft()
+            frames.append((future.result(), context))
+        return frames
+
+    def flush(self):
+        frames = [(future.result(), context) for future, context in self._pending]
+        self._pending.clear()
+        return frames
+
+    def close(self):
+        self._executor.shutdown()
+
+
 #------------------------------------------------------------------------------
 # RM IMU Unpacker
 #------------------------------------------------------------------------------
@@ -1073,6 +1741,10 @@ class _RM_IMU_Frame:
         self.temperature     = temperature
 
 
+# Layout of one sample, for batches unpacked as numpy structured arrays
+RM_IMU_SAMPLE_DTYPE = np.dtype([('vinyl_hup_ticks', '<u8'), ('soc_ticks', '<u8'), ('xyz', '<f4', (3,)), ('temperature', '<f4')])
+
+
 class unpack_rm_imu:
     def __init__(self, payload):
         self._count = len(payload) // 32
@@ -1085,6 +1757,15 @@ class unpack_rm_imu:
         data = struct.unpack('<QQffff', self._batch[(index * 32):((index + 1) * 32)])
         return _RM_IMU_Frame(data[0], data[1], data[2], data[3], data[4], data[5])
 
+    # Returns all samples as a structured array viewing the payload
+    def get_samples(self):
+        return np.frombuffer(self._batch, dtype=RM_IMU_SAMPLE_DTYPE, count=self._count)
+
+
+# Returns the samples of consecutive RM IMU payloads as one structured array
+def unpack_rm_imu_samples(payloads):
+    return np.frombuffer(b''.join(payloads), dtype=RM_IMU_SAMPLE_DTYPE)
+
 
 #------------------------------------------------------------------------------
 # PV Decoder
@@ -1099,7 +1780,7 @@ class PV_FocusState:
 
 
 class _PV_Frame:
-    def __init__(self, image, focal_length, principal_point, exposure_time, exposure_compensation, lens_position, focus_state, iso_speed, white_balance, iso_gains, white_balance_gains):
+    def __init__(self, image, focal_length, principal_point, exposure_time, exposure_compensation, lens_position, focus_state, iso_speed, white_balance, iso_gains, white_balance_gains, metadata=None):
         self.image                 = image
         self.focal_length          = focal_length
         self.principal_point       = principal_point
@@ -1111,6 +1792,7 @@ class _PV_Frame:
         self.white_balance         = white_balance
         self.iso_gains             = iso_gains
         self.white_balance_gains   = white_balance_gains
+        self.metadata              = metadata
 
 
 def create_pv_intrinsics(focal_length, principal_point):
@@ -1129,22 +1811,39 @@ def update_pv_intrinsics(intrinsics, focal_length, principal_point):
     return intrinsics
 
 
+# Layout of the metadata at the end of each PV payload
+PV_METADATA_DTYPE = np.dtype({
+    'names'   : ['focal_length', 'principal_point', 'exposure_time', 'exposure_compensation', 'lens_position', 'focus_state', 'iso_speed', 'white_balance', 'iso_gains', 'white_balance_gains'],
+    'formats' : [('<f4', (2,)), ('<f4', (2,)), '<u8', ('<u8', (2,)), '<u4', '<u4', '<u4', '<u4', ('<f4', (2,)), ('<f4', (3,))],
+    'offsets' : [0, 8, 16, 24, 40, 44, 48, 52, 56, 64],
+    'itemsize': 80,
+})
+
+
+# Metadata fields are views of the payload
+# metadata holds all fields as a structured array of one element
 def unpack_pv(payload):
     image    = payload[0:-80]
-    metadata = payload[-80:]
+    # Copied so that the metadata does not keep the payload alive
+    metadata = np.frombuffer(payload, dtype=PV_METADATA_DTYPE, offset=len(payload) - PV_METADATA_DTYPE.itemsize, count=1).copy()
+
+    focal_length          = metadata['focal_length'][0]
+    principal_point       = metadata['principal_point'][0]
+    exposure_time         = metadata['exposure_time']
+    exposure_compensation = metadata['exposure_compensation'][0]
+    lens_position         = metadata['lens_position']
+    focus_state           = metadata['focus_state']
+    iso_speed             = metadata['iso_speed']
+    white_balance         = metadata['white_balance']
+    iso_gains             = metadata['iso_gains'][0]
+    white_balance_gains   = metadata['white_balance_gains'][0]
+
+    return _PV_Frame(image, focal_length, principal_point, exposure_time, exposure_compensation, lens_position, focus_state, iso_speed, white_balance, iso_gains, white_balance_gains, metadata)
 
-    focal_length          = np.frombuffer(metadata, dtype=np.float32, offset=0,  count=2)
-    principal_point       = np.frombuffer(metadata, dtype=np.float32, offset=8,  count=2)
-    exposure_time         = np.frombuffer(metadata, dtype=np.uint64,  offset=16, count=1)
-    exposure_compensation = np.frombuffer(metadata, dtype=np.uint64,  offset=24, count=2)
-    lens_position         = np.frombuffer(metadata, dtype=np.uint32,  offset=40, count=1)
-    focus_state           = np.frombuffer(metadata, dtype=np.uint32,  offset=44, count=1)
-    iso_speed             = np.frombuffer(metadata, dtype=np.uint32,  offset=48, count=1)
-    white_balance         = np.frombuffer(metadata, dtype=np.uint32,  offset=52, count=1)
-    iso_gains             = np.frombuffer(metadata, dtype=np.float32, offset=56, count=2)
-    white_balance_gains   = np.frombuffer(metadata, dtype=np.float32, offset=64, count=3)
 
-    return _PV_Frame(image, focal_length, principal_point, exposure_time, exposure_compensation, lens_position, focus_state, iso_speed, white_balance, iso_gains, white_balance_gains)
+# Returns the metadata of consecutive PV payloads as one structured array
+def unpack_pv_metadata(payloads):
+    return np.frombuffer(b''.join([payload[-PV_METADATA_DTYPE.itemsize:] for payload in payloads]), dtype=PV_METADATA_DTYPE)
 
 
 def get_video_stride(width):
@@ -1152,18 +1851,37 @@ def get_video_stride(width):
 
 
 class _decode_pv:
-    def __init__(self, profile):
+    def __init__(self, profile, thread_type=None, thread_count=0, keyframes_only=False):
         self.profile = profile
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self.keyframes_only = keyframes_only
+        self._pipeline = None
 
     def create(self, width, height):
-        self._codec = av.CodecContext.create(get_video_codec_name(self.profile), 'r')
+        _flush_video_pipeline(self)
+        self._codec = _create_video_codec(self.profile, self.thread_type, self.thread_count)
+        self._pipeline = _video_pipeline(self._codec)
 
     def decode(self, payload, format):
+        if (self.keyframes_only):
+            return _get_first_frame(self.submit(payload, format, None))
         for packet in self._codec.parse(payload):
             for frame in self._codec.decode(packet):
                 return frame.to_ndarray(format=format)
         return None
 
+    def submit(self, payload, format, context):
+        if (self.keyframes_only and (not is_video_keyframe(self.profile, payload))):
+            return []
+        return [(frame.to_ndarray(format=format), context) for frame, context in self._pipeline.submit(payload, context)]
+
+    def skip(self, payload):
+        self._pipeline.skip(payload)
+
+    def flush(self, format):
+        return [(frame.to_ndarray(format=format), context) for frame, context in _flush_video_pipeline(self)]
+
 
 class _unpack_pv:
     _cv2_nv12_format = {
@@ -1199,11 +1917,23 @@ class _unpack_pv:
         sf = _unpack_pv._cv2_nv12_format[format]
         return image if (sf is None) else cv2.cvtColor(image, sf)
 
+    def submit(self, payload, format, context):
+        return [(self.decode(payload, format), context)]
+
+    def skip(self, payload):
+        pass
+
+    def flush(self, format):
+        return []
+
 
-def decode_pv(profile):
-    return _unpack_pv() if (profile == VideoProfile.RAW) else _decode_pv(profile)
+def decode_pv(profile, thread_type=None, thread_count=0, keyframes_only=False):
+    return _unpack_pv() if (profile == VideoProfile.RAW) else _decode_pv(profile, thread_type, thread_count, keyframes_only)
 
 
+def is_keyframe_pv(profile, payload):
+    return is_video_keyframe(profile, payload[:-80])
+
 #------------------------------------------------------------------------------
 # Microphone Decoder
 #------------------------------------------------------------------------------
@@ -1330,27 +2060,29 @@ class _Mode0Layout_SI:
     END_HAND_RIGHT      = BEGIN_HAND_RIGHT + SI_HandJointKind.TOTAL * _Mode0Layout_SI_Hand.BYTE_COUNT
 
 
+# Layouts for payloads unpacked as numpy structured arrays
+SI_HAND_JOINT_DTYPE = np.dtype([('orientation', '<f4', (4,)), ('position', '<f4', (3,)), ('radius', '<f4'), ('accuracy', '<i4')])
+SI_DTYPE = np.dtype([('valid', '<u4'), ('head_position', '<f4', (3,)), ('head_forward', '<f4', (3,)), ('head_up', '<f4', (3,)), ('eye_origin', '<f4', (3,)), ('eye_direction', '<f4', (3,)), ('hand_left', SI_HAND_JOINT_DTYPE, (SI_HandJointKind.TOTAL,)), ('hand_right', SI_HAND_JOINT_DTYPE, (SI_HandJointKind.TOTAL,))])
+
+
 class _SI_Hand:
-    def __init__(self, payload):
-        self._data = payload
+    def __init__(self, joints):
+        self._data = joints
 
     def get_joint_pose(self, joint):
-        begin = joint * _Mode0Layout_SI_Hand.BYTE_COUNT
-        end = begin + _Mode0Layout_SI_Hand.BYTE_COUNT
-        data = self._data[begin:end]
-
-        orientation = np.frombuffer(data[_Mode0Layout_SI_Hand.BEGIN_ORIENTATION : _Mode0Layout_SI_Hand.END_ORIENTATION], dtype=np.float32)
-        position    = np.frombuffer(data[_Mode0Layout_SI_Hand.BEGIN_POSITION    : _Mode0Layout_SI_Hand.END_POSITION],    dtype=np.float32)
-        radius      = np.frombuffer(data[_Mode0Layout_SI_Hand.BEGIN_RADIUS      : _Mode0Layout_SI_Hand.END_RADIUS],      dtype=np.float32)
-        accuracy    = np.frombuffer(data[_Mode0Layout_SI_Hand.BEGIN_ACCURACY    : _Mode0Layout_SI_Hand.END_ACCURACY],    dtype=np.int32)
+        data = self._data[joint:(joint + 1)]
+        return _SI_HandJointPose(data['orientation'][0], data['position'][0], data['radius'], data['accuracy'])
 
-        return _SI_HandJointPose(orientation, position, radius, accuracy)
+    # Returns all joints as a structured array (SI_HAND_JOINT_DTYPE)
+    def get_joint_poses(self):
+        return self._data
 
 
+# Fields are views of the payload
 class unpack_si:
     def __init__(self, payload):
-        self._data = payload
-        self._valid = np.frombuffer(payload[_Mode0Layout_SI.BEGIN_VALID : _Mode0Layout_SI.END_VALID], dtype=np.uint32)
+        self._data = np.frombuffer(payload, dtype=SI_DTYPE, count=1)
+        self._valid = self._data['valid']
 
     def is_valid_head_pose(self):
         return (self._valid & _SI_Field.HEAD) != 0
@@ -1365,32 +2097,40 @@ class unpack_si:
         return (self._valid & _SI_Field.RIGHT) != 0
 
     def get_head_pose(self):
-        position = np.frombuffer(self._data[_Mode0Layout_SI.BEGIN_HEAD_POSITION : _Mode0Layout_SI.END_HEAD_POSITION], dtype=np.float32)
-        forward  = np.frombuffer(self._data[_Mode0Layout_SI.BEGIN_HEAD_FORWARD  : _Mode0Layout_SI.END_HEAD_FORWARD],  dtype=np.float32)
-        up       = np.frombuffer(self._data[_Mode0Layout_SI.BEGIN_HEAD_UP       : _Mode0Layout_SI.END_HEAD_UP],       dtype=np.float32)
-
-        return _SI_HeadPose(position, forward, up)
+        return _SI_HeadPose(self._data['head_position'][0], self._data['head_forward'][0], self._data['head_up'][0])
 
     def get_eye_ray(self):
-        origin    = np.frombuffer(self._data[_Mode0Layout_SI.BEGIN_EYE_ORIGIN    : _Mode0Layout_SI.END_EYE_ORIGIN],    dtype=np.float32)
-        direction = np.frombuffer(self._data[_Mode0Layout_SI.BEGIN_EYE_DIRECTION : _Mode0Layout_SI.END_EYE_DIRECTION], dtype=np.float32)
-
-        return _SI_EyeRay(origin, direction)
+        return _SI_EyeRay(self._data['eye_origin'][0], self._data['eye_direction'][0])
 
     def get_hand_left(self):
-        return _SI_Hand(self._data[_Mode0Layout_SI.BEGIN_HAND_LEFT : _Mode0Layout_SI.END_HAND_LEFT])
+        return _SI_Hand(self._data['hand_left'][0])
 
     def get_hand_right(self):
-        return _SI_Hand(self._data[_Mode0Layout_SI.BEGIN_HAND_RIGHT : _Mode0Layout_SI.END_HAND_RIGHT])
+        return _SI_Hand(self._data['hand_right'][0])
+
+    # Returns the payload as a structured array of one element (SI_DTYPE)
+    def get_samples(self):
+        return self._data
+
+
+# Returns consecutive SI payloads as one structured array (SI_DTYPE)
+# For example, samples['hand_left']['position'] has shape (N, 26, 3)
+def unpack_si_samples(payloads):
+    return np.frombuffer(b''.join(payloads), dtype=SI_DTYPE)
 
 
 #------------------------------------------------------------------------------
 # EET Unpacker
 #------------------------------------------------------------------------------
 
+# Layout of the EET payload
+EET_DTYPE = np.dtype([('reserved', '<u4'), ('combined_ray_origin', '<f4', (3,)), ('combined_ray_direction', '<f4', (3,)), ('left_ray_origin', '<f4', (3,)), ('left_ray_direction', '<f4', (3,)), ('right_ray_origin', '<f4', (3,)), ('right_ray_direction', '<f4', (3,)), ('left_openness', '<f4'), ('right_openness', '<f4'), ('vergence_distance', '<f4'), ('valid', '<u4')])
+
+
 class unpack_eet:
     def __init__(self, payload):
         self._reserved = payload[:4]
+        self._payload = payload
         f = np.frombuffer(payload[4:-4], dtype=np.float32)
         valid = struct.unpack('<I', payload[-4:])[0]
 
@@ -1409,90 +2149,186 @@ class unpack_eet:
         self.right_openness_valid = valid & 0x20 != 0
         self.vergence_distance_valid = valid & 0x40 != 0
 
+    # Returns the payload as a structured array of one element (EET_DTYPE)
+    def get_samples(self):
+        return np.frombuffer(self._payload, dtype=EET_DTYPE, count=1)
+
+
+# Returns consecutive EET payloads as one structured array (EET_DTYPE)
+def unpack_eet_samples(payloads):
+    return np.frombuffer(b''.join(payloads), dtype=EET_DTYPE)
+
 
 #------------------------------------------------------------------------------
 # Decoded Receivers
 #------------------------------------------------------------------------------
 
+# Decoded receivers with thread_type set decode through the submit interface
+# and return each frame with the packet it was decoded from
+# close drains the decoder, get_remaining_packets returns the packets that
+# were received but not yet returned by get_next_packet (until the next open)
+
 class rx_decoded_rm_vlc(rx_rm_vlc):
-    def __init__(self, host, port, chunk, mode, divisor, profile, level, bitrate, options):
-        super().__init__(host, port, chunk, mode, divisor, profile, level, bitrate, options)
-        self._codec = decode_rm_vlc(profile)
+    def __init__(self, host, port, chunk, mode, divisor, profile, level, bitrate, options, thread_type=None, thread_count=0, socket_options=None):
+        super().__init__(host, port, chunk, mode, divisor, profile, level, bitrate, options, socket_options=socket_options)
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self._codec = decode_rm_vlc(profile, thread_type, thread_count)
 
     def open(self):
         self._codec.create()
+        self._frames = collections.deque()
         super().open()
-        self.get_next_packet()
+        if (self.thread_type is None):
+            self.get_next_packet()
 
     def get_next_packet(self):
-        data = super().get_next_packet()
-        data.payload = unpack_rm_vlc(data.payload)
-        data.payload.image = self._codec.decode(data.payload.image)
+        if (self.thread_type is None):
+            data = super().get_next_packet()
+            data.payload = unpack_rm_vlc(data.payload)
+            data.payload.image = self._codec.decode(data.payload.image)
+            return data
+        while (len(self._frames) <= 0):
+            data = super().get_next_packet()
+            data.payload = unpack_rm_vlc(data.payload)
+            self._frames.extend(self._codec.submit(data.payload.image, data))
+        return self._pop_frame()
+
+    def _pop_frame(self):
+        image, data = self._frames.popleft()
+        data.payload.image = image
         return data
 
     def close(self):
         super().close()
+        self._frames.extend(self._codec.flush())
+
+    def get_remaining_packets(self):
+        return [self._pop_frame() for _ in range(0, len(self._frames))]
 
 
 class rx_decoded_rm_depth_ahat(rx_rm_depth_ahat):
-    def __init__(self, host, port, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options):
-        super().__init__(host, port, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options)
-        self._codec = decode_rm_depth_ahat(profile_z, profile_ab)
+    def __init__(self, host, port, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options, thread_type=None, thread_count=0, buffers=0, socket_options=None):
+        super().__init__(host, port, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options, socket_options=socket_options)
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self.buffers = buffers
+        self._codec = decode_rm_depth_ahat(profile_z, profile_ab, thread_type, thread_count, buffers)
 
     def open(self):
         self._codec.create()
+        self._frames = collections.deque()
         super().open()
-        self.get_next_packet()
+        if (self.thread_type is None):
+            self.get_next_packet()
 
     def get_next_packet(self):
-        data = super().get_next_packet()
-        data.payload = self._codec.decode(data.payload)
+        if (self.thread_type is None):
+            data = super().get_next_packet()
+            data.payload = self._codec.decode(data.payload)
+            return data
+        while (len(self._frames) <= 0):
+            data = super().get_next_packet()
+            self._frames.extend(self._codec.submit(data.payload, data))
+        return self._pop_frame()
+
+    def _pop_frame(self):
+        frame, data = self._frames.popleft()
+        data.payload = frame
         return data
 
     def close(self):
         super().close()
+        self._frames.extend(self._codec.flush())
 
+    def get_remaining_packets(self):
+        return [self._pop_frame() for _ in range(0, len(self._frames))]
 
+
+# With workers greater than 0, frames are decoded in a thread pool while the
+# next packets are received, so frames are returned late when decoding takes
+# longer than the frame period
 class rx_decoded_rm_depth_longthrow(rx_rm_depth_longthrow):
-    def __init__(self, host, port, chunk, mode, divisor, png_filter):
-        super().__init__(host, port, chunk, mode, divisor, png_filter)
+    def __init__(self, host, port, chunk, mode, divisor, png_filter, workers=0, images=LongThrowImages.BOTH, socket_options=None):
+        super().__init__(host, port, chunk, mode, divisor, png_filter, socket_options=socket_options)
+        self.workers = workers
+        self.images = images
+        self._codec = decode_rm_depth_longthrow_parallel(workers, images) if (workers > 0) else None
 
     def open(self):
+        if (self._codec is not None):
+            self._codec.create()
+        self._frames = collections.deque()
         super().open()
 
     def get_next_packet(self):
-        data = super().get_next_packet()
-        data.payload = decode_rm_depth_longthrow(data.payload)
+        if (self._codec is None):
+            data = super().get_next_packet()
+            data.payload = decode_rm_depth_longthrow(data.payload, self.images)
+            return data
+        while (len(self._frames) <= 0):
+            data = super().get_next_packet()
+            self._frames.extend(self._codec.submit(data.payload, data))
+        return self._pop_frame()
+
+    def _pop_frame(self):
+        frame, data = self._frames.popleft()
+        data.payload = frame
         return data
 
     def close(self):
         super().close()
+        if (self._codec is not None):
+            self._frames.extend(self._codec.flush())
+            self._codec.close()
+
+    def get_remaining_packets(self):
+        return [self._pop_frame() for _ in range(0, len(self._frames))]
 
 
 class rx_decoded_pv(rx_pv):
-    def __init__(self, host, port, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options, format):
-        super().__init__(host, port, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options)
+    def __init__(self, host, port, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options, format, thread_type=None, thread_count=0, socket_options=None):
+        super().__init__(host, port, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options, socket_options=socket_options)
         self.format = format
-        self._codec = decode_pv(profile)
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self._codec = decode_pv(profile, thread_type, thread_count)
 
     def open(self):        
         self._codec.create(self.width, self.height)
+        self._frames = collections.deque()
         super().open()
-        self.get_next_packet()
+        if (self.thread_type is None):
+            self.get_next_packet()
 
     def get_next_packet(self):
-        data = super().get_next_packet()
-        data.payload = unpack_pv(data.payload)
-        data.payload.image = self._codec.decode(data.payload.image, self.format)
+        if (self.thread_type is None):
+            data = super().get_next_packet()
+            data.payload = unpack_pv(data.payload)
+            data.payload.image = self._codec.decode(data.payload.image, self.format)
+            return data
+        while (len(self._frames) <= 0):
+            data = super().get_next_packet()
+            data.payload = unpack_pv(data.payload)
+            self._frames.extend(self._codec.submit(data.payload.image, self.format, data))
+        return self._pop_frame()
+
+    def _pop_frame(self):
+        image, data = self._frames.popleft()
+        data.payload.image = image
         return data
 
     def close(self):
         super().close()
+        self._frames.extend(self._codec.flush(self.format))
+
+    def get_remaining_packets(self):
+        return [self._pop_frame() for _ in range(0, len(self._frames))]
 
 
 class rx_decoded_microphone(rx_microphone):
-    def __init__(self, host, port, chunk, profile, level):
-        super().__init__(host, port, chunk, profile, level)
+    def __init__(self, host, port, chunk, profile, level, socket_options=None):
+        super().__init__(host, port, chunk, profile, level, socket_options=socket_options)
         self._codec = decode_microphone(profile, level)
         
     def open(self):
@@ -1509,8 +2345,8 @@ class rx_decoded_microphone(rx_microphone):
 
 
 class rx_decoded_extended_audio(rx_extended_audio):
-    def __init__(self, host, port, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level):
-        super().__init__(host, port, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level)
+    def __init__(self, host, port, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level, socket_options=None):
+        super().__init__(host, port, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level, socket_options=socket_options)
         self._codec = decode_microphone(profile, None)
         
     def open(self):
@@ -1526,6 +2362,387 @@ class rx_decoded_extended_audio(rx_extended_audio):
         super().close()
 
 
+#------------------------------------------------------------------------------
+# Lazy Receivers
+#------------------------------------------------------------------------------
+
+# Payload whose images are decoded on first access
+# Metadata is unpacked when the packet is received
+class _lazy_payload:
+    def __init__(self, decoder, group, index, fields):
+        self.__dict__.update(fields)
+        self._decoder = decoder
+        self._group = group
+        self._index = index
+
+    def __getattr__(self, name):
+        if (name.startswith('_') or (self.__dict__.get('_group') is None)):
+            raise AttributeError(name)
+        self.__dict__.update(self._decoder.decode(self._group, self._index))
+        self._group = None
+        return getattr(self, name)
+
+    def __getstate__(self):
+        # Keep only the frames needed to decode this one
+        state = self.__dict__.copy()
+        if (self._group is not None):
+            state['_group'] = self._group[:self._index + 1]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+
+# Encoded frames are grouped from keyframe to keyframe
+# A frame is decoded by resuming from the last frame decoded if it is earlier
+# in the same group, otherwise by restarting from the start of its group, so
+# frames can be accessed in any order and frames after the last one accessed
+# in a group are never decoded
+class _lazy_decoder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._group = None
+        self._codec = None
+        self._decoded_group = None
+        self._decoded_count = 0
+
+    def _is_keyframe(self, unit):
+        return True
+
+    def _add(self, unit, fields):
+        with self._lock:
+            if ((self._group is None) or self._is_keyframe(unit)):
+                self._group = []
+            self._group.append(unit)
+            return _lazy_payload(self, self._group, len(self._group) - 1, fields)
+
+    def decode(self, group, index):
+        with self._lock:
+            if ((self._codec is None) or (self._decoded_group is not group) or (self._decoded_count > index)):
+                self._codec = self._create()
+                self._decoded_group = group
+                self._decoded_count = 0
+            for unit in group[self._decoded_count:index]:
+                self._codec.skip(unit)
+            self._decoded_count = index + 1
+            return self._decode(group[index])
+
+    def __getstate__(self):
+        # Decoding state is not transferred, unpickled payloads restart from
+        # the start of their group
+        state = self.__dict__.copy()
+        for name in ['_lock', '_group', '_codec', '_decoded_group']:
+            state[name] = None
+        state['_decoded_count'] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class _lazy_rm_vlc(_lazy_decoder):
+    def __init__(self, profile):
+        super().__init__()
+        self.profile = profile
+
+    def _create(self):
+        codec = decode_rm_vlc(self.profile)
+        codec.create()
+        return codec
+
+    def _is_keyframe(self, unit):
+        return is_video_keyframe(self.profile, unit)
+
+    def _decode(self, unit):
+        return {'image' : _get_first_frame(self._codec.submit(unit, None))}
+
+    def add(self, payload):
+        frame = unpack_rm_vlc(payload)
+        return self._add(frame.image, {'sensor_ticks' : frame.sensor_ticks, 'exposure' : frame.exposure, 'gain' : frame.gain})
+
+
+class _lazy_rm_depth_ahat(_lazy_decoder):
+    def __init__(self, profile_z, profile_ab):
+        super().__init__()
+        self.profile_z = profile_z
+        self.profile_ab = profile_ab
+
+    def _create(self):
+        codec = decode_rm_depth_ahat(self.profile_z, self.profile_ab)
+        codec.create()
+        return codec
+
+    def _is_keyframe(self, unit):
+        return is_keyframe_rm_depth_ahat(self.profile_z, self.profile_ab, unit)
+
+    def _decode(self, unit):
+        frame = _get_first_frame(self._codec.submit(unit, None)) or _RM_Depth_Frame(None, None, None)
+        return {'depth' : frame.depth, 'ab' : frame.ab}
+
+    def add(self, payload):
+        return self._add(payload, {'sensor_ticks' : np.frombuffer(payload[-8:], dtype=np.uint64, offset=0, count=1)})
+
+
+# PNG frames are independent
+class _lazy_rm_depth_longthrow(_lazy_decoder):
+    def _create(self):
+        return None
+
+    def _decode(self, unit):
+        frame = decode_rm_depth_longthrow(unit)
+        return {'depth' : frame.depth, 'ab' : frame.ab}
+
+    def add(self, payload):
+        return self._add(payload, {'sensor_ticks' : np.frombuffer(payload[-8:], dtype=np.uint64, offset=0, count=1)})
+
+
+class _lazy_pv(_lazy_decoder):
+    def __init__(self, profile, width, height, format):
+        super().__init__()
+        self.profile = profile
+        self.width = width
+        self.height = height
+        self.format = format
+
+    def _create(self):
+        codec = decode_pv(self.profile)
+        codec.create(self.width, self.height)
+        return codec
+
+    def _is_keyframe(self, unit):
+        return is_video_keyframe(self.profile, unit)
+
+    def _decode(self, unit):
+        return {'image' : _get_first_frame(self._codec.submit(unit, self.format, None))}
+
+    def add(self, payload):
+        frame = unpack_pv(payload)
+        fields = frame.__dict__.copy()
+        del fields['image']
+        return self._add(frame.image, fields)
+
+
+def _create_lazy_decoder(rx, format):
+    if (rx.port in [StreamPort.RM_VLC_LEFTFRONT, StreamPort.RM_VLC_LEFTLEFT, StreamPort.RM_VLC_RIGHTFRONT, StreamPort.RM_VLC_RIGHTRIGHT]):
+        return _lazy_rm_vlc(rx.profile)
+    if (rx.port == StreamPort.RM_DEPTH_AHAT):
+        return _lazy_rm_depth_ahat(rx.profile_z, rx.profile_ab)
+    if (rx.port == StreamPort.RM_DEPTH_LONGTHROW):
+        return _lazy_rm_depth_longthrow()
+    if (rx.port in [StreamPort.PERSONAL_VIDEO, StreamPort.EXTENDED_VIDEO]):
+        return _lazy_pv(rx.profile, rx.width, rx.height, format)
+    raise Exception(f'lazy decoding is not supported for port {rx.port}')
+
+
+# Wraps a raw receiver (or hl2ss_io reader) of a video stream
+# Returned packets hold the encoded payload and decode it when the image
+# attributes (image, or depth and ab) are first accessed
+# Packets can be decoded in any order and from any thread, and keep the
+# encoded frames of their group alive until decoded
+# When sent to another process, a packet carries the encoded frames of its
+# group up to itself and is decoded there
+class rx_lazy(_context_manager):
+    def __init__(self, rx, format='bgr24'):
+        self.rx = rx
+        self.format = format
+
+    def __getattr__(self, name):
+        # Expose the configuration of the wrapped receiver (port, mode, etc.)
+        if (name == 'rx'):
+            raise AttributeError(name)
+        return getattr(self.rx, name)
+
+    def open(self):
+        self.rx.open()
+        self._decoder = _create_lazy_decoder(self.rx, self.format)
+
+    def get_next_packet(self):
+        data = self.rx.get_next_packet()
+        if (data is not None):
+            data.payload = self._decoder.add(data.payload)
+        return data
+
+    def close(self):
+        self.rx.close()
+
+
+#------------------------------------------------------------------------------
+# Latest Frame Receivers
+#------------------------------------------------------------------------------
+
+class rx_latest(_context_manager):
+    def __init__(self, rx):
+        self.rx = rx
+
+    def __getattr__(self, name):
+        # Expose the configuration of the wrapped receiver (port, mode, etc.)
+        if (name == 'rx'):
+            raise AttributeError(name)
+        return getattr(self.rx, name)
+
+    def open(self):
+        self._cv = threading.Condition()
+        self._data = None
+        self._error = None
+        self._skipped = 0
+        self._stop = False
+        self.rx.open()
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+        self._thread.start()
+
+    def _receive(self):
+        # All packets go through the wrapped receiver so decoder state stays valid
+        while (True):
+            try:
+                data = self.rx.get_next_packet()
+            except Exception as error:
+                with self._cv:
+                    self._error = error
+                    self._cv.notify_all()
+                break
+            with self._cv:
+                if (self._stop):
+                    break
+                if (self._data is not None):
+                    self._skipped += 1
+                self._data = data
+                self._cv.notify_all()
+
+    def get_next_packet(self):
+        with self._cv:
+            self._cv.wait_for(lambda: (self._data is not None) or (self._error is not None))
+            if (self._data is None):
+                raise self._error
+            data = self._data
+            self._data = None
+            return data
+
+    def get_skipped_count(self):
+        with self._cv:
+            return self._skipped
+
+    def get_receive_statistics(self):
+        return self.rx.get_receive_statistics()
+
+    # The receive thread is stopped before the wrapped receiver is closed so
+    # that its decoder is not used from both threads
+    def close(self):
+        with self._cv:
+            self._stop = True
+        self.rx.shutdown()
+        self._thread.join()
+        self.rx.close()
+
+
+#------------------------------------------------------------------------------
+# Resilient Receivers
+#------------------------------------------------------------------------------
+
+class _gap:
+    def __init__(self, start, end, lost):
+        self.start = start
+        self.end = end
+        self.lost = lost
+
+
+class rx_resilient(_context_manager):
+    def __init__(self, rx, backoff_initial, backoff_maximum, retries, pv_subsystem):
+        self.rx = rx
+        self.backoff_initial = backoff_initial
+        self.backoff_maximum = backoff_maximum
+        self.retries = retries
+        self.pv_subsystem = pv_subsystem
+
+    def __getattr__(self, name):
+        # Expose the configuration of the wrapped receiver (port, mode, etc.)
+        if (name == 'rx'):
+            raise AttributeError(name)
+        return getattr(self.rx, name)
+
+    def open(self):
+        self._shutdown = False
+        self._gaps = []
+        self._reconnects = 0
+        self._timestamp = None
+        self._period = None
+        self._resumed = False
+        self._start_subsystem()
+        self.rx.open()
+
+    def _start_subsystem(self):
+        if (self.pv_subsystem is not None):
+            start_subsystem_pv(self.rx.host, self.rx.port, *self.pv_subsystem)
+
+    def _close_rx(self):
+        try:
+            self.rx.close()
+        except Exception:
+            pass
+
+    def _reconnect(self):
+        self._close_rx()
+        delay = self.backoff_initial
+        attempts = 0
+        while (True):
+            if (self._shutdown):
+                raise ConnectionError('receiver shut down')
+            if ((self.retries is not None) and (attempts >= self.retries)):
+                raise Exception('reconnect failed')
+            time.sleep(delay)
+            try:
+                self._start_subsystem()
+                self.rx.open()
+                break
+            except OSError:
+                self._close_rx()
+            delay = min(delay * 2, self.backoff_maximum)
+            attempts += 1
+        self._reconnects += 1
+        self._resumed = True
+
+    def _update(self, timestamp):
+        if (self._timestamp is not None):
+            delta = timestamp - self._timestamp
+            if (self._resumed):
+                lost = max(0, round(delta / self._period) - 1) if (self._period) else 0
+                self._gaps.append(_gap(self._timestamp, timestamp, lost))
+            elif (delta > 0):
+                self._period = delta if (self._period is None) else (0.9 * self._period + 0.1 * delta)
+        self._timestamp = timestamp
+        self._resumed = False
+
+    def get_next_packet(self):
+        while (True):
+            try:
+                data = self.rx.get_next_packet()
+                break
+            except OSError:
+                # Connection lost (ConnectionError from _client included),
+                # other errors are not retried
+                if (self._shutdown):
+                    raise
+                self._reconnect()
+        self._update(data.timestamp)
+        return data
+
+    def get_gaps(self):
+        gaps = self._gaps
+        self._gaps = []
+        return gaps
+
+    def get_reconnect_count(self):
+        return self._reconnects
+
+    # Stops get_next_packet without reconnecting
+    def shutdown(self):
+        self._shutdown = True
+        self.rx.shutdown()
+
+    def close(self):
+        self.rx.close()
+
+
 #------------------------------------------------------------------------------
 # Mode 2 Data Acquisition
 #------------------------------------------------------------------------------
@@ -1968,7 +3185,7 @@ class ipc_rc(_context_manager):
 
     def open(self):
         self._client = _client()
-        self._client.open(self.host, self.port)
+        self._client.open(self.host, self.port, _IPC_SOCKET_OPTIONS)
 
     def close(self):
         self._client.close()
@@ -2174,7 +3391,7 @@ class ipc_sm(_context_manager):
         
     def open(self):
         self._client = _client()
-        self._client.open(self.host, self.port)
+        self._client.open(self.host, self.port, _IPC_SOCKET_OPTIONS)
 
     def create_observer(self):
         self._client.sendall(struct.pack('<B', ipc_sm._CMD_CREATE_OBSERVER))
@@ -2353,7 +3570,7 @@ class ipc_su(_context_manager):
         
     def open(self):
         self._client = _client()
-        self._client.open(self.host, self.port)
+        self._client.open(self.host, self.port, _IPC_SOCKET_OPTIONS)
 
     def _download_mesh(self):
         elements_vertices, elements_indices = struct.unpack('<II', self._client.download(2 * _SIZEOF.DWORD, ChunkSize.SINGLE_TRANSFER))
@@ -2433,7 +3650,7 @@ class ipc_vi(_context_manager):
 
     def open(self):
         self._client = _client()
-        self._client.open(self.host, self.port)
+        self._client.open(self.host, self.port, _IPC_SOCKET_OPTIONS)
 
     def create_recognizer(self):
         command = struct.pack('<B', ipc_vi._CMD_CREATE_RECOGNIZER)
@@ -2502,7 +3719,7 @@ class ipc_umq(_context_manager):
     
     def open(self):
         self._client = _client()
-        self._client.open(self.host, self.port)
+        self._client.open(self.host, self.port, _IPC_SOCKET_OPTIONS)
 
     def push(self, buffer):
         self._client.sendall(buffer.get_data())
@@ -2530,7 +3747,7 @@ class ipc_gmq(_context_manager):
 
     def open(self):
         self._client = _client()
-        self._client.open(self.host, self.port)
+        self._client.open(self.host, self.port, _IPC_SOCKET_OPTIONS)
 
     def pull(self):
         self._client.sendall(struct.pack('<I', ipc_gmq._CMD_NONE))
@@ -0,0 +1,407 @@
+
+import asyncio
+import struct
+import numpy as np
+import hl2ss
+import hl2ss_lnm
+
+
+#------------------------------------------------------------------------------
+# Packet Gatherer
+#------------------------------------------------------------------------------
+
+# Packets are read with readexactly (header, payload, pose) so each one is
+# copied once out of the stream buffer, whose reads are sized by the transport
+# (chunk_size, including ChunkSize.ADAPTIVE, does not apply)
+class _gatherer:
+    async def open(self, host, port, chunk_size, mode):
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._mode = mode
+
+    async def sendall(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    async def _read(self, size):
+        try:
+            return await self._reader.readexactly(size)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError('connection closed')
+
+    async def get_next_packet(self):
+        timestamp, size = struct.unpack('<QI', await self._read(12))
+        payload = await self._read(size)
+        pose = np.frombuffer(await self._read(64), dtype=np.float32).reshape((4, 4)) if (self._mode == hl2ss.StreamMode.MODE_1) else None
+        return hl2ss._packet(timestamp, payload, pose)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+#------------------------------------------------------------------------------
+# Mode 0 and Mode 1 Data Acquisition
+#------------------------------------------------------------------------------
+
+async def _connect_client(host, port, chunk_size, mode, configuration):
+    c = _gatherer()
+    await c.open(host, port, chunk_size, mode)
+    if (configuration is not None):
+        await c.sendall(configuration)
+    return c
+
+
+async def _connect_client_rm_vlc(host, port, chunk_size, mode, divisor, profile, level, bitrate, options):
+    return await _connect_client(host, port, chunk_size, mode, hl2ss._create_configuration_for_rm_vlc(mode, divisor, profile, level, bitrate, options))
+
+
+async def _connect_client_rm_depth_ahat(host, port, chunk_size, mode, divisor, profile_z, profile_ab, level, bitrate, options):
+    return await _connect_client(host, port, chunk_size, mode, hl2ss._create_configuration_for_rm_depth_ahat(mode, divisor, profile_z, profile_ab, level, bitrate, options))
+
+
+async def _connect_client_rm_depth_longthrow(host, port, chunk_size, mode, divisor, png_filter):
+    return await _connect_client(host, port, chunk_size, mode, hl2ss._create_configuration_for_rm_depth_longthrow(mode, divisor, png_filter))
+
+
+async def _connect_client_rm_imu(host, port, chunk_size, mode):
+    return await _connect_client(host, port, chunk_size, mode, hl2ss._create_configuration_for_rm_imu(mode))
+
+
+async def _connect_client_pv(host, port, chunk_size, mode, width, height, framerate, divisor, profile, level, bitrate, options):
+    return await _connect_client(host, port, chunk_size, mode, hl2ss._create_configuration_for_pv(mode, width, height, framerate, divisor, profile, level, bitrate, options))
+
+
+async def _connect_client_microphone(host, port, chunk_size, profile, level):
+    return await _connect_client(host, port, chunk_size, hl2ss.StreamMode.MODE_0, hl2ss._create_configuration_for_microphone(profile, level))
+
+
+async def _connect_client_si(host, port, chunk_size):
+    return await _connect_client(host, port, chunk_size, hl2ss.StreamMode.MODE_0, None)
+
+
+async def _connect_client_eet(host, port, chunk_size, fps):
+    return await _connect_client(host, port, chunk_size, hl2ss.StreamMode.MODE_1, hl2ss._create_configuration_for_eet(fps))
+
+
+async def _connect_client_extended_audio(host, port, chunk_size, mixer_mode, loopback_gain, microphone_gain, profile, level):
+    return await _connect_client(host, port, chunk_size, hl2ss.StreamMode.MODE_0, hl2ss._create_configuration_for_extended_audio(mixer_mode, loopback_gain, microphone_gain, profile, level))
+
+
+#------------------------------------------------------------------------------
+# Context Manager
+#------------------------------------------------------------------------------
+
+class _context_manager:
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get_next_packet()
+
+
+#------------------------------------------------------------------------------
+# Receiver Wrappers
+#------------------------------------------------------------------------------
+
+class rx_rm_vlc(_context_manager):
+    def __init__(self, host, port, chunk, mode, divisor, profile, level, bitrate, options):
+        self.host = host
+        self.port = port
+        self.chunk = chunk
+        self.mode = mode
+        self.divisor = divisor
+        self.profile = profile
+        self.level = level
+        self.bitrate = bitrate
+        self.options = options
+
+    async def open(self):
+        self._client = await _connect_client_rm_vlc(self.host, self.port, self.chunk, self.mode, self.divisor, self.profile, self.level, self.bitrate, self.options)
+
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+class rx_rm_depth_ahat(_context_manager):
+    def __init__(self, host, port, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options):
+        self.host = host
+        self.port = port
+        self.chunk = chunk
+        self.mode = mode
+        self.divisor = divisor
+        self.profile_z = profile_z
+        self.profile_ab = profile_ab
+        self.level = level
+        self.bitrate = bitrate
+        self.options = options
+
+    async def open(self):
+        self._client = await _connect_client_rm_depth_ahat(self.host, self.port, self.chunk, self.mode, self.divisor, self.profile_z, self.profile_ab, self.level, self.bitrate, self.options)
+
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+class rx_rm_depth_longthrow(_context_manager):
+    def __init__(self, host, port, chunk, mode, divisor, png_filter):
+        self.host = host
+        self.port = port
+        self.chunk = chunk
+        self.mode = mode
+        self.divisor = divisor
+        self.png_filter = png_filter
+
+    async def open(self):
+        self._client = await _connect_client_rm_depth_longthrow(self.host, self.port, self.chunk, self.mode, self.divisor, self.png_filter)
+
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+class rx_rm_imu(_context_manager):
+    def __init__(self, host, port, chunk, mode):
+        self.host = host
+        self.port = port
+        self.chunk = chunk
+        self.mode = mode
+
+    async def open(self):
+        self._client = await _connect_client_rm_imu(self.host, self.port, self.chunk, self.mode)
+
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+class rx_pv(_context_manager):
+    def __init__(self, host, port, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options):
+        self.host = host
+        self.port = port
+        self.chunk = chunk
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.framerate = framerate
+        self.divisor = divisor
+        self.profile = profile
+        self.level = level
+        self.bitrate = bitrate
+        self.options = options
+
+    async def open(self):
+        self._client = await _connect_client_pv(self.host, self.port, self.chunk, self.mode, self.width, self.height, self.framerate, self.divisor, self.profile, self.level, self.bitrate, self.options)
+
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+class rx_microphone(_context_manager):
+    def __init__(self, host, port, chunk, profile, level):
+        self.host = host
+        self.port = port
+        self.chunk = chunk
+        self.profile = profile
+        self.level = level
+
+    async def open(self):
+        self._client = await _connect_client_microphone(self.host, self.port, self.chunk, self.profile, self.level)
+
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+class rx_si(_context_manager):
+    def __init__(self, host, port, chunk):
+        self.host = host
+        self.port = port
+        self.chunk = chunk
+
+    async def open(self):
+        self._client = await _connect_client_si(self.host, self.port, self.chunk)
+
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+class rx_eet(_context_manager):
+    def __init__(self, host, port, chunk, fps):
+        self.host = host
+        self.port = port
+        self.chunk = chunk
+        self.fps = fps
+
+    async def open(self):
+        self._client = await _connect_client_eet(self.host, self.port, self.chunk, self.fps)
+
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+class rx_extended_audio(_context_manager):
+    def __init__(self, host, port, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level):
+        self.host = host
+        self.port = port
+        self.chunk = chunk
+        self.mixer_mode = mixer_mode
+        self.loopback_gain = loopback_gain
+        self.microphone_gain = microphone_gain
+        self.profile = profile
+        self.level = level
+
+    async def open(self):
+        self._client = await _connect_client_extended_audio(self.host, self.port, self.chunk, self.mixer_mode, self.loopback_gain, self.microphone_gain, self.profile, self.level)
+
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+#------------------------------------------------------------------------------
+# Receiver From Receiver
+#------------------------------------------------------------------------------
+
+def _create_rx_from_rx_rm_vlc(rx):
+    return rx_rm_vlc(rx.host, rx.port, rx.chunk, rx.mode, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options)
+
+
+def _create_rx_from_rx_rm_depth_ahat(rx):
+    return rx_rm_depth_ahat(rx.host, rx.port, rx.chunk, rx.mode, rx.divisor, rx.profile_z, rx.profile_ab, rx.level, rx.bitrate, rx.options)
+
+
+def _create_rx_from_rx_rm_depth_longthrow(rx):
+    return rx_rm_depth_longthrow(rx.host, rx.port, rx.chunk, rx.mode, rx.divisor, rx.png_filter)
+
+
+def _create_rx_from_rx_rm_imu(rx):
+    return rx_rm_imu(rx.host, rx.port, rx.chunk, rx.mode)
+
+
+def _create_rx_from_rx_pv(rx):
+    return rx_pv(rx.host, rx.port, rx.chunk, rx.mode, rx.width, rx.height, rx.framerate, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options)
+
+
+def _create_rx_from_rx_microphone(rx):
+    return rx_microphone(rx.host, rx.port, rx.chunk, rx.profile, rx.level)
+
+
+def _create_rx_from_rx_si(rx):
+    return rx_si(rx.host, rx.port, rx.chunk)
+
+
+def _create_rx_from_rx_eet(rx):
+    return rx_eet(rx.host, rx.port, rx.chunk, rx.fps)
+
+
+def _create_rx_from_rx_extended_audio(rx):
+    return rx_extended_audio(rx.host, rx.port, rx.chunk, rx.mixer_mode, rx.loopback_gain, rx.microphone_gain, rx.profile, rx.level)
+
+
+def create_rx_from_rx(rx):
+    if (rx.port == hl2ss.StreamPort.RM_VLC_LEFTFRONT):
+        return _create_rx_from_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_VLC_LEFTLEFT):
+        return _create_rx_from_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_VLC_RIGHTFRONT):
+        return _create_rx_from_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_VLC_RIGHTRIGHT):
+        return _create_rx_from_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return _create_rx_from_rx_rm_depth_ahat(rx)
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return _create_rx_from_rx_rm_depth_longthrow(rx)
+    if (rx.port == hl2ss.StreamPort.RM_IMU_ACCELEROMETER):
+        return _create_rx_from_rx_rm_imu(rx)
+    if (rx.port == hl2ss.StreamPort.RM_IMU_GYROSCOPE):
+        return _create_rx_from_rx_rm_imu(rx)
+    if (rx.port == hl2ss.StreamPort.RM_IMU_MAGNETOMETER):
+        return _create_rx_from_rx_rm_imu(rx)
+    if (rx.port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return _create_rx_from_rx_pv(rx)
+    if (rx.port == hl2ss.StreamPort.MICROPHONE):
+        return _create_rx_from_rx_microphone(rx)
+    if (rx.port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return _create_rx_from_rx_si(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_EYE_TRACKER):
+        return _create_rx_from_rx_eet(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_AUDIO):
+        return _create_rx_from_rx_extended_audio(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_VIDEO):
+        return _create_rx_from_rx_pv(rx)
+
+
+#------------------------------------------------------------------------------
+# Open Receivers (hl2ss_lnm defaults)
+#------------------------------------------------------------------------------
+
+async def _open_rx(rx):
+    rx = create_rx_from_rx(rx)
+    await rx.open()
+    return rx
+
+
+async def open_rx_rm_vlc(host, port, chunk=hl2ss.ChunkSize.RM_VLC, mode=hl2ss.StreamMode.MODE_1, divisor=1, profile=hl2ss.VideoProfile.H265_MAIN, level=hl2ss.H26xLevel.DEFAULT, bitrate=None, options=None):
+    return await _open_rx(hl2ss_lnm.rx_rm_vlc(host, port, chunk, mode, divisor, profile, level, bitrate, options, False))
+
+
+async def open_rx_rm_depth_ahat(host, port, chunk=hl2ss.ChunkSize.RM_DEPTH_AHAT, mode=hl2ss.StreamMode.MODE_1, divisor=1, profile_z=hl2ss.DepthProfile.SAME, profile_ab=hl2ss.VideoProfile.H265_MAIN, level=hl2ss.H26xLevel.DEFAULT, bitrate=None, options=None):
+    return await _open_rx(hl2ss_lnm.rx_rm_depth_ahat(host, port, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options, False))
+
+
+async def open_rx_rm_depth_longthrow(host, port, chunk=hl2ss.ChunkSize.RM_DEPTH_LONGTHROW, mode=hl2ss.StreamMode.MODE_1, divisor=1, png_filter=hl2ss.PNGFilterMode.PAETH):
+    return await _open_rx(hl2ss_lnm.rx_rm_depth_longthrow(host, port, chunk, mode, divisor, png_filter, False))
+
+
+async def open_rx_rm_imu(host, port, chunk=hl2ss.ChunkSize.RM_IMU, mode=hl2ss.StreamMode.MODE_1):
+    return await _open_rx(hl2ss_lnm.rx_rm_imu(host, port, chunk, mode))
+
+
+async def open_rx_pv(host, port, chunk=hl2ss.ChunkSize.PERSONAL_VIDEO, mode=hl2ss.StreamMode.MODE_1, width=1920, height=1080, framerate=30, divisor=1, profile=hl2ss.VideoProfile.H265_MAIN, level=hl2ss.H26xLevel.DEFAULT, bitrate=None, options=None):
+    return await _open_rx(hl2ss_lnm.rx_pv(host, port, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options, None))
+
+
+async def open_rx_microphone(host, port, chunk=hl2ss.ChunkSize.MICROPHONE, profile=hl2ss.AudioProfile.AAC_24000, level=hl2ss.AACLevel.L2):
+    return await _open_rx(hl2ss_lnm.rx_microphone(host, port, chunk, profile, level, False))
+
+
+async def open_rx_si(host, port, chunk=hl2ss.ChunkSize.SPATIAL_INPUT):
+    return await _open_rx(hl2ss_lnm.rx_si(host, port, chunk))
+
+
+async def open_rx_eet(host, port, chunk=hl2ss.ChunkSize.EXTENDED_EYE_TRACKER, fps=30):
+    return await _open_rx(hl2ss_lnm.rx_eet(host, port, chunk, fps))
+
+
+async def open_rx_extended_audio(host, port, chunk=hl2ss.ChunkSize.EXTENDED_AUDIO, mixer_mode=hl2ss.MixerMode.BOTH, loopback_gain=1.0, microphone_gain=1.0, profile=hl2ss.AudioProfile.AAC_24000, level=hl2ss.AACLevel.L2):
+    return await _open_rx(hl2ss_lnm.rx_extended_audio(host, port, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level, False))
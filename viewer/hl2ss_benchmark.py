@@ -0,0 +1,388 @@
+
+import json
+import multiprocessing as mp
+import platform
+import time
+import tracemalloc
+import numpy as np
+import hl2ss
+import hl2ss_lnm
+
+
+#------------------------------------------------------------------------------
+# Decoders
+#------------------------------------------------------------------------------
+
+# Same decoding steps as the rx_decoded_* receivers, applied to packets from
+# the raw receivers so that network and decode stages can be timed apart
+
+class _decoder_rm_vlc:
+    def __init__(self, rx):
+        self._codec = hl2ss.decode_rm_vlc(rx.profile)
+
+    def create(self):
+        self._codec.create()
+
+    def decode(self, payload):
+        payload = hl2ss.unpack_rm_vlc(payload)
+        payload.image = self._codec.decode(payload.image)
+        return payload
+
+
+class _decoder_rm_depth_ahat:
+    def __init__(self, rx):
+        self._codec = hl2ss.decode_rm_depth_ahat(rx.profile_z, rx.profile_ab)
+
+    def create(self):
+        self._codec.create()
+
+    def decode(self, payload):
+        return self._codec.decode(payload)
+
+
+class _decoder_rm_depth_longthrow:
+    def __init__(self, rx):
+        pass
+
+    def create(self):
+        pass
+
+    def decode(self, payload):
+        return hl2ss.decode_rm_depth_longthrow(payload)
+
+
+class _decoder_pv:
+    def __init__(self, rx, format):
+        self._codec = hl2ss.decode_pv(rx.profile)
+        self._width = rx.width
+        self._height = rx.height
+        self._format = format
+
+    def create(self):
+        self._codec.create(self._width, self._height)
+
+    def decode(self, payload):
+        payload = hl2ss.unpack_pv(payload)
+        payload.image = self._codec.decode(payload.image, self._format)
+        return payload
+
+
+class _decoder_microphone:
+    def __init__(self, rx):
+        self._codec = hl2ss.decode_microphone(rx.profile, rx.level)
+
+    def create(self):
+        self._codec.create()
+
+    def decode(self, payload):
+        return self._codec.decode(payload)
+
+
+#------------------------------------------------------------------------------
+# Cases
+#------------------------------------------------------------------------------
+
+class case:
+    def __init__(self, name, create_rx, create_decoder):
+        self.name = name
+        self.create_rx = create_rx
+        self.create_decoder = create_decoder
+
+
+def create_cases(pv_width=1920, pv_height=1080, pv_framerate=30, pv_format='bgr24'):
+    vlc = hl2ss.StreamPort.RM_VLC_LEFTFRONT
+    ahat = hl2ss.StreamPort.RM_DEPTH_AHAT
+    lt = hl2ss.StreamPort.RM_DEPTH_LONGTHROW
+    pv = hl2ss.StreamPort.PERSONAL_VIDEO
+    mic = hl2ss.StreamPort.MICROPHONE
+
+    cases = []
+
+    for name, profile in [('raw', hl2ss.VideoProfile.RAW), ('h264', hl2ss.VideoProfile.H264_MAIN), ('h265', hl2ss.VideoProfile.H265_MAIN)]:
+        cases.append(case('rm_vlc_' + name, lambda host, profile=profile: hl2ss_lnm.rx_rm_vlc(host, vlc, profile=profile, decoded=False), _decoder_rm_vlc))
+
+    for name, profile_z, profile_ab in [('raw', hl2ss.DepthProfile.SAME, hl2ss.VideoProfile.RAW), ('h264', hl2ss.DepthProfile.SAME, hl2ss.VideoProfile.H264_MAIN), ('h265', hl2ss.DepthProfile.SAME, hl2ss.VideoProfile.H265_MAIN), ('zdepth', hl2ss.DepthProfile.ZDEPTH, hl2ss.VideoProfile.RAW)]:
+        cases.append(case('rm_depth_ahat_' + name, lambda host, profile_z=profile_z, profile_ab=profile_ab: hl2ss_lnm.rx_rm_depth_ahat(host, ahat, profile_z=profile_z, profile_ab=profile_ab, decoded=False), _decoder_rm_depth_ahat))
+
+    cases.append(case('rm_depth_longthrow_png', lambda host: hl2ss_lnm.rx_rm_depth_longthrow(host, lt, decoded=False), _decoder_rm_depth_longthrow))
+
+    for name, profile in [('raw', hl2ss.VideoProfile.RAW), ('h264', hl2ss.VideoProfile.H264_MAIN), ('h265', hl2ss.VideoProfile.H265_MAIN)]:
+        cases.append(case('pv_' + name, lambda host, profile=profile: hl2ss_lnm.rx_pv(host, pv, width=pv_width, height=pv_height, framerate=pv_framerate, profile=profile, decoded_format=None), lambda rx: _decoder_pv(rx, pv_format)))
+
+    for name, profile in [('raw', hl2ss.AudioProfile.RAW), ('aac', hl2ss.AudioProfile.AAC_24000)]:
+        cases.append(case('microphone_' + name, lambda host, profile=profile: hl2ss_lnm.rx_microphone(host, mic, profile=profile, decoded=False), _decoder_microphone))
+
+    return cases
+
+
+#------------------------------------------------------------------------------
+# Measurement
+#------------------------------------------------------------------------------
+
+class _stage:
+    def __init__(self):
+        self._latency = []
+        self._cpu = 0
+        self._allocated = []
+        self._retained = []
+
+    def run(self, trace, function, *args):
+        if (trace):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        cpu = time.thread_time()
+        start = time.perf_counter()
+        result = function(*args)
+        end = time.perf_counter()
+        self._cpu += time.thread_time() - cpu
+        if (trace):
+            current, peak = tracemalloc.get_traced_memory()
+            self._allocated.append(peak - base)
+            self._retained.append(current - base)
+        else:
+            self._latency.append(end - start)
+        return result
+
+    def get_report(self):
+        latency = np.array(self._latency) * 1000
+        report = {
+            'calls'      : len(self._latency),
+            'mean_ms'    : float(np.mean(latency)),
+            'p50_ms'     : float(np.percentile(latency, 50)),
+            'p99_ms'     : float(np.percentile(latency, 99)),
+            'max_ms'     : float(np.max(latency)),
+            'cpu_s'      : self._cpu,
+            'cpu_per_call_ms' : 1000 * self._cpu / (len(self._latency) + len(self._allocated)),
+        }
+        if (len(self._allocated) > 0):
+            report['allocated_peak_bytes_mean'] = float(np.mean(self._allocated))
+            report['allocated_peak_bytes_max'] = int(np.max(self._allocated))
+            report['retained_bytes_mean'] = float(np.mean(self._retained))
+        return report
+
+
+# Receives warmup + packets + allocation_packets packets from a single
+# connection. Latency and throughput are measured on the first pass,
+# allocations on the second pass since tracemalloc slows everything down.
+def run_case(host, case, packets=300, warmup=30, allocation_packets=30):
+    rx = case.create_rx(host)
+    decoder = case.create_decoder(rx)
+    network = _stage()
+    decode = _stage()
+    size = 0
+
+    decoder.create()
+    rx.open()
+    try:
+        for _ in range(0, warmup):
+            decoder.decode(rx.get_next_packet().payload)
+
+        process_cpu = time.process_time()
+        start = time.perf_counter()
+        for _ in range(0, packets):
+            data = network.run(False, rx.get_next_packet)
+            size += len(data.payload)
+            decode.run(False, decoder.decode, data.payload)
+        wall = time.perf_counter() - start
+        process_cpu = time.process_time() - process_cpu
+
+        if (allocation_packets > 0):
+            tracemalloc.start()
+            for _ in range(0, allocation_packets):
+                data = network.run(True, rx.get_next_packet)
+                decode.run(True, decoder.decode, data.payload)
+            tracemalloc.stop()
+    finally:
+        rx.close()
+
+    return {
+        'name'            : case.name,
+        'port'            : hl2ss.get_port_name(rx.port),
+        'packets'         : packets,
+        'wall_s'          : wall,
+        'process_cpu_s'   : process_cpu,
+        'packets_per_s'   : packets / wall,
+        'megabytes_per_s' : size / wall / (1024 * 1024),
+        'payload_bytes_mean' : size / packets,
+        'stages'          : {'network' : network.get_report(), 'decode' : decode.get_report()},
+    }
+
+
+#------------------------------------------------------------------------------
+# Suite
+#------------------------------------------------------------------------------
+
+def _serve_emulator(host, recordings, event_ready, event_stop):
+    import hl2ss_emu
+    ports = [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_DEPTH_AHAT, hl2ss.StreamPort.RM_DEPTH_LONGTHROW, hl2ss.StreamPort.PERSONAL_VIDEO, hl2ss.StreamPort.MICROPHONE]
+    rates = {port : hl2ss_emu.Rate.UNTHROTTLED for port in ports}
+    with hl2ss_emu.emulator(host, ports, rates, None, recordings):
+        event_ready.set()
+        event_stop.wait()
+
+
+def _get_platform():
+    versions = {'python' : platform.python_version(), 'numpy' : np.__version__}
+    for module in ['cv2', 'av']:
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    return {'system' : platform.platform(), 'machine' : platform.machine(), 'processor' : platform.processor(), 'cpu_count' : mp.cpu_count(), 'versions' : versions}
+
+
+# Runs all cases and returns a JSON serializable report
+# When host is None, packets come from an unthrottled hl2ss_emu emulator
+# running in a separate process on 127.0.0.1, using synthetic payloads or the
+# hl2ss_io recordings given per port. Otherwise packets come from the device
+# or relay at host and are limited by its frame rate.
+# Cases that cannot run (e.g., missing pyzdepth) are reported with an error.
+def run(cases, host=None, packets=300, warmup=30, allocation_packets=30, recordings=None, log=print):
+    emulator = None
+    if (host is None):
+        host = '127.0.0.1'
+        event_ready = mp.Event()
+        event_stop = mp.Event()
+        emulator = mp.Process(target=_serve_emulator, args=(host, recordings, event_ready, event_stop))
+        emulator.start()
+        event_ready.wait()
+
+    results = []
+    try:
+        for c in cases:
+            try:
+                result = run_case(host, c, packets, warmup, allocation_packets)
+            except Exception as error:
+                result = {'name' : c.name, 'error' : repr(error)}
+            if (log is not None):
+                log(format_result(result))
+            results.append(result)
+    finally:
+        if (emulator is not None):
+            event_stop.set()
+            emulator.join()
+
+    return {
+        'created'  : time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'platform' : _get_platform(),
+        'settings' : {'source' : 'emulator' if (emulator is not None) else host, 'packets' : packets, 'warmup' : warmup, 'allocation_packets' : allocation_packets},
+        'results'  : results,
+    }
+
+
+def format_result(result):
+    if ('error' in result):
+        return f'{result["name"]:<24} error: {result["error"]}'
+    network = result['stages']['network']
+    decode = result['stages']['decode']
+    return f'{result["name"]:<24} {result["packets_per_s"]:9.1f} pkt/s {result["megabytes_per_s"]:8.1f} MB/s | network p50 {network["p50_ms"]:7.3f} ms p99 {network["p99_ms"]:7.3f} ms | decode p50 {decode["p50_ms"]:7.3f} ms p99 {decode["p99_ms"]:7.3f} ms cpu {decode["cpu_per_call_ms"]:7.3f} ms'
+
+
+#------------------------------------------------------------------------------
+# Multiprocessing
+#------------------------------------------------------------------------------
+
+# Produces decoded RM VLC packets at a fixed rate without a device
+class _rx_synthetic:
+    def __init__(self, port, rate):
+        self.port = port
+        self.rate = rate
+
+    def open(self):
+        self._image = np.zeros(hl2ss.Parameters_RM_VLC.SHAPE, np.uint8)
+        self._pose = np.eye(4, dtype=np.float32)
+        self._timestamp = 0
+        self._next = time.perf_counter()
+
+    def get_next_packet(self):
+        self._next += 1 / self.rate
+        delay = self._next - time.perf_counter()
+        if (delay > 0):
+            time.sleep(delay)
+        self._timestamp += int(hl2ss.TimeBase.HUNDREDS_OF_NANOSECONDS / self.rate)
+        return hl2ss._packet(self._timestamp, hl2ss._RM_VLC_Frame(self._image, self._timestamp, 0, 0), self._pose)
+
+    def close(self):
+        pass
+
+
+# Measures the round trip latency of hl2ss_mp sink requests with different
+# numbers of sinks attached to the same stream while the source produces
+# frames at the given rate. Requests are sent round robin from all sinks.
+def run_mp_latency(sink_counts=[1, 4, 16], requests=1000, rate=30, buffer_size=30, log=print):
+    import hl2ss_mp
+    port = hl2ss.StreamPort.RM_VLC_LEFTFRONT
+    results = []
+
+    for count in sink_counts:
+        producer = hl2ss_mp.producer()
+        producer.configure(port, _rx_synthetic(port, rate))
+        producer.initialize(port, buffer_size)
+        producer.start(port)
+
+        consumer = hl2ss_mp.consumer()
+        sinks = []
+        for _ in range(0, count):
+            sink = consumer.create_sink(producer, port, None, None)
+            sink.get_attach_response()
+            sinks.append(sink)
+
+        while (sinks[0].get_frame_stamp() < 0):
+            time.sleep(1 / rate)
+
+        frame_stamp = _stage()
+        most_recent_frame = _stage()
+        for i in range(0, requests):
+            sink = sinks[i % count]
+            frame_stamp.run(False, sink.get_frame_stamp)
+            most_recent_frame.run(False, sink.get_most_recent_frame)
+
+        for sink in sinks:
+            sink.detach()
+        producer.stop(port)
+
+        result = {'sinks' : count, 'requests' : requests, 'rate' : rate, 'stages' : {'frame_stamp' : frame_stamp.get_report(), 'most_recent_frame' : most_recent_frame.get_report()}}
+        if (log is not None):
+            log(format_mp_result(result))
+        results.append(result)
+
+    return {
+        'created'  : time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'platform' : _get_platform(),
+        'results'  : results,
+    }
+
+
+def format_mp_result(result):
+    frame_stamp = result['stages']['frame_stamp']
+    most_recent_frame = result['stages']['most_recent_frame']
+    return f'{result["sinks"]:>3} sinks | get_frame_stamp p50 {frame_stamp["p50_ms"]:7.3f} ms p99 {frame_stamp["p99_ms"]:7.3f} ms | get_most_recent_frame p50 {most_recent_frame["p50_ms"]:7.3f} ms p99 {most_recent_frame["p99_ms"]:7.3f} ms'
+
+
+#------------------------------------------------------------------------------
+# Reports
+#------------------------------------------------------------------------------
+
+def save_report(filename, report):
+    with open(filename, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+def load_report(filename):
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+
+# Returns the cases whose throughput dropped by more than tolerance (fraction)
+# relative to the baseline report as {name : (baseline, current)}
+def compare_reports(baseline, report, tolerance=0.1):
+    reference = {result['name'] : result for result in baseline['results'] if ('error' not in result)}
+    regressions = dict()
+    for result in report['results']:
+        if (('error' in result) or (result['name'] not in reference)):
+            continue
+        before = reference[result['name']]['packets_per_s']
+        after = result['packets_per_s']
+        if (after < (before * (1 - tolerance))):
+            regressions[result['name']] = (before, after)
+    return regressions
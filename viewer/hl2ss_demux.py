@@ -0,0 +1,73 @@
+
+import selectors
+import socket
+import threading
+import hl2ss
+
+
+#------------------------------------------------------------------------------
+# Demultiplexer
+#------------------------------------------------------------------------------
+
+# Receives multiple streams in a single thread
+# Receivers must not be decoded (e.g., hl2ss_lnm.rx_*(..., decoded=False))
+# Packets are passed to the target callable configured for each port (use
+# queue.put to forward packets to a queue)
+# The target receives None when the stream is closed
+class demux(hl2ss._context_manager):
+    def __init__(self):
+        self._streams = dict()
+
+    def configure(self, port, rx, target):
+        self._streams[port] = (rx, target)
+
+    def open(self):
+        self._selector = selectors.DefaultSelector()
+        self._event_stop = threading.Event()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._active = dict()
+        for port, (rx, target) in self._streams.items():
+            rx.open()
+            self._selector.register(rx, selectors.EVENT_READ, port)
+            self._active[port] = (rx, target)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def get_active_ports(self):
+        return list(self._active.keys())
+
+    def _detach(self, port):
+        rx, target = self._active.pop(port)
+        self._selector.unregister(rx)
+        target(None)
+
+    def _run(self):
+        while ((not self._event_stop.is_set()) and (len(self._active) > 0)):
+            for key, _ in self._selector.select():
+                port = key.data
+                if (port is None):
+                    continue
+                rx, target = self._active[port]
+                try:
+                    rx.receive()
+                except OSError:
+                    self._detach(port)
+                    continue
+                while (True):
+                    data = rx.get_buffered_packet()
+                    if (data is None):
+                        break
+                    target(data)
+
+    def close(self):
+        self._event_stop.set()
+        self._wake_w.send(b'\x00')
+        self._thread.join()
+        for port in list(self._active.keys()):
+            self._detach(port)
+        for rx, _ in self._streams.values():
+            rx.close()
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
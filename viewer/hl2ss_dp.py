@@ -0,0 +1,401 @@
+
+import os
+import threading
+import traceback
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import numpy as np
+import hl2ss
+
+
+#------------------------------------------------------------------------------
+# Stream Decoders
+#------------------------------------------------------------------------------
+
+# Each decoder applies the same steps as the corresponding rx_decoded_*
+# receiver and lists the payload attributes holding the decoded arrays, which
+# are transferred through shared memory
+# flush returns the frames still held by the codec, which can be used again
+# after create
+
+class _decoder_rm_vlc:
+    ARRAYS = ['image']
+
+    def __init__(self, rx, format):
+        self._codec = hl2ss.decode_rm_vlc(rx.profile)
+
+    def create(self):
+        self._codec.create()
+
+    def _get(self, frames):
+        for image, data in frames:
+            data.payload.image = image
+        return [data for _, data in frames]
+
+    def submit(self, data):
+        data.payload = hl2ss.unpack_rm_vlc(data.payload)
+        return self._get(self._codec.submit(data.payload.image, data))
+
+    def flush(self):
+        return self._get(self._codec.flush())
+
+
+class _decoder_rm_depth_ahat:
+    ARRAYS = ['depth', 'ab']
+
+    def __init__(self, rx, format):
+        self._codec = hl2ss.decode_rm_depth_ahat(rx.profile_z, rx.profile_ab)
+
+    def create(self):
+        self._codec.create()
+
+    def _get(self, frames):
+        for frame, data in frames:
+            data.payload = frame
+        return [data for _, data in frames]
+
+    def submit(self, data):
+        return self._get(self._codec.submit(data.payload, data))
+
+    def flush(self):
+        return self._get(self._codec.flush())
+
+
+class _decoder_pv:
+    ARRAYS = ['image']
+
+    def __init__(self, rx, format):
+        self._codec = hl2ss.decode_pv(rx.profile)
+        self._width = rx.width
+        self._height = rx.height
+        self._format = format
+
+    def create(self):
+        self._codec.create(self._width, self._height)
+
+    def _get(self, frames):
+        for image, data in frames:
+            data.payload.image = image
+        return [data for _, data in frames]
+
+    def submit(self, data):
+        data.payload = hl2ss.unpack_pv(data.payload)
+        return self._get(self._codec.submit(data.payload.image, self._format, data))
+
+    def flush(self):
+        return self._get(self._codec.flush(self._format))
+
+
+_PV_FORMAT_BYTES = {
+    'rgb24' : 3,
+    'bgr24' : 3,
+    'rgba'  : 4,
+    'bgra'  : 4,
+    'gray8' : 1,
+    'nv12'  : 1.5,
+}
+
+
+def _create_decoder(rx, format):
+    if (rx.port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return (_decoder_rm_vlc, hl2ss.Parameters_RM_VLC.PIXELS)
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return (_decoder_rm_depth_ahat, 2 * hl2ss.Parameters_RM_DEPTH_AHAT.PIXELS * hl2ss._SIZEOF.WORD)
+    if (rx.port in [hl2ss.StreamPort.PERSONAL_VIDEO, hl2ss.StreamPort.EXTENDED_VIDEO]):
+        return (_decoder_pv, int(rx.width * rx.height * _PV_FORMAT_BYTES[format]))
+    raise Exception(f'decoder pool does not support port {rx.port}')
+
+
+#------------------------------------------------------------------------------
+# Worker
+#------------------------------------------------------------------------------
+
+class _stream:
+    def __init__(self, port, decoder, arrays, slot_size, slots, shm_name, slot_semaphore, dout):
+        self.port = port
+        self.decoder = decoder
+        self.arrays = arrays
+        self.slot_size = slot_size
+        self.slots = slots
+        self.shm_name = shm_name
+        self.slot_semaphore = slot_semaphore
+        self.dout = dout
+
+
+# Sent on dout in place of the frames of a packet that failed to decode
+class _worker_error:
+    def __init__(self, message):
+        self.message = message
+
+
+# Sent on dout after the remaining frames of a port that was ended
+class _worker_end:
+    pass
+
+
+def _create_codec(codecs, errors, port):
+    try:
+        codecs[port].create()
+    except Exception:
+        errors[port] = _worker_error(traceback.format_exc())
+
+
+def _put_frames(stream, shm, index, frames):
+    for data in frames:
+        stream.slot_semaphore.acquire()
+        slot = index[stream.port]
+        index[stream.port] = (slot + 1) % stream.slots
+        offset = slot * stream.slot_size
+        for name in stream.arrays:
+            array = np.ascontiguousarray(getattr(data.payload, name))
+            view = np.ndarray(array.shape, array.dtype, buffer=shm.buf, offset=offset)
+            view[...] = array
+            setattr(data.payload, name, (offset, array.shape, array.dtype.str))
+            offset += array.nbytes
+        stream.dout.put(data)
+
+
+# Messages are (kind, port, data) tuples
+# END flushes the codec of the port and creates it again for the next stream
+# WAKE sends None on dout, after the frames of the packets sent before it
+class _worker_message:
+    DATA = 0
+    END  = 1
+    WAKE = 2
+
+
+def _worker(streams, din):
+    shm = dict()
+    codecs = dict()
+    index = dict()
+    errors = dict()
+
+    for port, stream in streams.items():
+        shm[port] = mp.shared_memory.SharedMemory(name=stream.shm_name)
+        codecs[port] = stream.decoder
+        index[port] = 0
+        _create_codec(codecs, errors, port)
+
+    while (True):
+        message = din.get()
+        if (message is None):
+            break
+        kind, port, data = message
+        stream = streams[port]
+        if (kind == _worker_message.WAKE):
+            stream.dout.put(None)
+            continue
+        if (kind == _worker_message.END):
+            if (port not in errors):
+                try:
+                    _put_frames(stream, shm[port], index, codecs[port].flush())
+                except Exception:
+                    stream.dout.put(_worker_error(traceback.format_exc()))
+            errors.pop(port, None)
+            _create_codec(codecs, errors, port)
+            stream.dout.put(_worker_end())
+            continue
+        if (port not in errors):
+            try:
+                _put_frames(stream, shm[port], index, codecs[port].submit(data))
+                continue
+            except Exception:
+                # Codec state is lost, later packets of this port fail too
+                errors[port] = _worker_error(traceback.format_exc())
+        stream.dout.put(errors[port])
+
+    for port in streams.keys():
+        shm[port].close()
+
+
+#------------------------------------------------------------------------------
+# Client
+#------------------------------------------------------------------------------
+
+# Handle to a decoded stream, can be passed to other processes
+# Frames are valid until keep more frames of the same port have been received
+# get raises if the worker failed to decode the packet
+class _client:
+    def __init__(self, port, arrays, slot_size, slots, keep, shm_name, slot_semaphore, din, dout):
+        self.port = port
+        self.keep = keep
+        self.inflight = slots - keep
+        self._arrays = arrays
+        self._shm_name = shm_name
+        self._slot_semaphore = slot_semaphore
+        self._din = din
+        self._dout = dout
+
+    def open(self):
+        self._shm = mp.shared_memory.SharedMemory(name=self._shm_name)
+        self._delivered = 0
+
+    def submit(self, data):
+        self._din.put((_worker_message.DATA, self.port, data))
+
+    # get returns None after the frames of the packets already submitted
+    def wake(self):
+        self._din.put((_worker_message.WAKE, self.port, None))
+
+    def _deliver(self, data):
+        for name in self._arrays:
+            offset, shape, dtype = getattr(data.payload, name)
+            setattr(data.payload, name, np.ndarray(shape, dtype, buffer=self._shm.buf, offset=offset))
+        self._delivered += 1
+        if (self._delivered > self.keep):
+            self._slot_semaphore.release()
+        return data
+
+    def get(self):
+        data = self._dout.get()
+        if (data is None):
+            return None
+        if (isinstance(data, _worker_error)):
+            raise Exception(f'decoder worker failed on port {self.port}\n{data.message}')
+        return self._deliver(data)
+
+    # Ends the stream, no more packets may be submitted until the next open
+    # Returns the frames that were not received yet, including the frames
+    # held by the codec, which are valid until the port decodes new frames
+    def drain(self):
+        self._din.put((_worker_message.END, self.port, None))
+        frames = []
+        while (True):
+            data = self._dout.get()
+            if (isinstance(data, _worker_end)):
+                break
+            if ((data is not None) and (not isinstance(data, _worker_error))):
+                frames.append(self._deliver(data))
+        for _ in range(0, min(self._delivered, self.keep)):
+            self._slot_semaphore.release()
+        self._delivered = 0
+        return frames
+
+    def close(self):
+        self._shm.close()
+
+
+#------------------------------------------------------------------------------
+# Pool
+#------------------------------------------------------------------------------
+
+# Decodes RM VLC, RM Depth AHAT and PV streams in worker processes
+# All packets of a port go to the same worker so codec state is kept
+# Ports are assigned to workers round robin unless a worker is given
+class decoder_pool:
+    def __init__(self, workers=None):
+        self.workers = os.cpu_count() if (workers is None) else workers
+        self._config = dict()
+        self._next = 0
+
+    def configure(self, port, rx, format='bgr24', inflight=4, keep=2, worker=None):
+        if (worker is None):
+            worker = self._next % self.workers
+            self._next += 1
+        self._config[port] = (rx, format, inflight, keep, worker)
+
+    def open(self):
+        self._din = [mp.Queue() for _ in range(0, self.workers)]
+        self._shm = dict()
+        self._clients = dict()
+        streams = [dict() for _ in range(0, self.workers)]
+
+        for port, (rx, format, inflight, keep, worker) in self._config.items():
+            decoder, slot_size = _create_decoder(rx, format)
+            slots = inflight + keep
+            shm = mp.shared_memory.SharedMemory(create=True, size=slot_size * slots)
+            slot_semaphore = mp.Semaphore(slots)
+            dout = mp.Queue()
+            self._shm[port] = shm
+            streams[worker][port] = _stream(port, decoder(rx, format), decoder.ARRAYS, slot_size, slots, shm.name, slot_semaphore, dout)
+            self._clients[port] = _client(port, decoder.ARRAYS, slot_size, slots, keep, shm.name, slot_semaphore, self._din[worker], dout)
+
+        self._workers = [mp.Process(target=_worker, args=(streams[i], self._din[i])) for i in range(0, self.workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def get_client(self, port):
+        return self._clients[port]
+
+    def close(self):
+        for din in self._din:
+            din.put(None)
+        for worker in self._workers:
+            worker.join()
+        for shm in self._shm.values():
+            shm.close()
+            shm.unlink()
+
+
+#------------------------------------------------------------------------------
+# Receiver
+#------------------------------------------------------------------------------
+
+# Receives packets from a raw receiver (decoded=False) in a background thread
+# and decodes them in the pool, up to client.inflight packets at a time
+class rx_pooled(hl2ss._context_manager):
+    def __init__(self, rx, client):
+        self.rx = rx
+        self.client = client
+
+    def __getattr__(self, name):
+        # Expose the configuration of the wrapped receiver (port, mode, etc.)
+        if (name == 'rx'):
+            raise AttributeError(name)
+        return getattr(self.rx, name)
+
+    def open(self):
+        self._semaphore = threading.Semaphore(self.client.inflight)
+        self._lock = threading.Lock()
+        self._remaining = []
+        self._error = None
+        self._stop = False
+        self.client.open()
+        self.rx.open()
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+        self._thread.start()
+
+    def _receive(self):
+        while (True):
+            self._semaphore.acquire()
+            try:
+                data = self.rx.get_next_packet()
+            except Exception as error:
+                # Wake get_next_packet
+                self._error = error
+                self.client.wake()
+                break
+            with self._lock:
+                if (self._stop):
+                    break
+                self.client.submit(data)
+
+    def get_next_packet(self):
+        try:
+            data = self.client.get()
+        except Exception:
+            # Decoding failed in the worker, the packet is consumed
+            self._semaphore.release()
+            raise
+        if (data is None):
+            raise self._error
+        self._semaphore.release()
+        return data
+
+    # Packets decoded when the receiver was closed (until the next open)
+    def get_remaining_packets(self):
+        remaining = self._remaining
+        self._remaining = []
+        return remaining
+
+    # The receive thread is stopped before the wrapped receiver is closed, then
+    # the stream is ended in the pool
+    def close(self):
+        with self._lock:
+            self._stop = True
+        self._semaphore.release()
+        self.rx.shutdown()
+        self._thread.join()
+        self.rx.close()
+        self._remaining = self.client.drain()
+        self.client.close()
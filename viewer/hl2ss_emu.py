@@ -0,0 +1,712 @@
+
+import fractions
+import socket
+import struct
+import threading
+import time
+import numpy as np
+import cv2
+import av
+import hl2ss
+import hl2ss_io
+
+
+# Rate override or replay speed that sends packets as fast as the connection
+# allows
+class Rate:
+    UNTHROTTLED = 0
+
+
+#------------------------------------------------------------------------------
+# Configuration Reader
+#------------------------------------------------------------------------------
+
+class _configuration_reader(hl2ss_io._reader):
+    def open(self, connection):
+        self._file = connection.makefile('rb')
+
+    def get_bytes(self, count):
+        data = self._file.read(count)
+        if (len(data) < count):
+            raise ConnectionError('connection closed')
+        return data
+
+    def get(self, format):
+        return struct.unpack(format, self.get_bytes(struct.calcsize(format)))
+
+
+#------------------------------------------------------------------------------
+# Encoders
+#------------------------------------------------------------------------------
+
+class _encode_video:
+    def __init__(self, profile, width, height, framerate, bitrate, gop_size):
+        self.profile = profile
+        self.width = width
+        self.height = height
+        self.framerate = framerate
+        self.bitrate = bitrate
+        self.gop_size = gop_size
+
+    def create(self):
+        name = hl2ss.get_video_codec_name(self.profile)
+        self._codec = av.CodecContext.create(name, 'w')
+        self._codec.width = self.width
+        self._codec.height = self.height
+        self._codec.pix_fmt = 'yuv420p'
+        self._codec.time_base = fractions.Fraction(1, self.framerate)
+        self._codec.framerate = self.framerate
+        self._codec.bit_rate = self.bitrate
+        self._codec.gop_size = self.gop_size
+        self._codec.max_b_frames = 0
+        self._codec.options = {'preset' : 'ultrafast', 'tune' : 'zerolatency', 'x265-params' : 'repeat-headers=1:log-level=error'} if (name == 'hevc') else {'preset' : 'ultrafast', 'tune' : 'zerolatency'}
+        self._pts = 0
+
+    def encode(self, yuv):
+        frame = av.VideoFrame.from_ndarray(yuv, format='yuv420p')
+        frame.pts = self._pts
+        self._pts += 1
+        return b''.join([bytes(packet) for packet in self._codec.encode(frame)])
+
+
+# AAC LC, 48000 Hz, 2 channels
+def _create_adts_header(size):
+    length = size + 7
+    return bytes([0xFF, 0xF1, 0x4C, 0x80 | (length >> 11), (length >> 3) & 0xFF, ((length & 7) << 5) | 0x1F, 0xFC])
+
+
+class _encode_audio:
+    def __init__(self, profile):
+        self.profile = profile
+
+    def create(self):
+        self._codec = av.CodecContext.create(hl2ss.get_audio_codec_name(self.profile), 'w')
+        self._codec.sample_rate = hl2ss.Parameters_MICROPHONE.SAMPLE_RATE
+        self._codec.layout = 'stereo'
+        self._codec.format = 'fltp'
+        self._codec.bit_rate = hl2ss.get_audio_codec_bitrate(self.profile)
+        self._pts = 0
+
+    def encode(self, samples):
+        frame = av.AudioFrame.from_ndarray(samples, format='fltp', layout='stereo')
+        frame.sample_rate = hl2ss.Parameters_MICROPHONE.SAMPLE_RATE
+        frame.pts = self._pts
+        self._pts += samples.shape[1]
+        return [_create_adts_header(packet.size) + bytes(packet) for packet in self._codec.encode(frame)]
+
+
+#------------------------------------------------------------------------------
+# Synthetic Data
+#------------------------------------------------------------------------------
+
+def _create_gradient(height, width, index):
+    return ((np.arange(width, dtype=np.uint32).reshape((1, -1)) + np.arange(height, dtype=np.uint32).reshape((-1, 1)) + 4 * index) & 0xFF).astype(np.uint8)
+
+
+def _create_yuv420p(y, u, v):
+    h, w = y.shape
+    return np.vstack((y, u.reshape((h // 4, w)), v.reshape((h // 4, w))))
+
+
+def _get_gop_size(options, framerate):
+    return max([1, options.get(hl2ss.H26xEncoderProperty.CODECAPI_AVEncMPVGOPSize, framerate)])
+
+
+def _create_payloads_rm_vlc(rx):
+    metadata = struct.pack('<QQII', 0, 10000, 1, 0)
+    if (rx.profile == hl2ss.VideoProfile.RAW):
+        return [_create_gradient(hl2ss.Parameters_RM_VLC.HEIGHT, hl2ss.Parameters_RM_VLC.WIDTH, 0).tobytes() + metadata]
+    framerate = hl2ss.Parameters_RM_VLC.FPS // rx.divisor
+    encoder = _encode_video(rx.profile, hl2ss.Parameters_RM_VLC.WIDTH, hl2ss.Parameters_RM_VLC.HEIGHT, framerate, rx.bitrate, _get_gop_size(rx.options, framerate))
+    encoder.create()
+    chroma = np.full((hl2ss.Parameters_RM_VLC.HEIGHT // 2, hl2ss.Parameters_RM_VLC.WIDTH // 2), 128, dtype=np.uint8)
+    return [encoder.encode(_create_yuv420p(_create_gradient(hl2ss.Parameters_RM_VLC.HEIGHT, hl2ss.Parameters_RM_VLC.WIDTH, i), chroma, chroma)) + metadata for i in range(0, encoder.gop_size)]
+
+
+def _create_payloads_rm_depth_ahat(rx):
+    sensor_ticks = struct.pack('<Q', 0)
+    depth = (_create_gradient(hl2ss.Parameters_RM_DEPTH_AHAT.HEIGHT, hl2ss.Parameters_RM_DEPTH_AHAT.WIDTH, 0).astype(np.uint16) * 4)
+    ab = np.full(hl2ss.Parameters_RM_DEPTH_AHAT.SHAPE, 64 * 64, dtype=np.uint16)
+    if (rx.profile_z == hl2ss.DepthProfile.ZDEPTH):
+        import pyzdepth
+        codec = pyzdepth.DepthCompressor()
+        _, z = codec.Compress(hl2ss.Parameters_RM_DEPTH_AHAT.WIDTH, hl2ss.Parameters_RM_DEPTH_AHAT.HEIGHT, depth.tobytes(), True)
+        if (rx.profile_ab != hl2ss.VideoProfile.RAW):
+            raise Exception('synthetic zdepth ab requires VideoProfile.RAW')
+        return [struct.pack('<II', len(z), ab.nbytes) + z + ab.tobytes() + sensor_ticks]
+    if (rx.profile_ab == hl2ss.VideoProfile.RAW):
+        return [bytes(hl2ss._Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE) + depth.tobytes() + ab.tobytes() + sensor_ticks]
+    framerate = hl2ss.Parameters_RM_DEPTH_AHAT.FPS // rx.divisor
+    encoder = _encode_video(rx.profile_ab, hl2ss.Parameters_RM_DEPTH_AHAT.WIDTH, hl2ss.Parameters_RM_DEPTH_AHAT.HEIGHT, framerate, rx.bitrate, _get_gop_size(rx.options, framerate))
+    encoder.create()
+    chroma = np.full((hl2ss.Parameters_RM_DEPTH_AHAT.HEIGHT // 2, hl2ss.Parameters_RM_DEPTH_AHAT.WIDTH // 2), 64, dtype=np.uint8)
+    return [bytes(hl2ss._Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE) + encoder.encode(_create_yuv420p(_create_gradient(hl2ss.Parameters_RM_DEPTH_AHAT.HEIGHT, hl2ss.Parameters_RM_DEPTH_AHAT.WIDTH, i), chroma, chroma)) + sensor_ticks for i in range(0, encoder.gop_size)]
+
+
+def _create_payloads_rm_depth_longthrow(rx):
+    depth = _create_gradient(hl2ss.Parameters_RM_DEPTH_LONGTHROW.HEIGHT, hl2ss.Parameters_RM_DEPTH_LONGTHROW.WIDTH, 0).astype(np.uint16) * 16
+    ab = np.full(hl2ss.Parameters_RM_DEPTH_LONGTHROW.SHAPE, 1000, dtype=np.uint16)
+    composite = np.vstack((depth, ab)).view(np.uint8).reshape((hl2ss.Parameters_RM_DEPTH_LONGTHROW.HEIGHT, hl2ss.Parameters_RM_DEPTH_LONGTHROW.WIDTH, 4))
+    return [cv2.imencode('.png', composite)[1].tobytes() + struct.pack('<Q', 0)]
+
+
+def _create_payloads_rm_imu(rx):
+    count = {hl2ss.StreamPort.RM_IMU_ACCELEROMETER : hl2ss.Parameters_RM_IMU_ACCELEROMETER.BATCH_SIZE, hl2ss.StreamPort.RM_IMU_GYROSCOPE : hl2ss.Parameters_RM_IMU_GYROSCOPE.BATCH_SIZE, hl2ss.StreamPort.RM_IMU_MAGNETOMETER : hl2ss.Parameters_RM_IMU_MAGNETOMETER.BATCH_SIZE}[rx.port]
+    return [b''.join([struct.pack('<QQffff', i, i, 0.0, -9.81, 0.0, 35.0) for i in range(0, count)])]
+
+
+def _create_payloads_pv(rx):
+    metadata = struct.pack('<ffffQQQIIIIfffffI', rx.width, rx.width, rx.width / 2, rx.height / 2, 10000, 0, 0, 0, hl2ss.PV_FocusState.FOCUSED, 100, 5000, 1.0, 1.0, 1.0, 1.0, 1.0, 0)
+    if (rx.profile == hl2ss.VideoProfile.RAW):
+        stride = hl2ss.get_video_stride(rx.width)
+        nv12 = np.full(((rx.height * 3) // 2, stride), 128, dtype=np.uint8)
+        nv12[:rx.height, :rx.width] = _create_gradient(rx.height, rx.width, 0)
+        return [nv12.tobytes() + metadata]
+    framerate = rx.framerate // rx.divisor
+    encoder = _encode_video(rx.profile, rx.width, rx.height, framerate, rx.bitrate, _get_gop_size(rx.options, framerate))
+    encoder.create()
+    chroma = np.full((rx.height // 2, rx.width // 2), 128, dtype=np.uint8)
+    return [encoder.encode(_create_yuv420p(_create_gradient(rx.height, rx.width, i), chroma, chroma)) + metadata for i in range(0, encoder.gop_size)]
+
+
+def _create_tone(samples, channels, index):
+    t = (np.arange(samples) + index * samples) / hl2ss.Parameters_MICROPHONE.SAMPLE_RATE
+    return np.tile(0.25 * np.sin(2 * np.pi * 440 * t).astype(np.float32), (channels, 1))
+
+
+def _create_payloads_microphone(rx):
+    if (rx.profile == hl2ss.AudioProfile.RAW):
+        if (rx.level == hl2ss.AACLevel.L5):
+            return [_create_tone(hl2ss.Parameters_MICROPHONE.GROUP_SIZE_RAW, hl2ss.Parameters_MICROPHONE.ARRAY_CHANNELS, 0).transpose().tobytes()]
+        return [(_create_tone(hl2ss.Parameters_MICROPHONE.GROUP_SIZE_RAW, hl2ss.Parameters_MICROPHONE.CHANNELS, 0) * 32767).astype(np.int16).transpose().tobytes()]
+    encoder = _encode_audio(rx.profile)
+    encoder.create()
+    payloads = []
+    for i in range(0, 48):
+        payloads.extend(encoder.encode(_create_tone(hl2ss.Parameters_MICROPHONE.GROUP_SIZE_AAC, hl2ss.Parameters_MICROPHONE.CHANNELS, i)))
+    return payloads
+
+
+def _create_payloads_si(rx):
+    joint = struct.pack('<ffffffffi', 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, -0.5, 0.01, 2)
+    head = struct.pack('<Ifffffffffffffff', 0x0F, 0.0, 0.0, 0.0, 0.0, 0.0, -1.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, -1.0)
+    return [head + joint * (2 * hl2ss.SI_HandJointKind.TOTAL)]
+
+
+def _create_payloads_eet(rx):
+    ray = [0.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+    return [struct.pack('<I21fI', 0, *(ray + ray + ray + [1.0, 1.0, 1.0]), 0x7F)]
+
+
+def _create_payloads_blob(size):
+    return [np.random.default_rng(0).integers(0, 256, size, dtype=np.uint8).tobytes()]
+
+
+#------------------------------------------------------------------------------
+# Calibration Data
+#------------------------------------------------------------------------------
+
+def _create_calibration_grid(shape):
+    y, x = np.mgrid[0:shape[0], 0:shape[1]].astype(np.float32)
+    return x, y
+
+
+def _create_calibration_rm(shape, extra):
+    mapx, mapy = _create_calibration_grid(shape)
+    fx = shape[1] / 2
+    fy = shape[1] / 2
+    cx = shape[1] / 2
+    cy = shape[0] / 2
+    return np.hstack((((mapx - cx) / fx).flatten(), ((mapy - cy) / fy).flatten(), np.eye(4, dtype=np.float32).flatten(), extra, mapx.flatten(), mapy.flatten(), [fx, fy, cx, cy])).astype(np.float32).tobytes()
+
+
+def _create_calibration_rm_vlc():
+    return _create_calibration_rm(hl2ss.Parameters_RM_VLC.SHAPE, [])
+
+
+def _create_calibration_rm_depth_ahat():
+    return _create_calibration_rm(hl2ss.Parameters_RM_DEPTH_AHAT.SHAPE, [250.0, 1055.0])
+
+
+def _create_calibration_rm_depth_longthrow():
+    return _create_calibration_rm(hl2ss.Parameters_RM_DEPTH_LONGTHROW.SHAPE, [1000.0])
+
+
+def _create_calibration_rm_imu():
+    return np.eye(4, dtype=np.float32).tobytes()
+
+
+def _create_calibration_pv(width, height):
+    focal_length = [width, width]
+    principal_point = [width / 2, height / 2]
+    data = focal_length + principal_point + [0.0] * 3 + [0.0] * 2 + np.eye(4).flatten().tolist() + np.eye(4).flatten().tolist() + [0.0] * 4 + [0.0] * 7
+    return np.array(data, dtype=np.float32).tobytes()
+
+
+def _create_device_list(text):
+    data = text.encode('utf-16')
+    return struct.pack('<I', len(data)) + data
+
+
+#------------------------------------------------------------------------------
+# Packet Sources
+#------------------------------------------------------------------------------
+
+def _get_timestamp():
+    return time.perf_counter_ns() // 100
+
+
+class _clock:
+    def __init__(self, speed):
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def attach(self, timestamp):
+        with self._lock:
+            if (self._count <= 0):
+                self._base_timestamp = timestamp
+                self._base_time = time.perf_counter()
+            self._count += 1
+
+    def detach(self):
+        with self._lock:
+            self._count -= 1
+
+    def wait(self, timestamp):
+        if (self.speed == Rate.UNTHROTTLED):
+            return
+        delay = ((timestamp - self._base_timestamp) / (hl2ss.TimeBase.HUNDREDS_OF_NANOSECONDS * self.speed)) - (time.perf_counter() - self._base_time)
+        if (delay > 0):
+            time.sleep(delay)
+
+
+class _source_cycle:
+    def __init__(self, payloads, poses, rate):
+        self._payloads = payloads
+        self._poses = poses
+        self._clock = _clock(1 if (rate != Rate.UNTHROTTLED) else Rate.UNTHROTTLED)
+        self._period = int(hl2ss.TimeBase.HUNDREDS_OF_NANOSECONDS / rate) if (rate != Rate.UNTHROTTLED) else 1
+
+    def open(self):
+        self._index = 0
+        self._timestamp = _get_timestamp()
+        self._clock.attach(self._timestamp)
+
+    def get_next_packet(self):
+        index = self._index % len(self._payloads)
+        pose = None if (self._poses is None) else self._poses[index % len(self._poses)]
+        packet = hl2ss._packet(self._timestamp, self._payloads[index], pose)
+        self._index += 1
+        self._timestamp += self._period
+        self._clock.wait(packet.timestamp)
+        return packet
+
+    def close(self):
+        self._clock.detach()
+
+
+class _source_recording:
+    def __init__(self, filename, mode, clock, base_timestamp, loop):
+        self._filename = filename
+        self._mode = mode
+        self._clock = clock
+        self._base_timestamp = base_timestamp
+        self._loop = loop
+
+    def _open_file(self):
+        self._rd = hl2ss_io.create_rd(self._filename, hl2ss.ChunkSize.SINGLE_TRANSFER, None)
+        self._rd.open()
+
+    def open(self):
+        self._open_file()
+        self._offset = 0
+        self._first = None
+        self._last = None
+        self._clock.attach(self._base_timestamp)
+
+    def get_next_packet(self):
+        data = self._rd.get_next_packet()
+        if ((data is None) and self._loop and (self._first is not None)):
+            self._rd.close()
+            self._open_file()
+            self._offset += (self._last - self._first) + self._period
+            data = self._rd.get_next_packet()
+        if (data is None):
+            return None
+        if (self._first is None):
+            self._first = data.timestamp
+            self._period = 1
+        elif (data.timestamp > self._last):
+            self._period = data.timestamp - self._last
+        self._last = data.timestamp
+        data.timestamp += self._offset
+        if (self._mode != hl2ss.StreamMode.MODE_1):
+            data.pose = None
+        elif (data.pose is None):
+            data.pose = np.eye(4, dtype=np.float32)
+        self._clock.wait(data.timestamp)
+        return data
+
+    def close(self):
+        self._rd.close()
+        self._clock.detach()
+
+
+def _create_poses(count):
+    poses = []
+    for i in range(0, count):
+        pose = np.eye(4, dtype=np.float32)
+        pose[3, 0] = 0.1 * np.sin(2 * np.pi * i / count)
+        poses.append(pose)
+    return poses
+
+
+def _load_recording(filename):
+    rd = hl2ss_io.create_rd(filename, hl2ss.ChunkSize.SINGLE_TRANSFER, None)
+    rd.open()
+    payloads = []
+    poses = []
+    while (True):
+        data = rd.get_next_packet()
+        if (data is None):
+            break
+        payloads.append(bytes(data.payload))
+        poses.append(data.pose)
+    rd.close()
+    return payloads, poses
+
+
+def _get_first_timestamp(filename):
+    rd = hl2ss_io.create_rd(filename, hl2ss.ChunkSize.SINGLE_TRANSFER, None)
+    rd.open()
+    data = rd.get_next_packet()
+    rd.close()
+    return None if (data is None) else data.timestamp
+
+
+#------------------------------------------------------------------------------
+# Stream Rates
+#------------------------------------------------------------------------------
+
+def _get_default_rate(rx):
+    if (rx.port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return hl2ss.Parameters_RM_VLC.FPS / rx.divisor
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return hl2ss.Parameters_RM_DEPTH_AHAT.FPS / rx.divisor
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return hl2ss.Parameters_RM_DEPTH_LONGTHROW.FPS / rx.divisor
+    if (rx.port == hl2ss.StreamPort.RM_IMU_ACCELEROMETER):
+        return 12
+    if (rx.port == hl2ss.StreamPort.RM_IMU_GYROSCOPE):
+        return 24
+    if (rx.port == hl2ss.StreamPort.RM_IMU_MAGNETOMETER):
+        return 5
+    if (rx.port in [hl2ss.StreamPort.PERSONAL_VIDEO, hl2ss.StreamPort.EXTENDED_VIDEO]):
+        return rx.framerate / rx.divisor
+    if (rx.port in [hl2ss.StreamPort.MICROPHONE, hl2ss.StreamPort.EXTENDED_AUDIO]):
+        return hl2ss.Parameters_MICROPHONE.SAMPLE_RATE / (hl2ss.Parameters_MICROPHONE.GROUP_SIZE_RAW if (rx.profile == hl2ss.AudioProfile.RAW) else hl2ss.Parameters_MICROPHONE.GROUP_SIZE_AAC)
+    if (rx.port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return hl2ss.Parameters_SI.SAMPLE_RATE
+    if (rx.port == hl2ss.StreamPort.EXTENDED_EYE_TRACKER):
+        return rx.fps
+
+
+#------------------------------------------------------------------------------
+# Emulator
+#------------------------------------------------------------------------------
+
+class emulator(hl2ss._context_manager):
+    def __init__(self, host, ports=None, rates=None, sizes=None, recordings=None):
+        self.host = host
+        self.ports = list(emulator.__method_table.keys()) if (ports is None) else ports
+        self.rates = dict() if (rates is None) else rates
+        self.sizes = dict() if (sizes is None) else sizes
+        self.recordings = dict() if (recordings is None) else recordings
+
+    def open(self):
+        self._event_stop = threading.Event()
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._pv_status = False
+        self._listeners = []
+        self._threads = []
+        for port in self.ports:
+            listener = socket.create_server((self.host, port))
+            thread = threading.Thread(target=self._accept, args=(listener, port), daemon=True)
+            self._listeners.append(listener)
+            self._threads.append(thread)
+            thread.start()
+
+    def close(self):
+        self._event_stop.set()
+        with self._lock:
+            for connection in self._listeners + list(self._connections):
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        for listener in self._listeners:
+            listener.close()
+        for thread in self._threads:
+            thread.join()
+
+    def _accept(self, listener, port):
+        while (not self._event_stop.is_set()):
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(connection, port), daemon=True).start()
+
+    def _serve(self, connection, port):
+        with self._lock:
+            self._connections.add(connection)
+        rd = _configuration_reader()
+        rd.open(connection)
+        try:
+            emulator.__method_table[port](self, connection, rd, port)
+        except OSError:
+            # Client disconnected or emulator closed, other errors are
+            # reported by the thread
+            pass
+        finally:
+            with self._lock:
+                self._connections.discard(connection)
+            rd.close()
+            connection.close()
+
+    def _create_source(self, rx, create_payloads):
+        port = rx.port
+        rate = self.rates.get(port, _get_default_rate(rx))
+        poses = None
+        if (port in self.recordings):
+            payloads, poses = _load_recording(self.recordings[port])
+        elif (port in self.sizes):
+            payloads = _create_payloads_blob(self.sizes[port])
+        else:
+            payloads = create_payloads(rx)
+        if (rx.mode != hl2ss.StreamMode.MODE_1):
+            poses = None
+        elif ((poses is None) or (poses[0] is None)):
+            poses = _create_poses(max([1, int(rate) if (rate != Rate.UNTHROTTLED) else 30]))
+        return _source_cycle(payloads, poses, rate)
+
+    def _stream(self, connection, source):
+        source.open()
+        try:
+            while (not self._event_stop.is_set()):
+                data = source.get_next_packet()
+                if (data is None):
+                    break
+                connection.sendall(hl2ss.pack_packet(data))
+        finally:
+            source.close()
+
+    # Streams -----------------------------------------------------------------
+
+    def __serve_rm_vlc(self, connection, rd, port):
+        mode = rd.get_configuration_for_mode()[0]
+        if (mode == hl2ss.StreamMode.MODE_2):
+            connection.sendall(_create_calibration_rm_vlc())
+            return
+        rx = hl2ss.rx_rm_vlc(None, port, None, mode, *(rd.get_configuration_for_video_divisor() + rd.get_configuration_for_video_encoding() + rd.get_configuration_for_h26x_encoding()))
+        self._stream(connection, self._create_source(rx, _create_payloads_rm_vlc))
+
+    def __serve_rm_depth_ahat(self, connection, rd, port):
+        mode = rd.get_configuration_for_mode()[0]
+        if (mode == hl2ss.StreamMode.MODE_2):
+            connection.sendall(_create_calibration_rm_depth_ahat())
+            return
+        rx = hl2ss.rx_rm_depth_ahat(None, port, None, mode, *(rd.get_configuration_for_video_divisor() + rd.get_configuration_for_depth_encoding() + rd.get_configuration_for_video_encoding() + rd.get_configuration_for_h26x_encoding()))
+        self._stream(connection, self._create_source(rx, _create_payloads_rm_depth_ahat))
+
+    def __serve_rm_depth_longthrow(self, connection, rd, port):
+        mode = rd.get_configuration_for_mode()[0]
+        if (mode == hl2ss.StreamMode.MODE_2):
+            connection.sendall(_create_calibration_rm_depth_longthrow())
+            return
+        rx = hl2ss.rx_rm_depth_longthrow(None, port, None, mode, *(rd.get_configuration_for_video_divisor() + rd.get_configuration_for_png_encoding()))
+        self._stream(connection, self._create_source(rx, _create_payloads_rm_depth_longthrow))
+
+    def __serve_rm_imu(self, connection, rd, port):
+        mode = rd.get_configuration_for_mode()[0]
+        if (mode == hl2ss.StreamMode.MODE_2):
+            connection.sendall(_create_calibration_rm_imu())
+            return
+        rx = hl2ss.rx_rm_imu(None, port, None, mode)
+        self._stream(connection, self._create_source(rx, _create_payloads_rm_imu))
+
+    def __serve_pv(self, connection, rd, port):
+        mode = rd.get_configuration_for_mode()[0]
+        width, height, framerate = rd.get_configuration_for_video_format()
+        if ((mode & hl2ss._PVCNT.MODE_3) == hl2ss._PVCNT.MODE_3):
+            if (mode & hl2ss._PVCNT.START):
+                rd.get('<BBBBBBBfffII')
+                self._pv_status = True
+            if (mode & hl2ss._PVCNT.STOP):
+                self._pv_status = False
+            return
+        if (mode == hl2ss.StreamMode.MODE_2):
+            connection.sendall(_create_device_list('hl2ss emulator video device') if (port == hl2ss.StreamPort.EXTENDED_VIDEO) else _create_calibration_pv(width, height))
+            return
+        rx = hl2ss.rx_pv(None, port, None, mode, width, height, framerate, *(rd.get_configuration_for_video_divisor() + rd.get_configuration_for_video_encoding() + rd.get_configuration_for_h26x_encoding()))
+        self._stream(connection, self._create_source(rx, _create_payloads_pv))
+
+    def __serve_microphone(self, connection, rd, port):
+        rx = hl2ss.rx_microphone(None, port, None, *rd.get_configuration_for_audio_encoding())
+        rx.mode = hl2ss.StreamMode.MODE_0
+        self._stream(connection, self._create_source(rx, _create_payloads_microphone))
+
+    def __serve_si(self, connection, rd, port):
+        rx = hl2ss.rx_si(None, port, None)
+        rx.mode = hl2ss.StreamMode.MODE_0
+        self._stream(connection, self._create_source(rx, _create_payloads_si))
+
+    def __serve_eet(self, connection, rd, port):
+        rx = hl2ss.rx_eet(None, port, None, rd.get_configuration_for_eet())
+        rx.mode = hl2ss.StreamMode.MODE_1
+        self._stream(connection, self._create_source(rx, _create_payloads_eet))
+
+    def __serve_extended_audio(self, connection, rd, port):
+        mixer_mode, loopback_gain, microphone_gain = rd.get_configuration_for_mrc_audio()
+        profile, level = rd.get_configuration_for_audio_encoding()
+        if (mixer_mode & hl2ss.MixerMode.QUERY):
+            connection.sendall(_create_device_list('hl2ss emulator audio device'))
+            return
+        rx = hl2ss.rx_extended_audio(None, port, None, mixer_mode, loopback_gain, microphone_gain, profile, level)
+        rx.mode = hl2ss.StreamMode.MODE_0
+        self._stream(connection, self._create_source(rx, _create_payloads_microphone))
+
+    # IPC ---------------------------------------------------------------------
+
+    __rc_arguments = {
+        hl2ss.ipc_rc._CMD_GET_APPLICATION_VERSION            : '',
+        hl2ss.ipc_rc._CMD_GET_UTC_OFFSET                     : '<I',
+        hl2ss.ipc_rc._CMD_SET_HS_MARKER_STATE                : '<I',
+        hl2ss.ipc_rc._CMD_GET_PV_SUBSYSTEM_STATUS            : '',
+        hl2ss.ipc_rc._CMD_SET_PV_FOCUS                       : '<IIIII',
+        hl2ss.ipc_rc._CMD_SET_PV_VIDEO_TEMPORAL_DENOISING    : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_WHITE_BALANCE_PRESET        : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_WHITE_BALANCE_VALUE         : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_EXPOSURE                    : '<II',
+        hl2ss.ipc_rc._CMD_SET_PV_EXPOSURE_PRIORITY_VIDEO     : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_ISO_SPEED                   : '<II',
+        hl2ss.ipc_rc._CMD_SET_PV_BACKLIGHT_COMPENSATION      : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_SCENE_MODE                  : '<I',
+        hl2ss.ipc_rc._CMD_SET_FLAT_MODE                      : '<I',
+        hl2ss.ipc_rc._CMD_SET_RM_EYE_SELECTION               : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_DESIRED_OPTIMIZATION        : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_PRIMARY_USE                 : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_OPTICAL_IMAGE_STABILIZATION : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_HDR_VIDEO                   : '<I',
+        hl2ss.ipc_rc._CMD_SET_PV_REGIONS_OF_INTEREST         : '<Iffff',
+        hl2ss.ipc_rc._CMD_SET_INTERFACE_PRIORITY             : '<Ii',
+    }
+
+    def __serve_rc(self, connection, rd, port):
+        while (not self._event_stop.is_set()):
+            command = rd.get('<B')[0]
+            format = emulator.__rc_arguments[command]
+            if (len(format) > 0):
+                rd.get(format)
+            if (command == hl2ss.ipc_rc._CMD_GET_APPLICATION_VERSION):
+                connection.sendall(struct.pack('<HHHH', 0, 0, 0, 0))
+            elif (command == hl2ss.ipc_rc._CMD_GET_UTC_OFFSET):
+                connection.sendall(struct.pack('<Q', 0))
+            elif (command == hl2ss.ipc_rc._CMD_GET_PV_SUBSYSTEM_STATUS):
+                connection.sendall(struct.pack('<B', 1 if (self._pv_status) else 0))
+
+    __sm_volume_size = {
+        hl2ss._SM_VolumeType.Box         : 6 * hl2ss._SIZEOF.FLOAT,
+        hl2ss._SM_VolumeType.Frustum     : 24 * hl2ss._SIZEOF.FLOAT,
+        hl2ss._SM_VolumeType.OrientedBox : 10 * hl2ss._SIZEOF.FLOAT,
+        hl2ss._SM_VolumeType.Sphere      : 4 * hl2ss._SIZEOF.FLOAT,
+    }
+
+    def __serve_sm(self, connection, rd, port):
+        while (not self._event_stop.is_set()):
+            command = rd.get('<B')[0]
+            if (command == hl2ss.ipc_sm._CMD_SET_VOLUMES):
+                for _ in range(0, rd.get('<B')[0]):
+                    rd.get_bytes(emulator.__sm_volume_size[rd.get('<I')[0]])
+            elif (command == hl2ss.ipc_sm._CMD_GET_OBSERVED_SURFACES):
+                connection.sendall(struct.pack('<Q', 0))
+            elif (command == hl2ss.ipc_sm._CMD_GET_MESHES):
+                count, _ = rd.get('<II')
+                rd.get_bytes(count * struct.calcsize('<16sdIIII'))
+                for index in range(0, count):
+                    connection.sendall(struct.pack('<IIIII', index, 1, 0, 0, 0) + bytes(100 - 20))
+
+    def __serve_su(self, connection, rd, port):
+        while (not self._event_stop.is_set()):
+            task = rd.get('<BBBBIfBBBBBBBBI')
+            rd.get_bytes(16 * task[-1])
+            connection.sendall(struct.pack('<I', 0) + np.eye(4, dtype=np.float32).tobytes() + np.eye(4, dtype=np.float32).tobytes() + struct.pack('<I', 0))
+
+    def __serve_vi(self, connection, rd, port):
+        while (not self._event_stop.is_set()):
+            command = rd.get('<B')[0]
+            if (command == hl2ss.ipc_vi._CMD_REGISTER_COMMANDS):
+                _, count = rd.get('<BB')
+                for _ in range(0, count):
+                    rd.get_bytes(rd.get('<H')[0])
+                connection.sendall(struct.pack('<B', 1))
+            elif (command == hl2ss.ipc_vi._CMD_POP):
+                connection.sendall(struct.pack('<I', 0))
+
+    def __serve_umq(self, connection, rd, port):
+        while (not self._event_stop.is_set()):
+            _, size = rd.get('<II')
+            rd.get_bytes(size)
+            connection.sendall(struct.pack('<I', 0))
+
+    def __serve_gmq(self, connection, rd, port):
+        while (not self._event_stop.is_set()):
+            if (rd.get('<I')[0] == hl2ss.ipc_gmq._CMD_NONE):
+                connection.sendall(struct.pack('<II', hl2ss.ipc_gmq._CMD_NONE, 0))
+
+    __method_table = {
+        hl2ss.StreamPort.RM_VLC_LEFTFRONT     : __serve_rm_vlc,
+        hl2ss.StreamPort.RM_VLC_LEFTLEFT      : __serve_rm_vlc,
+        hl2ss.StreamPort.RM_VLC_RIGHTFRONT    : __serve_rm_vlc,
+        hl2ss.StreamPort.RM_VLC_RIGHTRIGHT    : __serve_rm_vlc,
+        hl2ss.StreamPort.RM_DEPTH_AHAT        : __serve_rm_depth_ahat,
+        hl2ss.StreamPort.RM_DEPTH_LONGTHROW   : __serve_rm_depth_longthrow,
+        hl2ss.StreamPort.RM_IMU_ACCELEROMETER : __serve_rm_imu,
+        hl2ss.StreamPort.RM_IMU_GYROSCOPE     : __serve_rm_imu,
+        hl2ss.StreamPort.RM_IMU_MAGNETOMETER  : __serve_rm_imu,
+        hl2ss.IPCPort.REMOTE_CONFIGURATION    : __serve_rc,
+        hl2ss.StreamPort.PERSONAL_VIDEO       : __serve_pv,
+        hl2ss.StreamPort.MICROPHONE           : __serve_microphone,
+        hl2ss.StreamPort.SPATIAL_INPUT        : __serve_si,
+        hl2ss.IPCPort.SPATIAL_MAPPING         : __serve_sm,
+        hl2ss.IPCPort.SCENE_UNDERSTANDING     : __serve_su,
+        hl2ss.IPCPort.VOICE_INPUT             : __serve_vi,
+        hl2ss.IPCPort.UNITY_MESSAGE_QUEUE     : __serve_umq,
+        hl2ss.StreamPort.EXTENDED_EYE_TRACKER : __serve_eet,
+        hl2ss.StreamPort.EXTENDED_AUDIO       : __serve_extended_audio,
+        hl2ss.StreamPort.EXTENDED_VIDEO       : __serve_pv,
+        hl2ss.IPCPort.GUEST_MESSAGE_QUEUE     : __serve_gmq,
+    }
+
+
+#------------------------------------------------------------------------------
+# Replay
+#------------------------------------------------------------------------------
+
+class replay(emulator):
+    def __init__(self, host, filenames, speed=1, loop=False):
+        super().__init__(host, list(filenames.keys()) + [hl2ss.IPCPort.REMOTE_CONFIGURATION, hl2ss.IPCPort.SPATIAL_MAPPING, hl2ss.IPCPort.SCENE_UNDERSTANDING, hl2ss.IPCPort.VOICE_INPUT, hl2ss.IPCPort.UNITY_MESSAGE_QUEUE, hl2ss.IPCPort.GUEST_MESSAGE_QUEUE])
+        self.filenames = filenames
+        self.speed = speed
+        self.loop = loop
+
+    def open(self):
+        timestamps = [timestamp for timestamp in [_get_first_timestamp(filename) for filename in self.filenames.values()] if (timestamp is not None)]
+        self._base_timestamp = min(timestamps) if (len(timestamps) > 0) else 0
+        self._clock = _clock(self.speed)
+        super().open()
+
+    def _create_source(self, rx, create_payloads):
+        return _source_recording(self.filenames[rx.port], rx.mode, self._clock, self._base_timestamp, self.loop)
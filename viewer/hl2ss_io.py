@@ -5,6 +5,7 @@ import hl2ss
 
 
 _MAGIC = 'HL2SSV23'
+_MAGIC_GAPS = 'HL2SSG23'
 
 
 #------------------------------------------------------------------------------
@@ -442,9 +443,10 @@ class _reader:
                 return self._unpacker.get()
             if (self._eof):
                 return None
-            chunk = self._file.read(self._chunk)
-            self._eof = len(chunk) < self._chunk
-            self._unpacker.extend(chunk)
+            buffer, _ = self._unpacker.get_buffer(self._chunk)
+            count = self._file.readinto(buffer)
+            self._eof = count <= 0
+            self._unpacker.update(count)
 
     def close(self):
         self._file.close()
@@ -499,31 +501,48 @@ class _rd(hl2ss._context_manager):
         self.mixer_mode, self.loopback_gain, self.microphone_gain, self.profile, self.level = self._rd.get_configuration_for_extended_audio()
         self._rd.begin(hl2ss.StreamMode.MODE_0)
 
+    def __is_keyframe_rm_vlc(self, payload):
+        return hl2ss.is_keyframe_rm_vlc(self.profile, payload)
+
+    def __is_keyframe_rm_depth_ahat(self, payload):
+        return hl2ss.is_keyframe_rm_depth_ahat(self.profile_z, self.profile_ab, payload)
+
+    def __is_keyframe_pv(self, payload):
+        return hl2ss.is_keyframe_pv(self.profile, payload)
+
+    def __is_keyframe_any(self, payload):
+        return True
+
     __method_table = {
-        hl2ss.StreamPort.RM_VLC_LEFTFRONT     : (__load_rm_vlc,),
-        hl2ss.StreamPort.RM_VLC_LEFTLEFT      : (__load_rm_vlc,),
-        hl2ss.StreamPort.RM_VLC_RIGHTFRONT    : (__load_rm_vlc,),
-        hl2ss.StreamPort.RM_VLC_RIGHTRIGHT    : (__load_rm_vlc,),
-        hl2ss.StreamPort.RM_DEPTH_AHAT        : (__load_rm_depth_ahat,),
-        hl2ss.StreamPort.RM_DEPTH_LONGTHROW   : (__load_rm_depth_longthrow,),
-        hl2ss.StreamPort.RM_IMU_ACCELEROMETER : (__load_rm_imu,),
-        hl2ss.StreamPort.RM_IMU_GYROSCOPE     : (__load_rm_imu,),
-        hl2ss.StreamPort.RM_IMU_MAGNETOMETER  : (__load_rm_imu,),
-        hl2ss.StreamPort.PERSONAL_VIDEO       : (__load_pv,),
-        hl2ss.StreamPort.MICROPHONE           : (__load_microphone,),
-        hl2ss.StreamPort.SPATIAL_INPUT        : (__load_si,),
-        hl2ss.StreamPort.EXTENDED_EYE_TRACKER : (__load_eet,),
-        hl2ss.StreamPort.EXTENDED_AUDIO       : (__load_extended_audio,),
-        hl2ss.StreamPort.EXTENDED_VIDEO       : (__load_pv,),
+        hl2ss.StreamPort.RM_VLC_LEFTFRONT     : (__load_rm_vlc,             __is_keyframe_rm_vlc),
+        hl2ss.StreamPort.RM_VLC_LEFTLEFT      : (__load_rm_vlc,             __is_keyframe_rm_vlc),
+        hl2ss.StreamPort.RM_VLC_RIGHTFRONT    : (__load_rm_vlc,             __is_keyframe_rm_vlc),
+        hl2ss.StreamPort.RM_VLC_RIGHTRIGHT    : (__load_rm_vlc,             __is_keyframe_rm_vlc),
+        hl2ss.StreamPort.RM_DEPTH_AHAT        : (__load_rm_depth_ahat,      __is_keyframe_rm_depth_ahat),
+        hl2ss.StreamPort.RM_DEPTH_LONGTHROW   : (__load_rm_depth_longthrow, __is_keyframe_any),
+        hl2ss.StreamPort.RM_IMU_ACCELEROMETER : (__load_rm_imu,             __is_keyframe_any),
+        hl2ss.StreamPort.RM_IMU_GYROSCOPE     : (__load_rm_imu,             __is_keyframe_any),
+        hl2ss.StreamPort.RM_IMU_MAGNETOMETER  : (__load_rm_imu,             __is_keyframe_any),
+        hl2ss.StreamPort.PERSONAL_VIDEO       : (__load_pv,                 __is_keyframe_pv),
+        hl2ss.StreamPort.MICROPHONE           : (__load_microphone,         __is_keyframe_any),
+        hl2ss.StreamPort.SPATIAL_INPUT        : (__load_si,                 __is_keyframe_any),
+        hl2ss.StreamPort.EXTENDED_EYE_TRACKER : (__load_eet,                __is_keyframe_any),
+        hl2ss.StreamPort.EXTENDED_AUDIO       : (__load_extended_audio,     __is_keyframe_any),
+        hl2ss.StreamPort.EXTENDED_VIDEO       : (__load_pv,                 __is_keyframe_pv),
     }
 
     def __build(self):
         f = _rd.__method_table[self.port]
-        self.__load = types.MethodType(f[0], self)
+        self.__load        = types.MethodType(f[0], self)
+        self.__is_keyframe = types.MethodType(f[1], self)
         
-    def __init__(self, filename, chunk):
+    # With keyframes_only, packets of video streams that are not keyframes are
+    # skipped without being unpacked (one packet per GOP, for thumbnails and
+    # scrubbing), other streams return all packets
+    def __init__(self, filename, chunk, keyframes_only=False):
         self.filename = filename
         self.chunk = chunk
+        self.keyframes_only = keyframes_only
 
     def open(self):
         self._rd, self.magic, self.port, self.user = _create_rd(self.filename, self.chunk)
@@ -531,7 +550,11 @@ class _rd(hl2ss._context_manager):
         self.__load()
         
     def get_next_packet(self):
-        return self._rd.get_next_packet()
+        data = self._rd.get_next_packet()
+        if (self.keyframes_only):
+            while ((data is not None) and (not self.__is_keyframe(data.payload))):
+                data = self._rd.get_next_packet()
+        return data
 
     def close(self):
         self._rd.close()
@@ -543,10 +566,10 @@ class _rd(hl2ss._context_manager):
 
 class _rd_decoded(_rd):
     def __set_codec_rm_vlc(self):
-        self._codec = hl2ss.decode_rm_vlc(self.profile)
+        self._codec = hl2ss.decode_rm_vlc(self.profile, keyframes_only=self.keyframes_only)
 
     def __set_codec_rm_depth_ahat(self):
-        self._codec = hl2ss.decode_rm_depth_ahat(self.profile_z, self.profile_ab)
+        self._codec = hl2ss.decode_rm_depth_ahat(self.profile_z, self.profile_ab, keyframes_only=self.keyframes_only)
 
     def __set_codec_rm_depth_longthrow(self):
         pass
@@ -555,7 +578,7 @@ class _rd_decoded(_rd):
         pass
 
     def __set_codec_pv(self):
-        self._codec = hl2ss.decode_pv(self.profile)
+        self._codec = hl2ss.decode_pv(self.profile, keyframes_only=self.keyframes_only)
 
     def __set_codec_microphone(self):
         self._codec = hl2ss.decode_microphone(self.profile, self.level)
@@ -571,11 +594,11 @@ class _rd_decoded(_rd):
 
     def __create_codec_rm_vlc(self):
         self._codec.create()
-        self.get_next_packet()
+        self.__prime()
 
     def __create_codec_rm_depth_ahat(self):
         self._codec.create()
-        self.get_next_packet()
+        self.__prime()
 
     def __create_codec_rm_depth_longthrow(self):
         pass
@@ -585,7 +608,12 @@ class _rd_decoded(_rd):
 
     def __create_codec_pv(self):
         self._codec.create(self.width, self.height)
-        self.get_next_packet()
+        self.__prime()
+
+    # Keyframe-only decoders bypass the parser and have no delay
+    def __prime(self):
+        if (not self.keyframes_only):
+            self.get_next_packet()
 
     def __create_codec_microphone(self):
         self._codec.create()
@@ -648,8 +676,8 @@ class _rd_decoded(_rd):
         self.__create_codec = types.MethodType(f[1], self)
         self.__decode       = types.MethodType(f[2], self)
 
-    def __init__(self, filename, chunk, format):
-        super().__init__(filename, chunk)
+    def __init__(self, filename, chunk, format, keyframes_only=False):
+        super().__init__(filename, chunk, keyframes_only)
         self.format = format
 
     def open(self):
@@ -672,8 +700,8 @@ class _rd_decoded(_rd):
 # Create Reader
 #------------------------------------------------------------------------------
 
-def create_rd(filename, chunk, decoded):
-    return _rd_decoded(filename, chunk, decoded) if (decoded) else _rd(filename, chunk)
+def create_rd(filename, chunk, decoded, keyframes_only=False):
+    return _rd_decoded(filename, chunk, decoded, keyframes_only) if (decoded) else _rd(filename, chunk, keyframes_only)
 
 
 #------------------------------------------------------------------------------
@@ -681,13 +709,14 @@ def create_rd(filename, chunk, decoded):
 #------------------------------------------------------------------------------
 
 class sequencer:
-    def __init__(self, filename, chunk, decoded):
+    def __init__(self, filename, chunk, decoded, keyframes_only=False):
         self.filename = filename
         self.chunk = chunk
         self.decoded = decoded
+        self.keyframes_only = keyframes_only
 
     def open(self):
-        self._rd = create_rd(self.filename, self.chunk, self.decoded)
+        self._rd = create_rd(self.filename, self.chunk, self.decoded, self.keyframes_only)
         self._rd.open()
         self._l = self._rd.get_next_packet()
         self._r = self._rd.get_next_packet()
@@ -707,3 +736,42 @@ class sequencer:
     def close(self):
         self._rd.close()
 
+
+
+#------------------------------------------------------------------------------
+# Gap Store
+#------------------------------------------------------------------------------
+
+class wr_gaps(hl2ss._context_manager):
+    def __init__(self, filename, port):
+        self.filename = filename
+        self.port = port
+
+    def open(self):
+        self._wr = _writer()
+        self._wr.open(self.filename)
+        self._wr.put(struct.pack(f'<{len(_MAGIC_GAPS)}sH', _MAGIC_GAPS.encode(), self.port))
+
+    def write(self, gap):
+        self._wr.put(struct.pack('<QQQ', gap.start, gap.end, gap.lost))
+
+    def close(self):
+        self._wr.close()
+
+
+class rd_gaps(hl2ss._context_manager):
+    def __init__(self, filename):
+        self.filename = filename
+
+    def open(self):
+        self._file = open(self.filename, 'rb')
+        magic, self.port = struct.unpack(f'<{len(_MAGIC_GAPS)}sH', self._file.read(len(_MAGIC_GAPS) + 2))
+        if (magic.decode() != _MAGIC_GAPS):
+            raise Exception('invalid gap file')
+
+    def get_next_gap(self):
+        data = self._file.read(24)
+        return hl2ss._gap(*struct.unpack('<QQQ', data)) if (len(data) == 24) else None
+
+    def close(self):
+        self._file.close()
@@ -1,5 +1,10 @@
 
+import pickle
+import time
 import multiprocessing as mp
+import multiprocessing.shared_memory
+import numpy as np
+import hl2ss
 
 
 class TimePreference:
@@ -12,141 +17,299 @@ class TimePreference:
 # Buffer
 #------------------------------------------------------------------------------
 
-class _RingBuffer:
-    """Implements a ring-buffer with the different processing after it becomes full.
-    Idea: https://www.oreilly.com/library/view/python-cookbook/0596001673/ch05s19.html
-    """
+# Buffer of the timestamps of the last size_max frames
+# Each timestamp is stored twice so that the buffered timestamps are always a
+# contiguous view in chronological order
 
+class _RingBuffer:
     def __init__(self, size_max = 64):
         self.max = size_max
-        self.data = []
-
-    class __Full:
-        def append(self, x):
-            self.data[self.cur] = x
-            self.cur = (self.cur+1) % self.max
-
-        def get(self):
-            return self.data[self.cur:]+self.data[:self.cur]
-
-        def last(self):
-            return self.get()[-1]
+        self._data = np.zeros(2 * size_max, np.int64)
+        self._cur = 0
+        self._count = 0
 
-        def length(self):
-            return self.max
-
-    def append(self, x):
-        self.data.append(x)
-        if (len(self.data) == self.max):
-            self.cur = 0
-            self.__class__ = self.__Full
+    def append(self, timestamp):
+        self._data[self._cur] = timestamp
+        self._data[self._cur + self.max] = timestamp
+        self._cur = (self._cur + 1) % self.max
+        if (self._count < self.max):
+            self._count += 1
 
     def get(self):
-        return self.data
+        start = (self._cur - self._count) % self.max
+        return self._data[start:(start + self._count)]
 
     def last(self):
-        if (len(self.data) == 0):
+        if (self._count == 0):
             return None
-        return self.get()[-1]
+        return int(self._data[(self._cur - 1) % self.max])
 
     def length(self):
-        return len(self.data)
-
-
-def _get_packet_interval(data, timestamp, l, r):
-    while ((r - l) > 1):
-        i = (r + l) // 2
-        t = data[i].timestamp
-        if (t < timestamp):
-            l = i
-        elif (t > timestamp):
-            r = i
-        else:
-            return (i, i)
-        
-    return (l, r)
+        return self._count
 
 
-def _get_nearest_packet(data, timestamp, time_preference, tiebreak_right):
-    n = len(data)
+def _get_nearest_packet(timestamps, timestamp, time_preference, tiebreak_right):
+    n = len(timestamps)
 
     if (n <= 0):
         return None
 
-    si = _get_packet_interval(data, timestamp, 0, n - 1)
+    r = int(np.searchsorted(timestamps, timestamp))
 
-    if (si[0] == si[1]):
-        return si[0]
+    if (r >= n):
+        return n - 1
     
-    t0 = data[si[0]].timestamp
-    t1 = data[si[1]].timestamp
+    t1 = int(timestamps[r])
 
-    if (timestamp <= t0):
-        return si[0]
-    if (timestamp >= t1):
-        return si[1]
+    if ((t1 == timestamp) or (r <= 0)):
+        return r
+    
+    l = r - 1
+    t0 = int(timestamps[l])
     
     if (time_preference == TimePreference.PREFER_PAST):
-        return si[0]
+        return l
     if (time_preference == TimePreference.PREFER_FUTURE):
-        return si[1]
+        return r
     
     d0 = timestamp - t0
     d1 = t1 - timestamp
 
     if (d0 < d1):
-        return si[0]
+        return l
     if (d0 > d1):
-        return si[1]
+        return r
     
-    return si[1 if (tiebreak_right) else 0] 
+    return r if (tiebreak_right) else l
+
+
+# Vectorized _get_nearest_packet for an array of timestamps
+def _get_nearest_packets(timestamps, timestamp, time_preference, tiebreak_right):
+    n = len(timestamps)
+    timestamp = np.asarray(timestamp, np.int64)
+
+    if (n <= 0):
+        return None
+
+    r = np.searchsorted(timestamps, timestamp)
+    l = np.maximum(r - 1, 0)
+    c = np.minimum(r, n - 1)
+    t0 = timestamps[l]
+    t1 = timestamps[c]
+
+    if (time_preference == TimePreference.PREFER_PAST):
+        index = l
+    elif (time_preference == TimePreference.PREFER_FUTURE):
+        index = c
+    else:
+        d0 = timestamp - t0
+        d1 = t1 - timestamp
+        index = np.where(d0 < d1, l, np.where(d0 > d1, c, c if (tiebreak_right) else l))
+
+    return np.where((t1 == timestamp) | (r <= 0), c, np.where(r >= n, n - 1, index))
 
 
 #------------------------------------------------------------------------------
-# Source
+# Ring
 #------------------------------------------------------------------------------
 
-class _net_source:
-    def __init__(self, source_dout):
-        self.source_dout = source_dout
+# Packets are serialized into a shared memory ring of fixed size slots instead
+# of being pickled through queues. Arrays (decoded images, pose, etc.) are
+# stored out of band and copied out of the ring when read, or, if copy is
+# False, returned as numpy views of the ring. Each slot header holds the frame
+# stamp of the packet in the slot, which is set to -1 while the slot is being
+# written, and is checked by sinks before and after reading. Views are only
+# valid until the slot is overwritten, that is, for 2 * buffer_size frames,
+# after which their contents change without notice.
+# Packets that do not fit in a slot are written to a shared memory segment of
+# their own, whose name is stored in the slot, and are always copied by sinks.
+# The segment is removed when the slot is overwritten.
+
+_RING_SLOT_HEADER = 4
+_RING_SLOT_MARGIN = 1024 * 1024
+_RING_ALIGNMENT = 64
+
+
+class _net_ring:
+    def __init__(self, name, slots, slot_size):
+        self.name = name
+        self.slots = slots
+        self.slot_size = slot_size
+
+
+def _ring_align(offset):
+    return (offset + _RING_ALIGNMENT - 1) & ~(_RING_ALIGNMENT - 1)
+
+
+def _get_slot_size(receiver):
+    port = receiver.port
+    if (port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        size = hl2ss.Parameters_RM_VLC.PIXELS
+    elif (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        size = 2 * hl2ss.Parameters_RM_DEPTH_AHAT.PIXELS * hl2ss._SIZEOF.WORD
+    elif (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        size = 2 * hl2ss.Parameters_RM_DEPTH_LONGTHROW.PIXELS * hl2ss._SIZEOF.WORD
+    elif (port in [hl2ss.StreamPort.PERSONAL_VIDEO, hl2ss.StreamPort.EXTENDED_VIDEO]):
+        size = receiver.width * receiver.height * 4
+    else:
+        size = 0
+    return _ring_align(_RING_SLOT_MARGIN + size)
+
+
+class _ring:
+    def __init__(self, ring_wires):
+        self._name = ring_wires.name
+        self._slots = ring_wires.slots
+        self._slot_size = ring_wires.slot_size
+        self._data = _ring_align(self._slots * _RING_SLOT_HEADER * hl2ss._SIZEOF.LONGLONG)
+
+    def open(self):
+        self._shm = mp.shared_memory.SharedMemory(name=self._name)
+        self._buf = self._shm.buf
+        self._header = np.ndarray((self._slots, _RING_SLOT_HEADER), np.int64, buffer=self._buf)
+        self._overflow = dict()
+
+    def _store(self, buf, base, table, meta, raws):
+        buf[base:(base + table.nbytes)] = table.tobytes()
+        buf[(base + table.nbytes):(base + table.nbytes + len(meta))] = meta
+        for (start, size), raw in zip(table.tolist(), raws):
+            buf[(base + start):(base + start + size)] = raw
+
+    def _load(self, buf, base, meta_size, count, copy):
+        table = np.frombuffer(buf, np.int64, 2 * count, base).reshape((count, 2)).tolist()
+        meta = bytes(buf[(base + 16 * count):(base + 16 * count + meta_size)])
+        buffers = [buf[(base + start):(base + start + size)] for start, size in table]
+        return pickle.loads(meta, buffers=[bytearray(buffer) for buffer in buffers] if (copy) else buffers)
+
+    def _release_overflow(self, index):
+        shm = self._overflow.pop(index, None)
+        if (shm is not None):
+            shm.close()
+            shm.unlink()
+
+    def write(self, frame_stamp, data):
+        buffers = []
+        meta = pickle.dumps(data, protocol=5, buffer_callback=buffers.append)
+        raws = [buffer.raw() for buffer in buffers]
+        table = np.zeros((len(raws), 2), np.int64)
+        offset = _ring_align(table.nbytes + len(meta))
+        for i, raw in enumerate(raws):
+            table[i, 0] = offset
+            table[i, 1] = raw.nbytes
+            offset = _ring_align(offset + raw.nbytes)
+        index = frame_stamp % self._slots
+        base = self._data + index * self._slot_size
+        header = self._header[index]
+        header[0] = -1
+        self._release_overflow(index)
+        if (offset <= self._slot_size):
+            self._store(self._buf, base, table, meta, raws)
+            header[2] = len(meta)
+            header[3] = len(raws)
+        else:
+            shm = mp.shared_memory.SharedMemory(create=True, size=offset)
+            self._store(shm.buf, 0, table, meta, raws)
+            self._overflow[index] = shm
+            name = shm.name.encode()
+            self._buf[base:(base + 8)] = np.int64(len(name)).tobytes()
+            self._buf[(base + 8):(base + 8 + len(name))] = name
+            header[2] = len(meta)
+            header[3] = -len(raws) - 1
+        header[1] = data.timestamp
+        header[0] = frame_stamp
+
+    def _read_overflow(self, frame_stamp, header, base, meta_size, count):
+        name_size = int(np.frombuffer(self._buf, np.int64, 1, base)[0])
+        name = bytes(self._buf[(base + 8):(base + 8 + name_size)]).decode(errors='replace')
+        if (header[0] != frame_stamp):
+            return None
+        try:
+            shm = mp.shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return None
+        # The segment is owned by the source, which removes it
+        try:
+            return self._load(shm.buf, 0, meta_size, count, True)
+        finally:
+            shm.close()
+
+    def read(self, frame_stamp, copy=True):
+        index = frame_stamp % self._slots
+        base = self._data + index * self._slot_size
+        header = self._header[index]
+        if (header[0] != frame_stamp):
+            return None
+        meta_size = int(header[2])
+        count = int(header[3])
+        data = self._load(self._buf, base, meta_size, count, copy) if (count >= 0) else self._read_overflow(frame_stamp, header, base, meta_size, -count - 1)
+        if (header[0] != frame_stamp):
+            return None
+        return data
+
+    def close(self):
+        for index in list(self._overflow.keys()):
+            self._release_overflow(index)
+        self._header = None
+        self._buf = None
+        self._shm.close()
+
+
+def _create_interface_ring(receiver, buffer_size, slot_size):
+    slots = 2 * buffer_size
+    slot_size = _get_slot_size(receiver) if (slot_size is None) else _ring_align(slot_size)
+    size = _ring_align(slots * _RING_SLOT_HEADER * hl2ss._SIZEOF.LONGLONG) + slots * slot_size
+    shm = mp.shared_memory.SharedMemory(create=True, size=size)
+    header = np.ndarray((slots, _RING_SLOT_HEADER), np.int64, buffer=shm.buf)
+    header[:, 0] = -1
+    del header
+    return (shm, _net_ring(shm.name, slots, slot_size))
 
 
+#------------------------------------------------------------------------------
+# Source
+#------------------------------------------------------------------------------
+
 class _source(mp.Process):
-    def __init__(self, receiver, event_stop, source_wires, interconnect_wires):
+    def __init__(self, receiver, event_stop, interconnect_wires, ring_wires):
         super().__init__()
         self._source = receiver
         self._event_stop = event_stop
-        self._source_dout = source_wires.source_dout
-        self._interconnect_semaphore = interconnect_wires.interconnect_semaphore
+        self._interconnect_din = interconnect_wires.interconnect_din
+        self._ring = _ring(ring_wires)
 
     def stop(self):
         self._event_stop.set()
 
     def run(self):
+        self._ring.open()
         self._source.open()
+        frame_stamp = 0
         while (not self._event_stop.is_set()):
-            self._source_dout.put(self._source.get_next_packet())
-            self._interconnect_semaphore.release()
+            data = self._source.get_next_packet()
+            self._ring.write(frame_stamp, data)
+            self._interconnect_din.put((_interconnect.IPC_SOURCE_DATA, data.timestamp))
+            frame_stamp += 1
         self._source.close()
+        self._ring.close()
 
 
-def _create_interface_source():
-    return _net_source(mp.Queue())
-
-
-def _create_source(receiver, source_wires, interconnect_wires):
-    return _source(receiver, mp.Event(), source_wires, interconnect_wires)
+def _create_source(receiver, interconnect_wires, ring_wires):
+    return _source(receiver, mp.Event(), interconnect_wires, ring_wires)
 
 
 #------------------------------------------------------------------------------
 # Interconnect
 #------------------------------------------------------------------------------
 
+# Source, control and sink messages are tuples sent through a single queue
+# that the interconnect blocks on, so each message is handled as it arrives
+# regardless of the number of sinks. Sink messages start with the sink key
+# and responses go through the pipe of the sink. Messages from sinks that
+# have detached, which can still be queued, are dropped.
+
 class _net_interconnect:
-    def __init__(self, interconnect_din, interconnect_dout, interconnect_semaphore):
+    def __init__(self, interconnect_din):
         self.interconnect_din = interconnect_din
-        self.interconnect_dout = interconnect_dout
-        self.interconnect_semaphore = interconnect_semaphore
 
 
 class _interconnect(mp.Process):
@@ -157,111 +320,89 @@ class _interconnect(mp.Process):
     IPC_SINK_GET_FRAME_STAMP = -3
     IPC_SINK_GET_MOST_RECENT_FRAME = -4
     IPC_SINK_GET_BUFFERED_FRAME = -5
+    IPC_SINK_GET_NEAREST_MANY = -6
+    IPC_SINK_GET_RANGE = -7
+    IPC_SINK_GET_FRAMES = -8
+    IPC_SOURCE_DATA = 1
+    IPC_CONTROL_STOP = 2
     
-    def __init__(self, buffer_size, event_stop, source_wires, interconnect_wires):
+    def __init__(self, buffer_size, interconnect_wires):
         super().__init__()
         self._buffer_size = buffer_size
-        self._event_stop = event_stop
-        self._source_dout = source_wires.source_dout
         self._interconnect_din = interconnect_wires.interconnect_din
-        self._interconnect_dout = interconnect_wires.interconnect_dout
-        self._interconnect_semaphore = interconnect_wires.interconnect_semaphore
 
     def stop(self):
-        self._event_stop.set()
-        self._interconnect_semaphore.release()
+        self._interconnect_din.put((_interconnect.IPC_CONTROL_STOP,))
 
     def attach_sink(self, sink_wires):
-        self._interconnect_din.put(_interconnect.IPC_CONTROL_ATTACH)
-        self._interconnect_din.put(sink_wires.sink_din)
-        self._interconnect_din.put(sink_wires.sink_dout)
-        self._interconnect_din.put(sink_wires.sink_semaphore)
-        self._interconnect_semaphore.release()
+        self._interconnect_din.put((_interconnect.IPC_CONTROL_ATTACH, sink_wires.interconnect_dout, sink_wires.sink_semaphore))
         
-    def _attach(self):
+    def _attach(self, sink_dout, sink_semaphore):
         self._key += 1
-        sink_din = self._interconnect_din.get()
-        sink_dout = self._interconnect_din.get()
-        sink_semaphore = self._interconnect_din.get()
-        self._sink[self._key] = (sink_din, sink_dout, sink_semaphore)
-        sink_din.put(self._key)
-        sink_din.put(self._frame_stamp)
+        self._sink[self._key] = (sink_dout, sink_semaphore)
+        sink_dout.send((self._key, self._frame_stamp))
         
-    def _detach(self, sink_din, sink_dout):
-        key = sink_dout.get()
-        self._remove.append(key)
+    def _detach(self, key):
+        self._sink.pop(key)
 
-    def _get_nearest(self, sink_din, sink_dout):
-        timestamp = sink_dout.get()
-        options = sink_dout.get()
+    def _get_nearest(self, key, timestamp, time_preference, tiebreak_right):
         buffer = self._buffer.get()
-        index = _get_nearest_packet(buffer, timestamp, options & 3, (options & 4) != 0)
-        response = (None, None) if (index is None) else (self._frame_stamp - self._buffer.length() + 1 + index, buffer[index])
-        sink_din.put(response[0])
-        sink_din.put(response[1])
+        index = _get_nearest_packet(buffer, timestamp, time_preference, tiebreak_right)
+        self._sink[key][0].send(None if (index is None) else (self._frame_stamp - self._buffer.length() + 1 + index))
 
-    def _get_frame_stamp(self, sink_din, sink_dout):
-        sink_din.put(self._frame_stamp)
+    def _get_frame_stamp(self, key):
+        self._sink[key][0].send(self._frame_stamp)
 
-    def _get_most_recent_frame(self, sink_din, sink_dout):
-        sink_din.put(self._frame_stamp)
-        sink_din.put(self._buffer.last())
+    def _get_most_recent_frame(self, key):
+        self._sink[key][0].send(self._frame_stamp)
 
-    def _get_buffered_frame(self, sink_din, sink_dout):
-        frame_stamp = sink_dout.get()
+    def _get_buffered_frame(self, key, frame_stamp):
         if (frame_stamp < 0):
             frame_stamp = self._frame_stamp + frame_stamp + 1
         n = self._buffer.length()
         index = n - 1 - self._frame_stamp + frame_stamp
-        response = (-1, None) if (index < 0) else (1, None) if (index >= n) else (0, self._buffer.get()[index])
-        sink_din.put(response[0])
-        sink_din.put(self._frame_stamp - n + 1 + index)
-        sink_din.put(response[1])        
+        self._sink[key][0].send((-1 if (index < 0) else 1 if (index >= n) else 0, self._frame_stamp - n + 1 + index))
 
-    def _process_source(self):
-        try:
-            data = self._source_dout.get_nowait()
-        except:
-            return
+    def _get_nearest_many(self, key, timestamps, time_preference, tiebreak_right):
+        index = _get_nearest_packets(self._buffer.get(), timestamps, time_preference, tiebreak_right)
+        self._sink[key][0].send(None if (index is None) else (self._frame_stamp - self._buffer.length() + 1 + index).tolist())
+
+    def _get_range(self, key, t0, t1):
+        buffer = self._buffer.get()
+        begin = int(np.searchsorted(buffer, t0, 'left'))
+        end = int(np.searchsorted(buffer, t1, 'right'))
+        first = self._frame_stamp - self._buffer.length() + 1
+        self._sink[key][0].send((first + begin, first + max(begin, end)))
+
+    def _get_frames(self, key, stamp_from, stamp_to):
+        if (stamp_from < 0):
+            stamp_from = self._frame_stamp + stamp_from + 1
+        if (stamp_to < 0):
+            stamp_to = self._frame_stamp + stamp_to + 1
+        first = self._frame_stamp - self._buffer.length() + 1
+        begin = max(stamp_from, first)
+        end = min(stamp_to, self._frame_stamp) + 1
+        self._sink[key][0].send((begin, max(begin, end)))
+
+    def _process_source(self, timestamp):
         self._frame_stamp += 1
-        self._buffer.append(data)
-        for _, _, ipc in self._sink.values():
+        self._buffer.append(timestamp)
+        for _, ipc in self._sink.values():
             if (ipc is not None):
                 ipc.release()
-        self._interconnect_semaphore.acquire()
 
-    def _process_control(self):
-        try:
-            message = self._interconnect_din.get_nowait()
-        except:
-            return
-        if (message == _interconnect.IPC_CONTROL_ATTACH):
-            self._attach()
-        self._interconnect_semaphore.acquire()
-
-    def _process_sink_message(self, sink_din, sink_dout):
-        try:
-            message = sink_dout.get_nowait()
-        except:
-            return
-        if (message == _interconnect.IPC_SINK_DETACH):
-            self._detach(sink_din, sink_dout)
-        elif (message == _interconnect.IPC_SINK_GET_NEAREST):
-            self._get_nearest(sink_din, sink_dout)
-        elif (message == _interconnect.IPC_SINK_GET_FRAME_STAMP):
-            self._get_frame_stamp(sink_din, sink_dout)         
-        elif (message == _interconnect.IPC_SINK_GET_MOST_RECENT_FRAME):
-            self._get_most_recent_frame(sink_din, sink_dout)        
-        elif (message == _interconnect.IPC_SINK_GET_BUFFERED_FRAME):
-            self._get_buffered_frame(sink_din, sink_dout)
-        self._interconnect_semaphore.acquire()
-
-    def _process_sink(self):
-        self._remove = []
-        for sink_din, sink_dout, _ in self._sink.values():
-            self._process_sink_message(sink_din, sink_dout)
-        for key in self._remove:
-            self._sink.pop(key)
+    __method_table = {
+        IPC_CONTROL_ATTACH             : _attach,
+        IPC_SINK_DETACH                : _detach,
+        IPC_SINK_GET_NEAREST           : _get_nearest,
+        IPC_SINK_GET_FRAME_STAMP       : _get_frame_stamp,
+        IPC_SINK_GET_MOST_RECENT_FRAME : _get_most_recent_frame,
+        IPC_SINK_GET_BUFFERED_FRAME    : _get_buffered_frame,
+        IPC_SINK_GET_NEAREST_MANY      : _get_nearest_many,
+        IPC_SINK_GET_RANGE             : _get_range,
+        IPC_SINK_GET_FRAMES            : _get_frames,
+        IPC_SOURCE_DATA                : _process_source,
+    }
 
     def run(self):
         self._buffer = _RingBuffer(self._buffer_size)
@@ -269,20 +410,21 @@ class _interconnect(mp.Process):
         self._sink = dict()
         self._key = 0
 
-        while (not self._event_stop.is_set()):
-            self._interconnect_semaphore.acquire()
-            self._interconnect_semaphore.release()
-            self._process_source()
-            self._process_control()
-            self._process_sink()
+        while (True):
+            message = self._interconnect_din.get()
+            if (message[0] == _interconnect.IPC_CONTROL_STOP):
+                break
+            if ((message[0] < 0) and (message[1] not in self._sink)):
+                continue
+            _interconnect.__method_table[message[0]](self, *message[1:])
 
 
 def _create_interface_interconnect():
-    return _net_interconnect(mp.Queue(), mp.Queue(), mp.Semaphore(_interconnect.IPC_SEMAPHORE_VALUE))
+    return _net_interconnect(mp.Queue())
 
 
-def _create_interconnect(buffer_size, source_wires, interconnect_wires):
-    return _interconnect(buffer_size, mp.Event(), source_wires, interconnect_wires)
+def _create_interconnect(buffer_size, interconnect_wires):
+    return _interconnect(buffer_size, interconnect_wires)
 
 
 #------------------------------------------------------------------------------
@@ -290,18 +432,36 @@ def _create_interconnect(buffer_size, source_wires, interconnect_wires):
 #------------------------------------------------------------------------------
 
 class _net_sink:
-    def __init__(self, sink_din, sink_dout, sink_semaphore):
+    def __init__(self, sink_din, interconnect_dout, sink_semaphore):
         self.sink_din = sink_din
-        self.sink_dout = sink_dout
+        self.interconnect_dout = interconnect_dout
         self.sink_semaphore = sink_semaphore
 
 
+# Frames are returned as copies unless copy is False, in which case their
+# arrays are views of the ring that are overwritten by the source after
+# 2 * buffer_size more frames (copy the arrays to keep them longer)
+# Frames that are no longer buffered, including frames overwritten by the
+# source after the interconnect answered, are returned as None
 class _sink:
-    def __init__(self, sink_wires, interconnect_wires):
+    def __init__(self, sink_wires, interconnect_wires, ring_wires, copy=True):
         self._sink_din = sink_wires.sink_din
-        self._sink_dout = sink_wires.sink_dout
         self._sink_semaphore = sink_wires.sink_semaphore
-        self._interconnect_semaphore = interconnect_wires.interconnect_semaphore
+        self._interconnect_din = interconnect_wires.interconnect_din
+        self._ring_wires = ring_wires
+        self._ring = None
+        self.copy = copy
+
+    # Attached on first read so sinks can be passed to other processes
+    def _read(self, frame_stamp):
+        if (self._ring is None):
+            self._ring = _ring(self._ring_wires)
+            self._ring.open()
+        return self._ring.read(frame_stamp, self.copy)
+
+    def _request(self, message):
+        self._interconnect_din.put(message)
+        return self._sink_din.recv()
 
     def acquire(self):
         self._sink_semaphore.acquire()
@@ -310,53 +470,78 @@ class _sink:
         self._sink_semaphore.release()
 
     def get_attach_response(self):
-        self._key = self._sink_din.get()
-        frame_stamp = self._sink_din.get()
+        self._key, frame_stamp = self._sink_din.recv()
         return frame_stamp
         
+    # Frames returned with copy False must be released before detaching
     def detach(self):
-        self._sink_dout.put(_interconnect.IPC_SINK_DETACH)
-        self._sink_dout.put(self._key)
-        self._interconnect_semaphore.release()
+        self._interconnect_din.put((_interconnect.IPC_SINK_DETACH, self._key))
+        if (self._ring is not None):
+            self._ring.close()
+            self._ring = None
+
+    # Split so that requests to several sinks can be in flight at once
+    def _get_nearest_send(self, timestamp, time_preference, tiebreak_right):
+        self._interconnect_din.put((_interconnect.IPC_SINK_GET_NEAREST, self._key, timestamp, time_preference, tiebreak_right))
+
+    def _get_nearest_receive(self):
+        frame_stamp = self._sink_din.recv()
+        data = None if (frame_stamp is None) else self._read(frame_stamp)
+        return (frame_stamp, data)
 
+    # Returns (None, None) if no frames are buffered and (frame_stamp, None) if
+    # the frame was overwritten after the interconnect answered
     def get_nearest(self, timestamp, time_preference=TimePreference.PREFER_NEAREST, tiebreak_right=False):
-        self._sink_dout.put(_interconnect.IPC_SINK_GET_NEAREST)
-        self._sink_dout.put(timestamp)
-        self._sink_dout.put(time_preference + (4 if (tiebreak_right) else 0))
-        self._interconnect_semaphore.release()
-        frame_stamp = self._sink_din.get()
-        data = self._sink_din.get()
-        return (frame_stamp, data)
+        self._get_nearest_send(timestamp, time_preference, tiebreak_right)
+        return self._get_nearest_receive()
 
     def get_frame_stamp(self):
-        self._sink_dout.put(_interconnect.IPC_SINK_GET_FRAME_STAMP)
-        self._interconnect_semaphore.release()
-        frame_stamp = self._sink_din.get()
-        return frame_stamp
+        return self._request((_interconnect.IPC_SINK_GET_FRAME_STAMP, self._key))
 
     def get_most_recent_frame(self):
-        self._sink_dout.put(_interconnect.IPC_SINK_GET_MOST_RECENT_FRAME)
-        self._interconnect_semaphore.release()
-        frame_stamp = self._sink_din.get()
-        data = self._sink_din.get()
+        frame_stamp = self._request((_interconnect.IPC_SINK_GET_MOST_RECENT_FRAME, self._key))
+        data = None if (frame_stamp < 0) else self._read(frame_stamp)
         return (frame_stamp, data)
 
     def get_buffered_frame(self, frame_stamp):
-        self._sink_dout.put(_interconnect.IPC_SINK_GET_BUFFERED_FRAME)
-        self._sink_dout.put(frame_stamp)
-        self._interconnect_semaphore.release()
-        state = self._sink_din.get()
-        frame_stamp = self._sink_din.get()
-        data = self._sink_din.get()        
+        state, frame_stamp = self._request((_interconnect.IPC_SINK_GET_BUFFERED_FRAME, self._key, frame_stamp))
+        data = self._read(frame_stamp) if (state == 0) else None
+        if ((state == 0) and (data is None)):
+            # Overwritten by the source after the interconnect answered
+            state = -1
         return (state, frame_stamp, data)
 
+    # Batch queries are answered in a single request
+    # Frames overwritten by the source after the interconnect answered are None
+
+    def get_nearest_many(self, timestamps, time_preference=TimePreference.PREFER_NEAREST, tiebreak_right=False):
+        frame_stamps = self._request((_interconnect.IPC_SINK_GET_NEAREST_MANY, self._key, timestamps, time_preference, tiebreak_right))
+        if (frame_stamps is None):
+            return ([None] * len(timestamps), [None] * len(timestamps))
+        return (frame_stamps, [self._read(frame_stamp) for frame_stamp in frame_stamps])
+
+    # Buffered frames with t0 <= timestamp <= t1
+    def get_range(self, t0, t1):
+        begin, end = self._request((_interconnect.IPC_SINK_GET_RANGE, self._key, t0, t1))
+        frame_stamps = list(range(begin, end))
+        return (frame_stamps, [self._read(frame_stamp) for frame_stamp in frame_stamps])
+
+    # Buffered frames with stamp_from <= frame_stamp <= stamp_to
+    # Negative frame stamps are relative to the most recent frame as in
+    # get_buffered_frame
+    def get_frames(self, stamp_from, stamp_to):
+        begin, end = self._request((_interconnect.IPC_SINK_GET_FRAMES, self._key, stamp_from, stamp_to))
+        frame_stamps = list(range(begin, end))
+        return (frame_stamps, [self._read(frame_stamp) for frame_stamp in frame_stamps])
 
-def _create_interface_sink(sink_din, sink_dout, sink_semaphore):
-    return _net_sink(sink_din, sink_dout, sink_semaphore)
 
+def _create_interface_sink(sink_semaphore):
+    sink_din, interconnect_dout = mp.Pipe(False)
+    return _net_sink(sink_din, interconnect_dout, sink_semaphore)
 
-def _create_sink(sink_wires, interconnect_wires):
-    return _sink(sink_wires, interconnect_wires)
+
+def _create_sink(sink_wires, interconnect_wires, ring_wires, copy):
+    return _sink(sink_wires, interconnect_wires, ring_wires, copy)
 
 
 #------------------------------------------------------------------------------
@@ -364,11 +549,11 @@ def _create_sink(sink_wires, interconnect_wires):
 #------------------------------------------------------------------------------
 
 class _module:
-    def __init__(self, receiver, buffer_size):
-        self._source_wires = _create_interface_source()
+    def __init__(self, receiver, buffer_size, slot_size):
         self._interconnect_wires = _create_interface_interconnect()
-        self._source = _create_source(receiver, self._source_wires, self._interconnect_wires)
-        self._interconnect = _create_interconnect(buffer_size, self._source_wires, self._interconnect_wires)
+        self._shm, self._ring_wires = _create_interface_ring(receiver, buffer_size, slot_size)
+        self._source = _create_source(receiver, self._interconnect_wires, self._ring_wires)
+        self._interconnect = _create_interconnect(buffer_size, self._interconnect_wires)
 
     def start(self):
         self._interconnect.start()
@@ -379,6 +564,8 @@ class _module:
         self._source.join()
         self._interconnect.stop()
         self._interconnect.join()
+        self._shm.close()
+        self._shm.unlink()
 
     def attach_sink(self, sink_wires):
         return self._interconnect.attach_sink(sink_wires)
@@ -386,6 +573,9 @@ class _module:
     def get_interface(self):
         return self._interconnect_wires
 
+    def get_ring(self):
+        return self._ring_wires
+
 
 #------------------------------------------------------------------------------
 # Producer
@@ -399,8 +589,9 @@ class producer:
     def configure(self, port, receiver):
         self._rx[port] = receiver
 
-    def initialize(self, port, buffer_size):
-        self._producer[port] = _module(self._rx[port], buffer_size)
+    # Slot size in bytes is estimated from the receiver if not given
+    def initialize(self, port, buffer_size, slot_size=None):
+        self._producer[port] = _module(self._rx[port], buffer_size, slot_size)
 
     def start(self, port):        
         self._producer[port].start()
@@ -414,6 +605,9 @@ class producer:
     def _get_interface(self, port):
         return self._producer[port].get_interface()
 
+    def _get_ring(self, port):
+        return self._producer[port].get_ring()
+
     def _attach_sink(self, port, sink_wires):
         self._producer[port].attach_sink(sink_wires)
 
@@ -428,10 +622,10 @@ class consumer:
         self._sink_wires = dict()
         self._sink = dict()        
 
-    def create_sink(self, producer, port, manager, semaphore):
+    def create_sink(self, producer, port, manager, semaphore, copy=True):
         sink_semaphore = None if (semaphore is None) else manager.Semaphore(_interconnect.IPC_SEMAPHORE_VALUE) if (semaphore is ...) else self._sink_semaphore[semaphore]
-        sink_wires = _create_interface_sink(manager.Queue(), manager.Queue(), sink_semaphore)
-        sink = _create_sink(sink_wires, producer._get_interface(port))
+        sink_wires = _create_interface_sink(sink_semaphore)
+        sink = _create_sink(sink_wires, producer._get_interface(port), producer._get_ring(port), copy)
 
         producer._attach_sink(port, sink_wires)
 
@@ -441,3 +635,96 @@ class consumer:
 
         return sink
 
+
+#------------------------------------------------------------------------------
+# Synchronizer
+#------------------------------------------------------------------------------
+
+# Aligns the frames of follower streams to the frames of a reference stream
+# using the sinks created by consumer. followers maps each follower port to
+# (tolerance, time_preference), where tolerance is the maximum time difference
+# to the reference frame in hundreds of nanoseconds (None for no limit).
+# Frame sets are (frame_stamps, frames) tuples ordered as ports.
+class synchronizer:
+    WAIT_PERIOD = 0.001
+
+    def __init__(self, consumer, reference, followers):
+        self.ports = [reference] + list(followers.keys())
+        self._reference = consumer._sink[reference]
+        self._followers = [(consumer._sink[port], tolerance, time_preference) for port, (tolerance, time_preference) in followers.items()]
+        self.reset_statistics()
+
+    # Waits for a reference frame (reference sink semaphore)
+    def acquire(self):
+        self._reference.acquire()
+
+    def release(self):
+        self._reference.release()
+
+    def _is_within(self, index, timestamp, data):
+        tolerance = self._followers[index][1]
+        return (data is not None) and ((tolerance is None) or (abs(data.timestamp - timestamp) <= tolerance))
+
+    # Follower frames that are not within tolerance can still arrive if the
+    # follower has no frame after the reference frame yet
+    def _can_wait(self, index, timestamp, data):
+        return (data is None) or ((self._followers[index][2] != TimePreference.PREFER_PAST) and (data.timestamp < timestamp))
+
+    # Frame set for the reference frame with the given frame stamp (negative
+    # values are relative to the most recent frame as in get_buffered_frame)
+    # Returns None if the reference frame is not buffered or a follower has no
+    # frame within tolerance. If timeout is not None, waits up to timeout
+    # seconds for follower frames that have not been received yet.
+    def get_frame_set(self, frame_stamp=-1, timeout=None):
+        state, frame_stamp, data = self._reference.get_buffered_frame(frame_stamp)
+        if (state != 0):
+            return None
+
+        timestamp = data.timestamp
+        deadline = None if (timeout is None) else (time.perf_counter() + timeout)
+        frame_stamps = [frame_stamp] + [None] * len(self._followers)
+        frames = [data] + [None] * len(self._followers)
+        pending = list(range(0, len(self._followers)))
+
+        while (True):
+            for index in pending:
+                sink, _, time_preference = self._followers[index]
+                sink._get_nearest_send(timestamp, time_preference, False)
+            waiting = []
+            for index in pending:
+                frame_stamps[index + 1], frames[index + 1] = self._followers[index][0]._get_nearest_receive()
+                if (not self._is_within(index, timestamp, frames[index + 1])):
+                    waiting.append(index)
+            if (len(waiting) <= 0):
+                break
+            if ((deadline is None) or (time.perf_counter() >= deadline) or (not all([self._can_wait(index, timestamp, frames[index + 1]) for index in waiting]))):
+                self._incomplete += 1
+                return None
+            time.sleep(synchronizer.WAIT_PERIOD)
+            pending = waiting
+
+        skew = np.array([frame.timestamp - timestamp for frame in frames[1:]], np.float64)
+        self._sets += 1
+        self._sum += skew
+        self._sum_squares += skew * skew
+        self._min = np.minimum(self._min, skew)
+        self._max = np.maximum(self._max, skew)
+
+        return (tuple(frame_stamps), tuple(frames))
+
+    def reset_statistics(self):
+        self._sets = 0
+        self._incomplete = 0
+        self._sum = np.zeros(len(self._followers))
+        self._sum_squares = np.zeros(len(self._followers))
+        self._min = np.full(len(self._followers), np.inf)
+        self._max = np.full(len(self._followers), -np.inf)
+
+    # Skew (follower timestamp - reference timestamp) of the returned frame
+    # sets per follower port, in hundreds of nanoseconds
+    def get_statistics(self):
+        n = max(self._sets, 1)
+        mean = self._sum / n
+        std = np.sqrt(np.maximum(self._sum_squares / n - mean * mean, 0))
+        skew = {port : {'mean' : float(mean[i]), 'std' : float(std[i]), 'min' : float(self._min[i]), 'max' : float(self._max[i])} for i, port in enumerate(self.ports[1:])}
+        return {'sets' : self._sets, 'incomplete' : self._incomplete, 'skew' : skew}
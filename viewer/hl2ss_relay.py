@@ -0,0 +1,211 @@
+
+import queue
+import socket
+import struct
+import threading
+import hl2ss
+
+
+#------------------------------------------------------------------------------
+# Policies
+#------------------------------------------------------------------------------
+
+# Action taken when a subscriber backlog is full
+class DropPolicy:
+    # Drop packets until the next keyframe (next packet for non-video streams)
+    SKIP = 0
+    # Close the subscriber connection
+    DISCONNECT = 1
+
+
+#------------------------------------------------------------------------------
+# Keyframes
+#------------------------------------------------------------------------------
+
+def _get_video_bitstream(rx, payload):
+    if (rx.port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return rx.profile, payload[:-24]
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        if (rx.profile_z == hl2ss.DepthProfile.SAME):
+            return rx.profile_ab, payload[hl2ss._Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE:-8]
+        size_z, size_ab = struct.unpack_from('<II', payload, 0)
+        start_ab = hl2ss._Mode0Layout_RM_DEPTH_AHAT_STRUCT.BASE + size_z
+        return rx.profile_ab, payload[start_ab:(start_ab + size_ab)]
+    if (rx.port in [hl2ss.StreamPort.PERSONAL_VIDEO, hl2ss.StreamPort.EXTENDED_VIDEO]):
+        return rx.profile, payload[:-80]
+    return hl2ss.VideoProfile.RAW, payload
+
+
+def _is_keyframe(rx, payload):
+    profile, data = _get_video_bitstream(rx, payload)
+    return hl2ss.is_video_keyframe(profile, data)
+
+
+#------------------------------------------------------------------------------
+# Subscriber
+#------------------------------------------------------------------------------
+
+class _subscriber:
+    def __init__(self, connection, address, backlog):
+        self.connection = connection
+        self.address = address
+        self.synced = False
+        self.drops = 0
+        self._queue = queue.Queue(backlog)
+        self._event_closed = threading.Event()
+
+    def open(self):
+        self._thread_send = threading.Thread(target=self._send, daemon=True)
+        self._thread_drain = threading.Thread(target=self._drain, daemon=True)
+        self._thread_send.start()
+        self._thread_drain.start()
+
+    def put(self, data):
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.drops += 1
+            return False
+        return True
+
+    def is_closed(self):
+        return self._event_closed.is_set()
+
+    def _send(self):
+        while (not self._event_closed.is_set()):
+            data = self._queue.get()
+            if (data is None):
+                break
+            try:
+                self.connection.sendall(data)
+            except OSError:
+                break
+        self._event_closed.set()
+
+    def _drain(self):
+        # Configuration and control bytes sent by clients are ignored
+        while (not self._event_closed.is_set()):
+            try:
+                data = self.connection.recv(4096)
+            except OSError:
+                break
+            if (len(data) <= 0):
+                break
+        self._event_closed.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def close(self):
+        self._event_closed.set()
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._thread_send.join()
+        self._thread_drain.join()
+        self.connection.close()
+
+
+#------------------------------------------------------------------------------
+# Relay
+#------------------------------------------------------------------------------
+
+class relay(hl2ss._context_manager):
+    def __init__(self, rx, host, port, backlog, policy):
+        self.rx = rx
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.policy = policy
+
+    def open(self):
+        self._event_stop = threading.Event()
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._drops = 0
+        self._listener = socket.create_server((self.host, self.port))
+        self.rx.open()
+        self._thread_accept = threading.Thread(target=self._accept, daemon=True)
+        self._thread_relay = threading.Thread(target=self._relay, daemon=True)
+        self._thread_accept.start()
+        self._thread_relay.start()
+
+    def get_subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def get_drop_count(self):
+        with self._lock:
+            return self._drops + sum([subscriber.drops for subscriber in self._subscribers])
+
+    def is_open(self):
+        return not self._event_stop.is_set()
+
+    def _accept(self):
+        while (not self._event_stop.is_set()):
+            try:
+                connection, address = self._listener.accept()
+            except OSError:
+                break
+            subscriber = _subscriber(connection, address, self.backlog)
+            subscriber.open()
+            with self._lock:
+                self._subscribers.append(subscriber)
+
+    def _remove(self, subscribers):
+        with self._lock:
+            for subscriber in subscribers:
+                self._subscribers.remove(subscriber)
+                self._drops += subscriber.drops
+        for subscriber in subscribers:
+            subscriber.close()
+
+    # Errors other than connection errors propagate after the relay is marked
+    # as closed
+    def _relay(self):
+        try:
+            while (not self._event_stop.is_set()):
+                try:
+                    data = self.rx.get_next_packet()
+                except OSError:
+                    break
+                buffer = bytes(hl2ss.pack_packet(data))
+                keyframe = None
+                with self._lock:
+                    subscribers = list(self._subscribers)
+                closed = []
+                for subscriber in subscribers:
+                    if (subscriber.is_closed()):
+                        closed.append(subscriber)
+                        continue
+                    if (not subscriber.synced):
+                        if (keyframe is None):
+                            keyframe = _is_keyframe(self.rx, data.payload)
+                        if (not keyframe):
+                            continue
+                        subscriber.synced = True
+                    if (not subscriber.put(buffer)):
+                        if (self.policy == DropPolicy.DISCONNECT):
+                            closed.append(subscriber)
+                        else:
+                            subscriber.synced = False
+                if (len(closed) > 0):
+                    self._remove(closed)
+        finally:
+            self._event_stop.set()
+
+    def close(self):
+        self._event_stop.set()
+        try:
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+        self._thread_accept.join()
+        self.rx.close()
+        self._thread_relay.join()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        self._remove(subscribers)
@@ -1,6 +1,9 @@
 
 import multiprocessing as mp
+import collections
+import concurrent.futures
 import io
+import os
 import fractions
 import tarfile
 import csv
@@ -20,10 +23,13 @@ import hl2ss_3dcv
 #------------------------------------------------------------------------------
 
 class wr_process_rx(mp.Process):
-    def __init__(self, filename, rx, user):
+    def __init__(self, filename, rx, user, filename_gaps=None):
         super().__init__()
+        if ((filename_gaps is not None) and (not hasattr(rx, 'get_gaps'))):
+            raise Exception('filename_gaps requires a receiver that reports gaps (e.g., hl2ss.rx_resilient)')
         self._event_stop = mp.Event()
         self._wr = hl2ss_io.create_wr_from_rx(filename, rx, user)
+        self._wr_gaps = hl2ss_io.wr_gaps(filename_gaps, rx.port) if (filename_gaps is not None) else None
         self._rx = rx
 
     def stop(self):
@@ -41,12 +47,19 @@ class wr_process_rx(mp.Process):
     def run(self):
         self.on_open()
         self._wr.open()
+        if (self._wr_gaps is not None):
+            self._wr_gaps.open()
         self._rx.open()
         while (not self._event_stop.is_set()):
             data = self._rx.get_next_packet()
             self._wr.write(data)
+            if (self._wr_gaps is not None):
+                for gap in self._rx.get_gaps():
+                    self._wr_gaps.write(gap)
             self.on_receive(data)
         self._rx.close()
+        if (self._wr_gaps is not None):
+            self._wr_gaps.close()
         self._wr.close()
         self.on_close()
 
@@ -158,12 +171,14 @@ class _SI_Hand:
         self.accuracies = accuracies
 
 
+# poses is the structured array of joint poses (one record per joint, indexed
+# by hl2ss.SI_HandJointKind), the other arrays are copies of its fields
 def si_unpack_hand(hand):
-    poses = [hand.get_joint_pose(joint) for joint in range(0, hl2ss.SI_HandJointKind.TOTAL)]
-    orientations = np.array([pose.orientation for pose in poses])
-    positions = np.array([pose.position for pose in poses])
-    radii = np.array([pose.radius for pose in poses])
-    accuracies = np.array([pose.accuracy for pose in poses])
+    poses = hand.get_joint_poses()
+    orientations = poses['orientation'].copy()
+    positions = poses['position'].copy()
+    radii = poses['radius'].reshape((-1, 1)).copy()
+    accuracies = poses['accuracy'].reshape((-1, 1)).copy()
     return _SI_Hand(poses, orientations, positions, radii, accuracies)
 
 
@@ -174,6 +189,58 @@ def si_head_pose_rotation_matrix(up, forward):
     return np.hstack((x, y, z)).reshape((3, 3)).transpose()
 
 
+#------------------------------------------------------------------------------
+# Metadata
+#------------------------------------------------------------------------------
+
+# Collects the timestamps, poses and metadata of EET or PV packets from a
+# stream or recording and returns them as contiguous arrays, one per field
+# (see hl2ss.EET_DTYPE and hl2ss.PV_METADATA_DTYPE), plus PV intrinsics
+# Payloads can be raw or unpacked (unpack_eet, unpack_pv, decoded receivers)
+class metadata_accumulator:
+    def __init__(self, port):
+        if (port == hl2ss.StreamPort.EXTENDED_EYE_TRACKER):
+            self._dtype = hl2ss.EET_DTYPE
+            self._get = lambda payload: payload.get_samples().tobytes() if (isinstance(payload, hl2ss.unpack_eet)) else bytes(payload)
+        elif (port in [hl2ss.StreamPort.PERSONAL_VIDEO, hl2ss.StreamPort.EXTENDED_VIDEO]):
+            self._dtype = hl2ss.PV_METADATA_DTYPE
+            self._get = lambda payload: payload.metadata.tobytes() if (isinstance(payload, hl2ss._PV_Frame)) else bytes(payload[-hl2ss.PV_METADATA_DTYPE.itemsize:])
+        else:
+            raise Exception(f'metadata accumulator does not support port {port}')
+        self.port = port
+        self.clear()
+
+    def clear(self):
+        self._timestamps = []
+        self._poses = []
+        self._metadata = []
+
+    def push(self, data):
+        self._timestamps.append(data.timestamp)
+        self._poses.append(data.pose)
+        self._metadata.append(self._get(data.payload))
+
+    def get_count(self):
+        return len(self._timestamps)
+
+    # Poses are included if any packet has one, missing poses are zero
+    def get_columns(self):
+        metadata = np.frombuffer(b''.join(self._metadata), dtype=self._dtype)
+        columns = {'timestamp' : np.array(self._timestamps, dtype=np.uint64)}
+        if (any(pose is not None for pose in self._poses)):
+            columns['pose'] = np.array([np.zeros((4, 4), dtype=np.float32) if (pose is None) else pose for pose in self._poses], dtype=np.float32)
+        for name in self._dtype.names:
+            columns[name] = np.ascontiguousarray(metadata[name])
+        if (self._dtype == hl2ss.PV_METADATA_DTYPE):
+            intrinsics = np.tile(hl2ss.create_pv_intrinsics_placeholder(), (len(metadata), 1, 1))
+            intrinsics[:, 0, 0] = -columns['focal_length'][:, 0]
+            intrinsics[:, 1, 1] =  columns['focal_length'][:, 1]
+            intrinsics[:, 2, 0] =  columns['principal_point'][:, 0]
+            intrinsics[:, 2, 1] =  columns['principal_point'][:, 1]
+            columns['intrinsics'] = intrinsics
+        return columns
+
+
 def si_ray_to_vector(origin, direction):
     return np.vstack((origin, direction)).reshape((-1, 6))
 
@@ -349,15 +416,11 @@ def _create_csv_row_for_pose(pose):
     return pose.astype(str).flatten().tolist()
 
 
-def _create_csv_row_for_rm_imu_frame(frame):
-    return [str(frame.vinyl_hup_ticks), str(frame.soc_ticks), str(frame.x), str(frame.y), str(frame.z), str(frame.temperature)]
-
-
 def _create_csv_row_for_rm_imu_payload(payload):
-    frames = []
-    for i in range(0, payload.get_count()):
-        frames.extend(_create_csv_row_for_rm_imu_frame(payload.get_frame(i)))
-    return frames
+    samples = payload.get_samples()
+    # Python floats give the same text as struct.unpack
+    columns = [samples['vinyl_hup_ticks'].tolist(), samples['soc_ticks'].tolist(), *samples['xyz'].T.astype(np.float64).tolist(), samples['temperature'].astype(np.float64).tolist()]
+    return [str(value) for sample in zip(*columns) for value in sample]
 
 
 def _create_csv_row_for_pv_payload(payload):
@@ -372,15 +435,10 @@ def _create_csv_row_for_si_eye_ray(valid, ray):
     return valid.astype(str).tolist() + ray.origin.astype(str).tolist() + ray.direction.astype(str).tolist()
 
 
-def _create_csv_row_for_si_hand_joint(pose):
-    return pose.position.astype(str).tolist() + pose.orientation.astype(str).tolist() + pose.radius.astype(str).tolist() + pose.accuracy.astype(str).tolist()
-
-
 def _create_csv_row_for_si_hand(valid, hand):
-    row = valid.astype(str).tolist()
-    for joint_index in range(0, hl2ss.SI_HandJointKind.TOTAL):
-        row.extend(_create_csv_row_for_si_hand_joint(hand.get_joint_pose(joint_index)))
-    return row
+    joints = hand.get_joint_poses()
+    columns = np.column_stack((joints['position'].astype(str), joints['orientation'].astype(str), joints['radius'].astype(str), joints['accuracy'].astype(str)))
+    return valid.astype(str).tolist() + columns.flatten().tolist()
 
 
 def _create_csv_row_for_si_payload(payload):
@@ -621,27 +679,73 @@ def unpack_to_mp4(input_filenames, output_filename):
     [reader.close() for reader in readers]
 
 
-def unpack_to_png(input_filename, output_filename):
-    rd = hl2ss_io.create_rd(input_filename, hl2ss.ChunkSize.SINGLE_TRANSFER, True)
+def _encode_png_rm_depth(frame, images):
+    names = [name for name, part in [('depth', hl2ss.LongThrowImages.DEPTH), ('ab', hl2ss.LongThrowImages.AB)] if (images in [hl2ss.LongThrowImages.BOTH, part])]
+    return [(name, cv2.imencode('.png', getattr(frame, name))[1].tobytes()) for name in names]
+
+
+def _decode_encode_png_rm_depth_longthrow(payload, images):
+    return _encode_png_rm_depth(hl2ss.decode_rm_depth_longthrow(payload, images), images)
+
+
+def _add_png(tar, images, idx):
+    for name, image in images:
+        info = tarfile.TarInfo(f'{name}_{idx}.png')
+        info.size = len(image)
+        tar.addfile(info, io.BytesIO(image))
+
+
+# PNG encoding (and Long Throw decoding) runs in a pool of workers threads
+# images selects the images to write (hl2ss.LongThrowImages)
+def unpack_to_png(input_filename, output_filename, workers=None, images=hl2ss.LongThrowImages.BOTH):
+    rd = hl2ss_io.create_rd(input_filename, hl2ss.ChunkSize.SINGLE_TRANSFER, None)
     rd.open()
 
+    workers = os.cpu_count() if (workers is None) else workers
+    executor = concurrent.futures.ThreadPoolExecutor(workers)
+    pending = collections.deque()
+
+    if (rd.port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        submit = lambda payloads: [executor.submit(_decode_encode_png_rm_depth_longthrow, payload, images) for payload in payloads]
+        flush = lambda: []
+    else:
+        # Decoded in order on this thread, submit has no parser delay
+        # Zdepth is decompressed one batch of workers packets at a time
+        codec = hl2ss.decode_rm_depth_ahat(rd.profile_z, rd.profile_ab)
+        codec.create()
+        if (rd.profile_z == hl2ss.DepthProfile.ZDEPTH):
+            decode = lambda payloads: codec.submit_batch(payloads, [None] * len(payloads))
+        else:
+            decode = lambda payloads: [frame for payload in payloads for frame in codec.submit(payload, None)]
+        submit = lambda payloads: [executor.submit(_encode_png_rm_depth, frame, images) for frame, _ in decode(payloads)]
+        # Frames still held by the AB decoder after the last packet
+        flush = lambda: [executor.submit(_encode_png_rm_depth, frame, images) for frame, _ in codec.flush()]
+
     tar = tarfile.open(output_filename, 'w')
     idx = 0
+    batch = []
 
     while (True):
         data = rd.get_next_packet()
+        if (data is not None):
+            batch.append(data.payload)
+            if (len(batch) < workers):
+                continue
+        pending.extend(submit(batch))
+        batch = []
+        while (len(pending) > (2 * workers)):
+            _add_png(tar, pending.popleft().result(), idx)
+            idx += 1
         if (data is None):
             break
-        depth = cv2.imencode('.png', data.payload.depth)[1].tobytes()
-        ab = cv2.imencode('.png', data.payload.ab)[1].tobytes()
-        depth_info = tarfile.TarInfo(f'depth_{idx}.png')        
-        ab_info = tarfile.TarInfo(f'ab_{idx}.png')
-        depth_info.size = len(depth)
-        ab_info.size = len(ab)
-        tar.addfile(depth_info, io.BytesIO(depth))
-        tar.addfile(ab_info, io.BytesIO(ab))
+
+    pending.extend(flush())
+
+    while (len(pending) > 0):
+        _add_png(tar, pending.popleft().result(), idx)
         idx += 1
 
+    executor.shutdown()
     tar.close()
     rd.close()
 
@@ -0,0 +1,88 @@
+#------------------------------------------------------------------------------
+# This script receives multiple streams from the HoloLens using a single
+# asyncio event loop and prints the number of packets received per second for
+# each stream. Packets are not decoded.
+# Press ctrl+c to stop.
+#------------------------------------------------------------------------------
+
+import asyncio
+import time
+import hl2ss
+import hl2ss_lnm
+import hl2ss_aio
+
+# Settings --------------------------------------------------------------------
+
+# HoloLens address
+host = '192.168.1.7'
+
+# Ports
+ports = [
+    hl2ss.StreamPort.RM_VLC_LEFTFRONT,
+    hl2ss.StreamPort.RM_VLC_LEFTLEFT,
+    hl2ss.StreamPort.RM_VLC_RIGHTFRONT,
+    hl2ss.StreamPort.RM_VLC_RIGHTRIGHT,
+    hl2ss.StreamPort.RM_DEPTH_AHAT,
+    hl2ss.StreamPort.RM_IMU_ACCELEROMETER,
+    hl2ss.StreamPort.RM_IMU_GYROSCOPE,
+    hl2ss.StreamPort.PERSONAL_VIDEO,
+    hl2ss.StreamPort.MICROPHONE,
+    hl2ss.StreamPort.SPATIAL_INPUT,
+]
+
+# Report period in seconds
+report_period = 1
+
+#------------------------------------------------------------------------------
+
+async def open_rx(port):
+    if (port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return await hl2ss_aio.open_rx_rm_vlc(host, port)
+    if (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return await hl2ss_aio.open_rx_rm_depth_ahat(host, port)
+    if (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return await hl2ss_aio.open_rx_rm_depth_longthrow(host, port)
+    if (port in [hl2ss.StreamPort.RM_IMU_ACCELEROMETER, hl2ss.StreamPort.RM_IMU_GYROSCOPE, hl2ss.StreamPort.RM_IMU_MAGNETOMETER]):
+        return await hl2ss_aio.open_rx_rm_imu(host, port)
+    if (port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return await hl2ss_aio.open_rx_pv(host, port)
+    if (port == hl2ss.StreamPort.MICROPHONE):
+        return await hl2ss_aio.open_rx_microphone(host, port)
+    if (port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return await hl2ss_aio.open_rx_si(host, port)
+
+
+async def receive(port, counters):
+    rx = await open_rx(port)
+    try:
+        async for data in rx:
+            counters[port] += 1
+    finally:
+        await rx.close()
+
+
+async def report(counters):
+    while (True):
+        start = time.perf_counter()
+        await asyncio.sleep(report_period)
+        delta = time.perf_counter() - start
+        print({hl2ss.get_port_name(port) : round(count / delta, 1) for port, count in counters.items()})
+        for port in counters.keys():
+            counters[port] = 0
+
+
+async def main():
+    counters = {port : 0 for port in ports}
+    await asyncio.gather(report(counters), *[receive(port, counters) for port in ports])
+
+
+if (hl2ss.StreamPort.PERSONAL_VIDEO in ports):
+    hl2ss_lnm.start_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
+
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    pass
+
+if (hl2ss.StreamPort.PERSONAL_VIDEO in ports):
+    hl2ss_lnm.stop_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
@@ -77,7 +77,8 @@ ipc_unity.push(cb_unity)
 ipc_unity.pull(cb_unity)
 
 # Start PV stream -------------------------------------------------------------
-rx_pv = hl2ss_lnm.rx_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO, width=width_pv, height=height_pv, framerate=framerate_pv)
+# Only the most recent frame is processed to keep latency low
+rx_pv = hl2ss.rx_latest(hl2ss_lnm.rx_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO, width=width_pv, height=height_pv, framerate=framerate_pv))
 rx_pv.open()
 
 # Main Loop -------------------------------------------------------------------
@@ -0,0 +1,95 @@
+#------------------------------------------------------------------------------
+# This script receives the four VLC cameras, AHAT and PV and decodes them in a
+# pool of worker processes, so decoding uses all cores regardless of how many
+# streams each process receives. Prints the number of frames decoded per
+# second for each stream.
+# Press ctrl+c to stop.
+#------------------------------------------------------------------------------
+
+import time
+import hl2ss
+import hl2ss_lnm
+import hl2ss_dp
+
+# Settings --------------------------------------------------------------------
+
+# HoloLens address
+host = '192.168.1.7'
+
+# Ports
+ports = [
+    hl2ss.StreamPort.RM_VLC_LEFTFRONT,
+    hl2ss.StreamPort.RM_VLC_LEFTLEFT,
+    hl2ss.StreamPort.RM_VLC_RIGHTFRONT,
+    hl2ss.StreamPort.RM_VLC_RIGHTRIGHT,
+    hl2ss.StreamPort.RM_DEPTH_AHAT,
+    hl2ss.StreamPort.PERSONAL_VIDEO,
+]
+
+# PV parameters
+pv_width     = 1920
+pv_height    = 1080
+pv_framerate = 30
+pv_format    = 'bgr24'
+
+# Number of worker processes (None for one per core)
+workers = None
+
+# Packets decoding at the same time per stream
+inflight = 4
+
+# Report period in seconds
+report_period = 1
+
+#------------------------------------------------------------------------------
+
+def create_rx(port):
+    if (port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return hl2ss_lnm.rx_rm_vlc(host, port, decoded=False)
+    if (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return hl2ss_lnm.rx_rm_depth_ahat(host, port, decoded=False)
+    if (port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return hl2ss_lnm.rx_pv(host, port, width=pv_width, height=pv_height, framerate=pv_framerate, decoded_format=None)
+
+
+if (__name__ == '__main__'):
+    if (hl2ss.StreamPort.PERSONAL_VIDEO in ports):
+        hl2ss_lnm.start_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
+
+    pool = hl2ss_dp.decoder_pool(workers)
+    receivers = dict()
+    for port in ports:
+        rx = create_rx(port)
+        pool.configure(port, rx, pv_format, inflight)
+        receivers[port] = rx
+    pool.open()
+
+    receivers = {port : hl2ss_dp.rx_pooled(rx, pool.get_client(port)) for port, rx in receivers.items()}
+    for rx in receivers.values():
+        rx.open()
+
+    # Round robin for brevity, use one thread or process per stream to avoid
+    # waiting on the slowest stream
+    counts = {port : 0 for port in ports}
+    start = time.perf_counter()
+
+    try:
+        while (True):
+            for port, rx in receivers.items():
+                data = rx.get_next_packet()
+                counts[port] += 1
+            delta = time.perf_counter() - start
+            if (delta >= report_period):
+                print({hl2ss.get_port_name(port) : round(count / delta, 1) for port, count in counts.items()})
+                counts = {port : 0 for port in ports}
+                start = time.perf_counter()
+    except KeyboardInterrupt:
+        pass
+
+    for rx in receivers.values():
+        rx.close()
+
+    pool.close()
+
+    if (hl2ss.StreamPort.PERSONAL_VIDEO in ports):
+        hl2ss_lnm.stop_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
@@ -0,0 +1,84 @@
+#------------------------------------------------------------------------------
+# This script receives multiple streams from the HoloLens using a single
+# thread and prints the number of packets received per second for each
+# stream. Packets are not decoded.
+# Press ctrl+c to stop.
+#------------------------------------------------------------------------------
+
+import queue
+import time
+import hl2ss
+import hl2ss_lnm
+import hl2ss_demux
+
+# Settings --------------------------------------------------------------------
+
+# HoloLens address
+host = '192.168.1.7'
+
+# Ports
+ports = [
+    hl2ss.StreamPort.RM_VLC_LEFTFRONT,
+    hl2ss.StreamPort.RM_VLC_LEFTLEFT,
+    hl2ss.StreamPort.RM_VLC_RIGHTFRONT,
+    hl2ss.StreamPort.RM_VLC_RIGHTRIGHT,
+    hl2ss.StreamPort.RM_DEPTH_AHAT,
+    hl2ss.StreamPort.RM_IMU_ACCELEROMETER,
+    hl2ss.StreamPort.RM_IMU_GYROSCOPE,
+    hl2ss.StreamPort.PERSONAL_VIDEO,
+    hl2ss.StreamPort.MICROPHONE,
+    hl2ss.StreamPort.SPATIAL_INPUT,
+]
+
+# Report period in seconds
+report_period = 1
+
+#------------------------------------------------------------------------------
+
+def create_rx(port):
+    if (port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return hl2ss_lnm.rx_rm_vlc(host, port, decoded=False)
+    if (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return hl2ss_lnm.rx_rm_depth_ahat(host, port, decoded=False)
+    if (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return hl2ss_lnm.rx_rm_depth_longthrow(host, port, decoded=False)
+    if (port in [hl2ss.StreamPort.RM_IMU_ACCELEROMETER, hl2ss.StreamPort.RM_IMU_GYROSCOPE, hl2ss.StreamPort.RM_IMU_MAGNETOMETER]):
+        return hl2ss_lnm.rx_rm_imu(host, port)
+    if (port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return hl2ss_lnm.rx_pv(host, port, decoded_format=None)
+    if (port == hl2ss.StreamPort.MICROPHONE):
+        return hl2ss_lnm.rx_microphone(host, port, decoded=False)
+    if (port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return hl2ss_lnm.rx_si(host, port)
+
+
+if (hl2ss.StreamPort.PERSONAL_VIDEO in ports):
+    hl2ss_lnm.start_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
+
+queues = {port : queue.Queue() for port in ports}
+
+demux = hl2ss_demux.demux()
+for port in ports:
+    demux.configure(port, create_rx(port), queues[port].put)
+demux.open()
+
+try:
+    while (True):
+        start = time.perf_counter()
+        time.sleep(report_period)
+        delta = time.perf_counter() - start
+        counts = dict()
+        for port in ports:
+            count = 0
+            while (not queues[port].empty()):
+                queues[port].get()
+                count += 1
+            counts[hl2ss.get_port_name(port)] = round(count / delta, 1)
+        print(counts)
+except KeyboardInterrupt:
+    pass
+
+demux.close()
+
+if (hl2ss.StreamPort.PERSONAL_VIDEO in ports):
+    hl2ss_lnm.stop_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
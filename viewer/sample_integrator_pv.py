@@ -99,6 +99,8 @@ if __name__ == '__main__':
     sink_pv.get_attach_response()
     sink_depth.get_attach_response()
 
+    sync = hl2ss_mp.synchronizer(consumer, hl2ss.StreamPort.RM_DEPTH_LONGTHROW, {hl2ss.StreamPort.PERSONAL_VIDEO : (None, hl2ss_mp.TimePreference.PREFER_NEAREST)})
+
     # Initialize PV intrinsics and extrinsics ---------------------------------
     pv_intrinsics = hl2ss.create_pv_intrinsics_placeholder()
     pv_extrinsics = np.eye(4, 4, dtype=np.float32)
@@ -106,15 +108,15 @@ if __name__ == '__main__':
     # Main Loop ---------------------------------------------------------------
     while (enable):
         # Wait for RM Depth Long Throw frame ----------------------------------
-        sink_depth.acquire()
+        sync.acquire()
 
         # Get RM Depth Long Throw frame and nearest (in time) PV frame --------
-        _, data_lt = sink_depth.get_most_recent_frame()
-        if ((data_lt is None) or (not hl2ss.is_valid_pose(data_lt.pose))):
+        frame_set = sync.get_frame_set()
+        if (frame_set is None):
             continue
 
-        _, data_pv = sink_pv.get_nearest(data_lt.timestamp)
-        if ((data_pv is None) or (not hl2ss.is_valid_pose(data_pv.pose))):
+        _, (data_lt, data_pv) = frame_set
+        if ((not hl2ss.is_valid_pose(data_lt.pose)) or (not hl2ss.is_valid_pose(data_pv.pose))):
             continue
 
         # Preprocess frames ---------------------------------------------------
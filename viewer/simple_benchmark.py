@@ -0,0 +1,62 @@
+#------------------------------------------------------------------------------
+# Benchmark example. Measures how many packets per second each stream and
+# profile can be received and decoded on this computer, with p50/p99 latency,
+# CPU time and allocations for the network and decode stages. Results are
+# saved as JSON and compared against a baseline report, if any.
+#------------------------------------------------------------------------------
+
+import os
+import hl2ss_benchmark
+
+# Settings --------------------------------------------------------------------
+
+# Packet source
+# None: local emulator with synthetic data (or recordings below)
+# Otherwise: HoloLens or relay address
+host = None
+
+# Recorded data for the emulator
+# Ports listed loop the payloads stored in the given hl2ss_io bin file
+recordings = {
+}
+
+# Number of packets per case
+packets = 300
+warmup = 30
+allocation_packets = 30
+
+# PV parameters
+pv_width     = 1920
+pv_height    = 1080
+pv_framerate = 30
+
+# Cases to run (None for all)
+names = None
+
+# Output report
+filename = './benchmark.json'
+
+# Baseline report to compare against (None to skip)
+baseline = None
+
+# Throughput drop considered a regression
+tolerance = 0.1
+
+#------------------------------------------------------------------------------
+
+if (__name__ == '__main__'):
+    cases = [case for case in hl2ss_benchmark.create_cases(pv_width, pv_height, pv_framerate) if ((names is None) or (case.name in names))]
+
+    reference = hl2ss_benchmark.load_report(baseline) if ((baseline is not None) and os.path.isfile(baseline)) else None
+
+    report = hl2ss_benchmark.run(cases, host, packets, warmup, allocation_packets, recordings)
+    hl2ss_benchmark.save_report(filename, report)
+
+    print(f'Saved report to {filename}')
+
+    if (reference is not None):
+        regressions = hl2ss_benchmark.compare_reports(reference, report, tolerance)
+        for name, (before, after) in regressions.items():
+            print(f'Regression in {name}: {before:.1f} -> {after:.1f} packets/s')
+        if (len(regressions) <= 0):
+            print('No regressions')
@@ -0,0 +1,29 @@
+#------------------------------------------------------------------------------
+# Multiprocessing benchmark example. Measures the round trip latency of
+# hl2ss_mp sink requests with 1, 4 and 16 sinks attached to a stream fed by a
+# synthetic source. Results are saved as JSON.
+#------------------------------------------------------------------------------
+
+import hl2ss_benchmark
+
+# Settings --------------------------------------------------------------------
+
+# Number of sinks attached to the stream for each case
+sink_counts = [1, 4, 16]
+
+# Number of requests per case
+requests = 1000
+
+# Source frame rate
+rate = 30
+
+# Output report
+filename = './benchmark_mp.json'
+
+#------------------------------------------------------------------------------
+
+if (__name__ == '__main__'):
+    report = hl2ss_benchmark.run_mp_latency(sink_counts, requests, rate)
+    hl2ss_benchmark.save_report(filename, report)
+
+    print(f'Saved report to {filename}')
@@ -0,0 +1,46 @@
+#------------------------------------------------------------------------------
+# Emulator example. Serves synthetic data on all hl2ss ports so clients can be
+# run and benchmarked without a HoloLens. Point the client scripts to the
+# emulator address instead of the HoloLens address.
+# Press ctrl+c to stop.
+#------------------------------------------------------------------------------
+
+import time
+import hl2ss
+import hl2ss_emu
+
+# Settings --------------------------------------------------------------------
+
+# Emulator address
+host = '127.0.0.1'
+
+# Packet rate overrides (packets per second)
+# Ports not listed use the rate of the device
+# Use hl2ss_emu.Rate.UNTHROTTLED to send packets as fast as possible
+rates = {
+}
+
+# Payload size overrides (bytes)
+# Ports listed send random payloads of the given size instead of synthetic data
+sizes = {
+}
+
+# Recorded data
+# Ports listed loop the payloads stored in the given hl2ss_io bin file
+recordings = {
+}
+
+#------------------------------------------------------------------------------
+
+emulator = hl2ss_emu.emulator(host, None, rates, sizes, recordings)
+emulator.open()
+
+print(f'Serving on {host}: ' + ', '.join([hl2ss.get_port_name(port) for port in emulator.ports]))
+
+try:
+    while (True):
+        time.sleep(1)
+except KeyboardInterrupt:
+    pass
+
+emulator.close()
@@ -0,0 +1,44 @@
+#------------------------------------------------------------------------------
+# Keyframe player example. Shows one frame per GOP (one per second with the
+# default GOP size) of PV data recorded using simple recorder, for previews
+# and fast scrubbing. Other frames are skipped without being decoded.
+# Press space to pause and esc to stop.
+#------------------------------------------------------------------------------
+
+import cv2
+import os
+import hl2ss_imshow
+import hl2ss
+import hl2ss_io
+
+# Settings --------------------------------------------------------------------
+
+# Directory containing the recorded data
+path = './data'
+
+# Thumbnail scale
+scale = 0.5
+
+#------------------------------------------------------------------------------
+
+port = hl2ss.StreamPort.PERSONAL_VIDEO
+filename = os.path.join(path, f'{hl2ss.get_port_name(port)}.bin')
+
+reader = hl2ss_io.create_rd(filename, hl2ss.ChunkSize.SINGLE_TRANSFER, 'bgr24', keyframes_only=True)
+reader.open()
+
+while (True):
+    data = reader.get_next_packet()
+    if (data is None):
+        break
+
+    print(f'Keyframe at time {data.timestamp}')
+
+    cv2.imshow('Keyframes', cv2.resize(data.payload.image, None, fx=scale, fy=scale))
+    key = cv2.waitKey(1)
+    if (key == 27):
+        break
+    if (key == 32):
+        cv2.waitKey(0)
+
+reader.close()
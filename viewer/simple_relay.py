@@ -0,0 +1,84 @@
+#------------------------------------------------------------------------------
+# Relay example. Holds one connection per port to the HoloLens and serves the
+# received packets to any number of local clients. Point the client scripts to
+# the relay address instead of the HoloLens address. Clients can connect and
+# disconnect at any time without reconnecting to the HoloLens. Video clients
+# start receiving at the next keyframe.
+# Stream configuration is set here, configuration sent by clients is ignored.
+# Download calibration before starting the relay since the relay does not
+# answer calibration requests.
+# Press ctrl+c to stop.
+#------------------------------------------------------------------------------
+
+import time
+import hl2ss
+import hl2ss_lnm
+import hl2ss_relay
+
+# Settings --------------------------------------------------------------------
+
+# HoloLens address
+host = '192.168.1.7'
+
+# Relay address
+relay_host = '127.0.0.1'
+
+# Ports to relay
+ports = [
+    hl2ss.StreamPort.RM_VLC_LEFTFRONT,
+    #hl2ss.StreamPort.RM_DEPTH_AHAT,
+    hl2ss.StreamPort.PERSONAL_VIDEO,
+    hl2ss.StreamPort.MICROPHONE,
+    hl2ss.StreamPort.SPATIAL_INPUT,
+]
+
+# PV parameters
+pv_width     = 760
+pv_height    = 428
+pv_framerate = 30
+
+# Maximum number of packets waiting to be sent to each client
+backlog = 64
+
+# What to do when a client falls behind
+policy = hl2ss_relay.DropPolicy.SKIP
+
+#------------------------------------------------------------------------------
+
+def create_rx(port):
+    if (port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return hl2ss_lnm.rx_rm_vlc(host, port, decoded=False)
+    if (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return hl2ss_lnm.rx_rm_depth_ahat(host, port, decoded=False)
+    if (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return hl2ss_lnm.rx_rm_depth_longthrow(host, port, decoded=False)
+    if (port in [hl2ss.StreamPort.RM_IMU_ACCELEROMETER, hl2ss.StreamPort.RM_IMU_GYROSCOPE, hl2ss.StreamPort.RM_IMU_MAGNETOMETER]):
+        return hl2ss_lnm.rx_rm_imu(host, port)
+    if (port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return hl2ss_lnm.rx_pv(host, port, width=pv_width, height=pv_height, framerate=pv_framerate, decoded_format=None)
+    if (port == hl2ss.StreamPort.MICROPHONE):
+        return hl2ss_lnm.rx_microphone(host, port, decoded=False)
+    if (port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return hl2ss_lnm.rx_si(host, port)
+
+
+if (hl2ss.StreamPort.PERSONAL_VIDEO in ports):
+    hl2ss_lnm.start_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
+
+relays = [hl2ss_relay.relay(create_rx(port), relay_host, port, backlog, policy) for port in ports]
+
+for relay in relays:
+    relay.open()
+
+try:
+    while (True):
+        time.sleep(1)
+        print({hl2ss.get_port_name(relay.port) : (relay.get_subscriber_count(), relay.get_drop_count()) for relay in relays})
+except KeyboardInterrupt:
+    pass
+
+for relay in relays:
+    relay.close()
+
+if (hl2ss.StreamPort.PERSONAL_VIDEO in ports):
+    hl2ss_lnm.stop_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
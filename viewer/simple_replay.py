@@ -0,0 +1,51 @@
+#------------------------------------------------------------------------------
+# Replay example. Serves data recorded using simple recorder over the hl2ss
+# protocol so clients can run against recorded data without a HoloLens. Point
+# the client scripts to the replay address instead of the HoloLens address.
+# Clients must request the same stream configuration (profiles, resolution,
+# etc.) that was used during recording since payloads are sent as recorded.
+# Press ctrl+c to stop.
+#------------------------------------------------------------------------------
+
+import os
+import time
+import hl2ss
+import hl2ss_emu
+
+# Settings --------------------------------------------------------------------
+
+# Replay address
+host = '127.0.0.1'
+
+# Directory containing the recorded data
+path = './data'
+
+# Replay speed
+# 1 is real time, 2 is twice as fast, etc.
+# Use hl2ss_emu.Rate.UNTHROTTLED to send packets as fast as possible
+speed = 1
+
+# Restart from the beginning when a recording ends
+loop = False
+
+#------------------------------------------------------------------------------
+
+filenames = dict()
+
+for port in range(hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.EXTENDED_VIDEO + 1):
+    filename = os.path.join(path, f'{hl2ss.get_port_name(port)}.bin')
+    if (os.path.isfile(filename)):
+        filenames[port] = filename
+
+replay = hl2ss_emu.replay(host, filenames, speed, loop)
+replay.open()
+
+print(f'Serving on {host}: ' + ', '.join([hl2ss.get_port_name(port) for port in filenames.keys()]))
+
+try:
+    while (True):
+        time.sleep(1)
+except KeyboardInterrupt:
+    pass
+
+replay.close()